@@ -0,0 +1,145 @@
+"""
+accessibility_ingest.py
+
+Benchmark: streaming ATAC-seq peak ingestion on synthetic data.
+
+Writes a GFF3 placing the model's genes at random positions on 16
+chromosomes and narrowPeak files with random peaks (fixed seed), then runs
+services.accessibility.run over all samples. Reports throughput, peak
+Python heap (tracemalloc) and the process's max RSS, and checks the gene
+signal of a 20k-peak file against a naive per-peak overlap scan.
+
+Usage:
+    python benchmarks/accessibility_ingest.py models/yeast-GEM.xml [peaks_per_sample] [samples] [processes]
+"""
+
+import gzip
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, gpr
+from services import accessibility
+
+CHROMOSOMES = [f'chr{n}' for n in ('I', 'II', 'III', 'IV', 'V', 'VI', 'VII', 'VIII',
+                                   'IX', 'X', 'XI', 'XII', 'XIII', 'XIV', 'XV', 'XVI')]
+CHROM_LENGTH = 1000000
+
+
+def write_annotation(path, genes, rng):
+    with open(path, 'w') as f:
+        f.write('##gff-version 3\n')
+        for gene_id in genes:
+            chrom = rng.choice(CHROMOSOMES)
+            start = rng.randrange(1, CHROM_LENGTH - 5000)
+            end = start + rng.randrange(300, 4000)
+            strand = rng.choice('+-')
+            f.write(f'{chrom}\tSGD\tgene\t{start}\t{end}\t.\t{strand}\t.\tID={gene_id};Name={gene_id}\n')
+
+
+def write_peaks(path, n, seed):
+    """narrowPeak lines in blocks, gzipped, without holding the file in memory."""
+    rng = np.random.default_rng(seed)
+    with gzip.open(path, 'wt', compresslevel=1) as f:
+        block = 200000
+        for offset in range(0, n, block):
+            m = min(block, n - offset)
+            chroms = rng.integers(0, len(CHROMOSOMES), m)
+            starts = rng.integers(0, CHROM_LENGTH - 2000, m)
+            widths = rng.integers(150, 1500, m)
+            signal = rng.gamma(2.0, 3.0, m)
+            f.write(''.join(
+                f'{CHROMOSOMES[c]}\t{s}\t{s + w}\tpeak{offset + i}\t0\t.\t{v:.3f}\t-1\t-1\t{w // 2}\n'
+                for i, (c, s, w, v) in enumerate(zip(chroms, starts, widths, signal))
+            ))
+
+
+def naive_signal(peak_path, index_genes, positions, upstream, downstream):
+    """Per-peak scan over every promoter: the reference for the check."""
+    promoters = []
+    for col, gene_id in enumerate(index_genes):
+        if gene_id in positions:
+            chrom, tss, strand = positions[gene_id]
+            if strand == '-':
+                promoters.append((chrom, max(0, tss - downstream + 1), tss + upstream + 1, col))
+            else:
+                promoters.append((chrom, max(0, tss - upstream), tss + downstream, col))
+    totals = np.full(len(index_genes), np.nan)
+    totals[[col for _, _, _, col in promoters]] = 0.0
+    with gzip.open(peak_path, 'rt') as f:
+        for line in f:
+            fields = line.split('\t')
+            chrom, start, end, signal = fields[0][3:], int(fields[1]), int(fields[2]), float(fields[6])
+            for p_chrom, p_start, p_end, col in promoters:
+                if p_chrom == chrom and p_start < end and p_end > start:
+                    totals[col] += signal
+    return totals
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    model_path = sys.argv[1]
+    peaks_per_sample = int(sys.argv[2]) if len(sys.argv) > 2 else 2000000
+    n_samples = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    
+    if not cobra_model.load(model_path):
+        sys.exit(f"Could not load {model_path}")
+    model = cobra_model.get_model()
+    genes = gpr.get_compiled(model)['genes']
+    rng = random.Random(0)
+    
+    with tempfile.TemporaryDirectory(prefix='bench-atac-') as tmp:
+        annotation = os.path.join(tmp, 'genes.gff3')
+        write_annotation(annotation, genes, rng)
+        
+        # Correctness: vectorized overlap vs. naive scan on a small file
+        small = os.path.join(tmp, 'small.narrowPeak.gz')
+        write_peaks(small, 20000, seed=99)
+        positions = accessibility.read_gene_positions(annotation, genes)
+        index = accessibility.build_promoter_index(positions, genes)
+        fast, _, _ = accessibility.gene_signal(small, index, len(genes), chunk_size=7000)
+        slow = naive_signal(small, genes, positions, accessibility.DEFAULT_UPSTREAM,
+                            accessibility.DEFAULT_DOWNSTREAM)
+        assert np.array_equal(np.isnan(fast), np.isnan(slow))
+        print(f"Check vs naive scan (20k peaks): max abs diff {np.nanmax(np.abs(fast - slow)):.2e}")
+        
+        samples = []
+        start = time.perf_counter()
+        for i in range(n_samples):
+            path = os.path.join(tmp, f'sample{i}.narrowPeak.gz')
+            write_peaks(path, peaks_per_sample, seed=i)
+            samples.append({'name': f'sample{i}', 'path': path})
+        print(f"Wrote {n_samples} x {peaks_per_sample:,} peaks in {time.perf_counter() - start:.1f} s")
+        
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        start = time.perf_counter()
+        summary = accessibility.run(model, samples, annotation, processes=processes, output_dir=tmp)
+        seconds = time.perf_counter() - start
+        _, peak_heap = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    total = peaks_per_sample * n_samples
+    print(f"\nIngested {total:,} peaks ({n_samples} samples, {processes} process(es)) in {seconds:.2f} s "
+          f"= {total / seconds / 1e6:.2f} M peaks/s")
+    for name, stats in summary['stats'].items():
+        print(f"  {name}: {stats['peaks']:,} peaks, {stats['promoter_peaks']:,} on promoters, "
+              f"{stats['seconds']:.2f} s")
+    print(f"Genes indexed: {summary['genes_indexed']} / {summary['genes']}, "
+          f"reactions with a rule: {summary['reactions_with_rule']}")
+    print(f"Peak traced heap: {peak_heap / 1e6:.1f} MB, max RSS {rss_before / 1024:.0f} -> {rss_after / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+blocked_reactions.py
+
+Benchmark: blocked-reaction and dead-end precomputation.
+
+Times services.network.analyze (dead-end propagation, then LP passes per
+direction on the flux cone) against cobra's find_blocked_reactions (flux
+variability on every reaction), then the disk and memory cache hits. The
+blocked sets are compared; reactions only one side calls blocked are listed
+with their flux range under the model's bounds (cobra compares the FVA
+range against its tolerance, the cone LPs whether any flux is possible,
+settling fluxes at round-off level in exact arithmetic).
+
+Usage:
+    python benchmarks/blocked_reactions.py models/yeast-GEM.xml [processes]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model
+from services import network
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    model = cobra_model.get_model()
+    cache_dir = tempfile.mkdtemp(prefix='network-')
+    
+    start = time.perf_counter()
+    analysis = network.get_analysis(model, processes=processes, cache_dir=cache_dir)
+    cold_seconds = time.perf_counter() - start
+    summary = network.summary(analysis)
+    
+    network._analysis = {'key': None}
+    start = time.perf_counter()
+    assert network.get_analysis(model, cache_dir=cache_dir)['cached'] == 'disk'
+    disk_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    assert network.get_analysis(model, cache_dir=cache_dir)['cached'] == 'memory'
+    memory_seconds = time.perf_counter() - start
+    
+    from cobra.flux_analysis import find_blocked_reactions
+    start = time.perf_counter()
+    expected = set(find_blocked_reactions(model, open_exchanges=False, processes=processes))
+    cobra_seconds = time.perf_counter() - start
+    
+    got = set(summary['blocked_reactions'])
+    print(f"{summary['reactions']} reactions: {summary['blocked']} blocked "
+          f"({summary['structurally_blocked']} by {summary['dead_end_metabolites']} dead-end metabolites), "
+          f"{summary['forward_only']} forward only, {summary['reverse_only']} reverse only")
+    print(f"  network.analyze:         {cold_seconds:7.2f} s")
+    print(f"  disk cache hit:          {disk_seconds * 1000:7.1f} ms")
+    print(f"  memory cache hit:        {memory_seconds * 1000:7.1f} ms")
+    print(f"  find_blocked_reactions:  {cobra_seconds:7.2f} s ({cobra_seconds / cold_seconds:.0f}x)")
+    print(f"  blocked by both: {len(got & expected)}, only cobra: {len(expected - got)}, only here: {len(got - expected)}")
+    
+    if expected ^ got:
+        from cobra.flux_analysis import flux_variability_analysis
+        ranges = flux_variability_analysis(model, sorted(expected ^ got), fraction_of_optimum=0)
+        for rxn_id, row in ranges.iterrows():
+            side = 'only cobra' if rxn_id in expected else 'only here'
+            print(f"    {rxn_id} ({side}): flux range [{row['minimum']:.2e}, {row['maximum']:.2e}] under the model's bounds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+compression.py
+
+Benchmark: FBA, pFBA, FVA and sampling on the compressed model.
+
+Runs each analysis on the full model and on the reduced one from
+services.compression (blocked reactions removed, chains merged, coupled
+sets lumped), for the model's default medium, and reports the speedup per
+analysis type with the largest differences: objective values, FVA ranges
+over a random subset of reactions, and for sampling the steady-state and
+bound violations of the expanded samples (samples are random, so they
+are checked rather than compared).
+
+Usage:
+    python benchmarks/compression.py models/yeast-GEM.xml [fva_reactions] [samples]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, solver
+from services import compression, network, sampling
+
+REPEATS = 5
+
+
+def _best(func, repeats=REPEATS):
+    """Best wall time of repeated calls, and the last result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _report(name, full_seconds, reduced_seconds, diff):
+    print(f"  {name:<9} full {full_seconds * 1000:9.1f} ms   reduced {reduced_seconds * 1000:9.1f} ms   "
+          f"{full_seconds / reduced_seconds:5.1f}x   max diff {diff:.2e}")
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    n_fva = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    n_samples = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    model = cobra_model.get_model()
+    solver.configure(canonical=False)
+    
+    start = time.perf_counter()
+    network.get_analysis(model)
+    analysis_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    reduced = compression.prepare(model)
+    build_seconds = time.perf_counter() - start
+    s = reduced['stats']
+    print(f"{len(model.reactions)} reactions x {len(model.metabolites)} metabolites -> "
+          f"{s['reduced_reactions']} x {s['reduced_metabolites']} "
+          f"({s['blocked_removed']} blocked, {s['chain_merges']} chain merges, {s['coupled_lumps']} coupled lumps)")
+    print(f"  network analysis {analysis_seconds:.2f} s, compression {build_seconds:.2f} s "
+          f"(once per model and medium)")
+    
+    for mode in ('fba', 'pfba'):
+        full_seconds, full = _best(lambda: solver.solve(model, mode))
+        reduced_seconds, small = _best(lambda: compression.solve(model, mode))
+        diff = abs(full.objective_value - small.objective_value)
+        if mode == 'pfba':
+            diff = max(diff, abs(full.mode_objective - small.mode_objective))
+        _report(mode, full_seconds, reduced_seconds, diff)
+    
+    rng = np.random.default_rng(0)
+    reaction_ids = [model.reactions[i].id for i in
+                    rng.choice(len(model.reactions), min(n_fva, len(model.reactions)), replace=False)]
+    from cobra.flux_analysis import flux_variability_analysis
+    start = time.perf_counter()
+    full = flux_variability_analysis(model, reaction_ids, fraction_of_optimum=0.9)
+    full_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    small = compression.fva(model, reaction_ids, fraction_of_optimum=0.9)
+    reduced_seconds = time.perf_counter() - start
+    diff = max(np.abs(full['minimum'].to_numpy() - small['minimum']).max(),
+               np.abs(full['maximum'].to_numpy() - small['maximum']).max())
+    _report(f'fva/{len(reaction_ids)}', full_seconds, reduced_seconds, diff)
+    
+    if n_samples > 0:
+        output_dir = tempfile.mkdtemp(prefix='samples-')
+        start = time.perf_counter()
+        sampling.sample(model, n_samples, chunk_size=n_samples, method='achr', seed=0,
+                        output_dir=output_dir)
+        full_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        result = sampling.sample(model, n_samples, chunk_size=n_samples, method='achr', seed=0,
+                                 output_dir=output_dir, reduced=compression.prepare(model))
+        reduced_seconds = time.perf_counter() - start
+        samples = np.load(result['path']).astype(float)
+        s = network.stoichiometry(model)
+        matrix = np.zeros((len(s['met_ids']), len(s['reaction_ids'])))
+        np.add.at(matrix, (s['rows'], s['columns']), s['coefs'])
+        lower, upper = cobra_model.get_bounds(model)
+        # float32 storage limits both checks to ~1e-6 relative
+        imbalance = np.abs(samples @ matrix.T).max()
+        violation = max((lower - samples).max(), (samples - upper).max(), 0)
+        _report(f'sample/{n_samples}', full_seconds, reduced_seconds, max(imbalance, violation))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+context_batch.py
+
+Benchmark: batch GIMME on one reused LP template vs. a template built per
+sample (what building each context model on its own costs).
+
+A random log-normal samples x genes matrix (fixed seed) is mapped to
+reaction weights, then every sample is solved twice: once with
+services.context.run (one template per worker, only the objective
+coefficients swapped between samples) and once rebuilding the template
+for each sample. Objective values are compared.
+
+Usage:
+    python benchmarks/context_batch.py models/yeast-GEM.xml [samples] [processes]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, gpr
+from services import context
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    n_samples = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    model = cobra_model.get_model()
+    genes = gpr.get_compiled(model)['genes']
+    samples = [f'sample{i}' for i in range(n_samples)]
+    matrix = np.random.default_rng(0).lognormal(2.0, 1.0, (n_samples, len(genes)))
+    
+    with tempfile.TemporaryDirectory(prefix='bench-context-') as tmp:
+        start = time.perf_counter()
+        summary = context.run(model, samples, genes, matrix, method='gimme', processes=processes,
+                              output_dir=tmp)
+        batch_seconds = time.perf_counter() - start
+        batch = [summary['stats'][s]['objective'] for s in samples]
+        
+        start = time.perf_counter()
+        rebuilt = []
+        for i in range(n_samples):
+            context._template = None
+            one = context.run(model, [samples[i]], genes, matrix[[i]], method='gimme', processes=1,
+                              output_dir=tmp)
+            rebuilt.append(one['stats'][samples[i]]['objective'])
+        rebuild_seconds = time.perf_counter() - start
+    
+    diff = max(abs(a - b) for a, b in zip(batch, rebuilt))
+    print(f"GIMME, {n_samples} samples, {processes} process(es)")
+    print(f"  reused template:     {batch_seconds:6.2f} s ({batch_seconds / n_samples * 1000:.0f} ms/sample)")
+    print(f"  template per sample: {rebuild_seconds:6.2f} s ({rebuild_seconds / n_samples * 1000:.0f} ms/sample)")
+    print(f"  speedup {rebuild_seconds / batch_seconds:.1f}x, max objective difference {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
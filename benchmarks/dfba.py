@@ -0,0 +1,97 @@
+"""
+dfba.py
+
+Benchmark: dynamic FBA of a batch culture.
+
+Simulates 48 h of growth on glucose, with ethanol tracked, under an oxygen
+uptake limit (so that the culture ferments, then grows on its ethanol). The
+run uses services.dfba (one LP re-solved from the previous basis at every
+step) on the compressed model and on the full model, and then repeats the
+compressed run with the basis reset to GLPK's standard basis before each
+step. Reports steps, LPs per second and wall time, and the largest
+difference in biomass and concentrations between runs.
+
+Usage:
+    python benchmarks/dfba.py models/yeast-GEM.xml [glucose_mM] [oxygen_uptake] [hours]
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, solver
+from services import dfba
+
+
+@contextmanager
+def _cold_start():
+    """Reset every LP to the standard basis before it is solved (GLPK only)."""
+    import swiglpk
+    from cobra import Model
+    slim_optimize = Model.slim_optimize
+    
+    def cold(self, *args, **kwargs):
+        swiglpk.glp_std_basis(self.solver.problem)
+        return slim_optimize(self, *args, **kwargs)
+    
+    Model.slim_optimize = cold
+    try:
+        yield
+    finally:
+        Model.slim_optimize = slim_optimize
+
+
+def _diff(result, reference):
+    """Largest absolute difference in biomass and concentrations at the reference's times."""
+    diffs = [np.max(np.abs(np.interp(reference['time'], result['time'], result['biomass']) - reference['biomass']))]
+    for ex, values in reference['concentrations'].items():
+        diffs.append(np.max(np.abs(np.interp(reference['time'], result['time'], result['concentrations'][ex])
+                                   - values)))
+    return max(diffs)
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    glucose = float(sys.argv[2]) if len(sys.argv) > 2 else 100.0
+    oxygen = float(sys.argv[3]) if len(sys.argv) > 3 else 2.0
+    hours = float(sys.argv[4]) if len(sys.argv) > 4 else 48.0
+    
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    model = cobra_model.get_model()
+    oxygen_id = dfba.resolve_exchange(model, 'oxygen')
+    model.reactions.get_by_id(oxygen_id).lower_bound = -oxygen
+    print(f"{glucose:g} mM glucose, oxygen uptake <= {oxygen:g} mmol/gDW/h, {hours:g} h")
+    
+    def simulate():
+        return dfba.simulate(model, {'glucose': glucose}, track=['ethanol'], hours=hours, compute=True)
+    
+    runs = {}
+    for label, compress in (('compressed', True), ('full', False)):
+        solver.configure(compress=compress)
+        runs[label] = simulate()
+    if solver.solver_name(model) == 'glpk':
+        solver.configure(compress=True)
+        with _cold_start():
+            runs['compressed, cold'] = simulate()
+    
+    reference = runs['compressed']
+    for label, result in runs.items():
+        print(f"  {label + ':':<18} {result['steps']:5d} steps in {result['seconds']:6.2f} s "
+              f"({result['steps'] / result['seconds']:6.0f} LP/s)   max diff {_diff(result, reference):.2e}")
+    
+    ethanol_id = reference['exchanges'][1]
+    concentrations = reference['concentrations']
+    peak = int(np.argmax(concentrations[ethanol_id]))
+    print(f"  final biomass {reference['biomass'][-1]:.3f} gDW/L; ethanol peak "
+          f"{concentrations[ethanol_id][peak]:.1f} mM at {reference['time'][peak]:.1f} h, "
+          f"{concentrations[ethanol_id][-1]:.2f} mM left at the end")
+
+
+if __name__ == "__main__":
+    main()
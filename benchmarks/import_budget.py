@@ -0,0 +1,101 @@
+"""
+import_budget.py
+
+Import-time budget check for app.py, from `python -X importtime`.
+
+Imports app in a fresh interpreter, parses the importtime report and fails
+(exit status 1) if the cumulative import time exceeds the budget or any of
+the heavy dependencies that should load lazily (cobra, pandas, optlang,
+sympy, libsbml) was imported.
+
+Each run uses a bytecode cache that was populated by a first, untimed
+import, so the numbers reflect a warm restart rather than compilation.
+
+Usage:
+    python benchmarks/import_budget.py [--budget-ms 800] [--repeats 3] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+
+DEFERRED = ('cobra', 'pandas', 'optlang', 'sympy', 'libsbml', 'swiglpk', 'depinfo')
+
+BUDGET_MS = 800.0
+
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parse_importtime(text):
+    """
+    Parse -X importtime output.
+    
+    Returns:
+        List of (module, self_us, cumulative_us, depth)
+    """
+    entries = []
+    for line in text.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def measure(prefix):
+    env = {k: v for k, v in os.environ.items() if k != 'PYTHONDONTWRITEBYTECODE'}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-X', f'pycache_prefix={prefix}', '-c', 'import app'],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help='Slowest modules to list (self time)')
+    args = parser.parse_args()
+    
+    prefix = tempfile.mkdtemp(prefix='bench-pycache-')
+    try:
+        measure(prefix)
+        runs = [measure(prefix) for _ in range(args.repeats)]
+    finally:
+        shutil.rmtree(prefix, ignore_errors=True)
+    
+    # Best of the repeats: the least disturbed by the rest of the machine
+    entries = min(runs, key=lambda e: next(cum for mod, _, cum, _ in e if mod == 'app'))
+    total_ms = next(cum for mod, _, cum, _ in entries if mod == 'app') / 1000
+    imported = {mod for mod, _, _, _ in entries}
+    leaked = [mod for mod in DEFERRED if mod in imported]
+    
+    print(f"{'module':<48} {'self (ms)':>10} {'cumulative (ms)':>16}")
+    for mod, self_us, cum_us, depth in sorted(entries, key=lambda e: -e[1])[:args.top]:
+        print(f"{mod:<48} {self_us / 1000:>10.2f} {cum_us / 1000:>16.2f}")
+    
+    print(f"\nimport app: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms), "
+          f"{len(imported)} modules")
+    
+    failed = False
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {total_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if leaked:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(leaked)}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+mdf_scan.py
+
+Benchmark: Max-min Driving Force over many candidate pathways.
+
+Candidate pathways are the model's subsystems plus random linear chains
+(fixed seed) that follow a product of one reaction into the next, skipping
+currency metabolites. Every pathway is solved by
+services.thermodynamics.scan (LP sliced from the stored stoichiometric
+matrix, loaded into GLPK in one call) and by an optlang model built
+symbolically per pathway, forward directions. MDF values are compared.
+
+The thermo cache is read from data/ unless another directory holding
+reactions_thermo.json and compounds_thermo.json is given.
+
+Usage:
+    python benchmarks/mdf_scan.py models/yeast-GEM.xml [thermo_data_dir] [pathways]
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, thermo
+from services import pathway, thermodynamics
+
+CURRENCY_DEGREE = 20  # Metabolites in more reactions than this do not link chain steps
+
+
+def random_chains(model, system, n, rng):
+    """Linear reaction chains of 4-12 steps through shared non-currency metabolites."""
+    estimated = [rxn for rxn in model.reactions
+                 if not np.isnan(system['dg0'][system['reaction_index'][rxn.id]])]
+    chains = {}
+    while len(chains) < n:
+        rxn = rng.choice(estimated)
+        chain = [rxn.id]
+        for _ in range(rng.randint(3, 11)):
+            products = [m for m, c in rxn.metabolites.items() if c > 0 and len(m.reactions) <= CURRENCY_DEGREE]
+            nexts = [r for m in products for r in m.reactions if r.metabolites[m] < 0 and r.id not in chain]
+            if not nexts:
+                break
+            rxn = rng.choice(nexts)
+            chain.append(rxn.id)
+        if len(chain) >= 4:
+            chains[f'chain{len(chains)}'] = chain
+    return chains
+
+
+def optlang_mdf(system, reaction_ids, bounds):
+    """The same LP written as a per-pathway optlang model."""
+    from optlang.glpk_interface import Constraint, Model, Objective, Variable
+    
+    lp = Model()
+    driving = Variable('B')
+    variables = {}
+    rows = []
+    for rxn_id in dict.fromkeys(reaction_ids):
+        j = system['reaction_index'][rxn_id]
+        if np.isnan(system['dg0'][j]) or system['uncertainty'][j] > thermodynamics.MAX_UNCERTAINTY:
+            continue
+        terms = [driving]
+        for k in range(system['indptr'][j], system['indptr'][j + 1]):
+            i = system['rows'][k]
+            if i not in variables:
+                variables[i] = Variable(f'x{i}', lb=bounds['ln_lower'][i], ub=bounds['ln_upper'][i])
+            terms.append(thermodynamics.RT * system['coefs'][k] * variables[i])
+        rows.append(Constraint(sum(terms), ub=-system['dg0'][j]))
+    if not rows:
+        return None
+    lp.add(rows)
+    lp.objective = Objective(driving, direction='max')
+    return lp.objective.value if lp.optimize() == 'optimal' else None
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    n_pathways = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    thermo.load(data_dir)
+    if not thermo.is_loaded():
+        sys.exit("No reactions_thermo.json; run scripts/reaction_thermo_cache.py or pass a data dir")
+    model = cobra_model.get_model()
+    
+    start = time.perf_counter()
+    system = thermodynamics.get_system(model)
+    bounds = thermodynamics.concentration_bounds()
+    setup_seconds = time.perf_counter() - start
+    
+    pathways = {name: ids for name, ids in pathway.subsystem_reaction_ids().items() if name != 'Uncategorized'}
+    pathways.update(random_chains(model, system, max(0, n_pathways - len(pathways)), random.Random(0)))
+    sizes = [len(ids) for ids in pathways.values()]
+    print(f"{len(pathways)} pathways ({len(pathways) - sum(n.startswith('chain') for n in pathways)} subsystems), "
+          f"{min(sizes)}-{max(sizes)} reactions; system and bounds built in {setup_seconds * 1000:.0f} ms")
+    
+    start = time.perf_counter()
+    results = thermodynamics.scan(pathways, bounds, directions='forward')
+    scan_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    expected = {name: optlang_mdf(system, ids, bounds) for name, ids in pathways.items()}
+    optlang_seconds = time.perf_counter() - start
+    
+    diffs = [abs(r['mdf'] - expected[r['name']]) for r in results
+             if r['mdf'] is not None and expected[r['name']] is not None]
+    mismatched = sum((r['mdf'] is None) != (expected[r['name']] is None) for r in results)
+    print(f"  scan:                {scan_seconds:6.2f} s ({scan_seconds / len(pathways) * 1000:.2f} ms/pathway)")
+    print(f"  optlang per pathway: {optlang_seconds:6.2f} s ({optlang_seconds / len(pathways) * 1000:.2f} ms/pathway)")
+    print(f"  speedup {optlang_seconds / scan_seconds:.1f}x, max MDF difference {max(diffs):.2e}, "
+          f"solved/unsolved mismatches {mismatched}")
+    print(f"  feasible (MDF > 0): {sum(r['feasible'] for r in results)} / {len(results)}")
+
+
+if __name__ == "__main__":
+    main()
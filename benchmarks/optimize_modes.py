@@ -0,0 +1,107 @@
+"""
+optimize_modes.py
+
+Benchmark: pFBA, linear MOMA and linear ROOM on the persistent solver
+template vs. cobra's flux_analysis functions, which add and remove their
+variables and constraints on every call.
+
+Each mode is solved `repeats` times with a small bound change in between
+(glucose uptake stepped), as the app does when conditions are edited.
+The reference for MOMA/ROOM is the wild-type pFBA solution.
+
+Usage:
+    python benchmarks/optimize_modes.py models/yeast-GEM.xml [repeats]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from cobra.flux_analysis import moma, pfba, room
+
+from data_access import annotations, cobra_model, flux_modes
+
+GLUCOSE_QUERY = 'glucose'
+
+
+def _glucose_exchange(model):
+    found = annotations.find_exchange_by_query(model, GLUCOSE_QUERY)['exchanges']
+    return model.reactions.get_by_id(found[0]['id']) if found else None
+
+
+def _steps(model, repeats):
+    """Bound settings to step through: glucose uptake from -10 towards -5."""
+    glucose = _glucose_exchange(model)
+    if glucose is None:
+        return [None] * repeats
+    return [(glucose, -10.0 + 5.0 * i / max(1, repeats - 1)) for i in range(repeats)]
+
+
+def time_template(model, mode, steps):
+    times = []
+    for step in steps:
+        with model:
+            if step is not None:
+                step[0].lower_bound = step[1]
+            start = time.perf_counter()
+            solution = flux_modes.solve(model, mode)
+            times.append(time.perf_counter() - start)
+    return times, solution
+
+
+def time_cobra(model, mode, steps, reference):
+    times = []
+    for step in steps:
+        with model:
+            if step is not None:
+                step[0].lower_bound = step[1]
+            start = time.perf_counter()
+            if mode == 'pfba':
+                solution = pfba(model)
+            elif mode == 'moma':
+                solution = moma(model, solution=reference, linear=True)
+            else:
+                solution = room(model, solution=reference, linear=True)
+            times.append(time.perf_counter() - start)
+    return times, solution
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python benchmarks/optimize_modes.py <model.xml> [repeats]")
+        sys.exit(1)
+    
+    model_path = sys.argv[1]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    
+    if not cobra_model.load(model_path):
+        print(f"Could not load {model_path}")
+        sys.exit(1)
+    model = cobra_model.get_model()
+    steps = _steps(model, repeats)
+    
+    start = time.perf_counter()
+    flux_modes.get_template(model)
+    build_time = time.perf_counter() - start
+    
+    reference = pfba(model)
+    flux_modes.set_reference(model, reference.fluxes.to_numpy())
+    
+    print(f"Model: {len(model.reactions)} reactions, template build {build_time:.2f} s")
+    print("First template solve of MOMA/ROOM includes adding its rows.")
+    print()
+    print(f"{'mode':<6} {'template first (s)':>19} {'template rest (s)':>18} "
+          f"{'cobra mean (s)':>15} {'objective diff':>15}")
+    
+    for mode in ('pfba', 'moma', 'room'):
+        new, new_solution = time_template(model, mode, steps)
+        old, old_solution = time_cobra(model, mode, steps, reference)
+        rest = sum(new[1:]) / max(1, len(new) - 1)
+        diff = abs(new_solution.mode_objective - old_solution.objective_value)
+        print(f"{mode:<6} {new[0]:>19.3f} {rest:>18.3f} {sum(old) / len(old):>15.3f} {diff:>15.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+production_envelope.py
+
+Benchmark: production envelope.
+
+Times services.envelope (growth points split across workers, each segment
+warm-started from point to point) on the compressed and on the full model
+against cobra's production_envelope with the same number of points (which
+fixes the product and optimizes growth, so it is timed only). A reference
+min/max per growth point from plain cobra LPs checks the results.
+
+Usage:
+    python benchmarks/production_envelope.py models/yeast-GEM.xml ethanol [points] [processes]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, solver
+from services import envelope, network, strain_design
+
+
+def _reference(model, product_id, growth):
+    """Product range per growth rate, one pair of plain LPs per point."""
+    from cobra.util.solver import linear_reaction_coefficients
+    (objective, _), = linear_reaction_coefficients(model).items()
+    lower, upper = [], []
+    for value in growth:
+        with model:
+            objective.bounds = (value, value)
+            model.objective = product_id
+            upper.append(model.slim_optimize(error_value=float('nan')))
+            model.objective_direction = 'min'
+            lower.append(model.slim_optimize(error_value=float('nan')))
+    return np.array(lower), np.array(upper)
+
+
+def _diff(result, lower, upper):
+    got_lower = np.array(result['product_min'], dtype=float)
+    got_upper = np.array(result['product_max'], dtype=float)
+    return max(np.nanmax(np.abs(got_lower - lower)), np.nanmax(np.abs(got_upper - upper)))
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    points = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    model = cobra_model.get_model()
+    product = strain_design.resolve_product(model, sys.argv[2])
+    network.get_analysis(model)
+    print(f"Product {product} ({model.reactions.get_by_id(product).name}), {points} growth points")
+    
+    results = {}
+    for compress in (True, False):
+        solver.configure(compress=compress)
+        envelope.run(model, product, points=points, processes=processes)  # builds the compressed model
+        start = time.perf_counter()
+        results[compress] = envelope.run(model, product, points=points, processes=processes)
+        results[compress]['wall'] = time.perf_counter() - start
+    
+    from cobra.flux_analysis import production_envelope
+    start = time.perf_counter()
+    production_envelope(model, [product], points=points)
+    cobra_seconds = time.perf_counter() - start
+    
+    lower, upper = _reference(model, product, results[False]['growth'])
+    for compress, label in ((True, 'compressed'), (False, 'full')):
+        result = results[compress]
+        print(f"  envelope, {label + ' model:':<18} {result['wall'] * 1000:8.1f} ms "
+              f"({cobra_seconds / result['wall']:.1f}x)   max diff {_diff(result, lower, upper):.2e}")
+    print(f"  cobra production_envelope:   {cobra_seconds * 1000:8.1f} ms")
+    
+    result = results[True]
+    best = int(np.nanargmax(np.array(result['carbon_yield_max'], dtype=float)))
+    print(f"  max product {np.nanmax(upper):.4f} at growth {result['growth'][int(np.nanargmax(upper))]:.4f}; "
+          f"best carbon yield {result['carbon_yield_max'][best]:.3f} at growth {result['growth'][best]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
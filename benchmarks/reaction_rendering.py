@@ -0,0 +1,188 @@
+"""
+reaction_rendering.py
+
+Microbenchmark: per-request reaction rendering vs. the precomputed table.
+
+The "per-request" column reproduces what every list/search/subsystem/detail
+request used to pay for each reaction: the compartment-name lookup on the
+model and the original build_reaction_info (copied below), which renders
+the equation and cobra's `rxn.reaction` string. The "table" column is the
+lookup served from the table built at model load.
+
+Usage:
+    python benchmarks/reaction_rendering.py models/yeast-GEM.xml [repeats]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model
+
+
+def original_build_reaction_info(rxn, compartment_names, smart_break=True):
+    """
+    Build human-readable reaction info.
+
+    cobra_model.build_reaction_info as it was before the reaction table,
+    unchanged except that the caller passes the compartment names.
+
+    Returns dict with:
+        - equation: human-readable equation with metabolite names
+        - equation_raw: original ID-based equation
+        - location_type: 'compartment', 'compartments', or 'boundary'
+        - location: the location value (e.g., "cytoplasm" or "extracellular ⇌ cytoplasm")
+    """
+    # Collect compartment info
+    all_compartments = set(m.compartment for m in rxn.metabolites.keys())
+    single_compartment = len(all_compartments) == 1
+    is_exchange = len(rxn.metabolites) == 1
+
+    # Determine if transport (same metabolite name in different compartments)
+    met_names = [m.name for m in rxn.metabolites.keys()]
+    is_transport = len(set(met_names)) == 1 and len(all_compartments) > 1
+
+    # Build human-readable equation
+    substrates = []
+    products = []
+    for m, coef in rxn.metabolites.items():
+        # Include compartment tag only if multiple compartments (transport)
+        if single_compartment or is_exchange:
+            met_label = m.name
+        else:
+            met_label = f"{m.name}[{m.compartment}]"
+
+        # Add stoichiometric coefficient if not 1
+        abs_coef = abs(coef)
+        if abs_coef != 1:
+            # Use integer if whole number, otherwise 2 decimal places
+            if abs_coef == int(abs_coef):
+                met_label = f"{int(abs_coef)} {met_label}"
+            else:
+                met_label = f"{abs_coef:.2g} {met_label}"
+
+        if coef < 0:
+            substrates.append(met_label)
+        else:
+            products.append(met_label)
+
+    left = ' + '.join(substrates) if substrates else '∅'
+    right = ' + '.join(products) if products else '∅'
+    arrow = '⇌' if rxn.reversibility else '→'
+    human_equation = f"{left} {arrow} {right}"
+
+    # Smart line breaking for long equations
+    if smart_break and len(human_equation) > 60:
+        human_equation = human_equation.replace(f' {arrow} ', f' {arrow}\n')
+        if any(len(part) > 80 for part in human_equation.split('\n')):
+            human_equation = human_equation.replace(' + ', ' +\n')
+
+    # Determine location info
+    if is_exchange:
+        # Exchange: compartment ⇌ environment (transport to environment)
+        comp_id = list(all_compartments)[0]
+        comp_name = compartment_names.get(comp_id, comp_id)
+        location_type = 'compartments'
+        location = f"{comp_name} ⇌ environment"
+    elif is_transport:
+        # Transport: compartment A ⇌ compartment B
+        ordered_comps = []
+        for m, coef in rxn.metabolites.items():
+            if m.compartment not in ordered_comps:
+                ordered_comps.append(m.compartment)
+        comp_names_list = [compartment_names.get(c, c) for c in ordered_comps]
+        location_type = 'compartments'
+        location = ' ⇌ '.join(comp_names_list)
+    elif single_compartment:
+        # Standard reaction in one compartment
+        comp_id = list(all_compartments)[0]
+        comp_name = compartment_names.get(comp_id, comp_id)
+        location_type = 'compartment'
+        location = comp_name
+    else:
+        # Multi-compartment reaction (not transport)
+        ordered_comps = []
+        for m, coef in rxn.metabolites.items():
+            if m.compartment not in ordered_comps:
+                ordered_comps.append(m.compartment)
+        comp_names_list = [compartment_names.get(c, c) for c in ordered_comps]
+        location_type = 'compartments'
+        location = ', '.join(comp_names_list)
+
+    return {
+        'equation': human_equation,
+        'equation_raw': rxn.reaction,
+        'location_type': location_type,
+        'location': location,
+        'is_exchange': is_exchange
+    }
+
+
+def time_per_request(model, smart_break):
+    """Render every reaction from scratch, as before the table existed."""
+    start = time.perf_counter()
+    compartment_names = model.compartments
+    for rxn in model.reactions:
+        original_build_reaction_info(rxn, compartment_names, smart_break)
+    return time.perf_counter() - start
+
+
+def time_table(model, smart_break):
+    """Serve every reaction from the precomputed table."""
+    start = time.perf_counter()
+    for rxn in model.reactions:
+        cobra_model.build_reaction_info(rxn, smart_break=smart_break)
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python benchmarks/reaction_rendering.py <model.xml> [repeats]")
+        sys.exit(1)
+
+    model_path = sys.argv[1]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    start = time.perf_counter()
+    if not cobra_model.load(model_path):
+        print(f"Could not load {model_path}")
+        sys.exit(1)
+    load_time = time.perf_counter() - start
+
+    model = cobra_model.get_model()
+    n = len(model.reactions)
+
+    # Sanity check: the table must reproduce cobra's own reaction strings
+    mismatches = [
+        rxn.id for rxn in model.reactions
+        if cobra_model.build_reaction_info(rxn)['equation_raw'] != rxn.reaction
+    ]
+
+    # ... and the same equations and locations as the original rendering
+    compartment_names = model.compartments
+    changed = [
+        rxn.id for rxn in model.reactions
+        if any(cobra_model.build_reaction_info(rxn)[key] != original_build_reaction_info(rxn, compartment_names)[key]
+               for key in ('equation', 'location_type', 'location'))
+    ]
+
+    start = time.perf_counter()
+    cobra_model._build_reaction_table()
+    build_time = time.perf_counter() - start
+
+    print(f"Model: {n} reactions (load {load_time:.2f} s, table build {build_time * 1000:.1f} ms)")
+    print(f"equation_raw mismatches vs cobra: {len(mismatches)}")
+    print(f"rendering differences vs the original: {len(changed)}")
+    print()
+    print(f"{'smart_break':<12} {'per-request (ms)':>18} {'table (ms)':>12} {'speedup':>9}")
+
+    for smart_break in (True, False):
+        old = min(time_per_request(model, smart_break) for _ in range(repeats))
+        new = min(time_table(model, smart_break) for _ in range(repeats))
+        print(f"{str(smart_break):<12} {old * 1000:>18.2f} {new * 1000:>12.2f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+run.py
+
+Reproducible benchmark suite with JSON results for regression comparison.
+
+Cases:
+    app_start_cold        import app.py in a fresh interpreter, no bytecode cache
+    app_start_warm        same, with the bytecode cache populated
+    model_load            cobra_model.load of the given model
+    optimize              POST /api/optimize (default solver policy)
+    search_q<N>           GET /api/search/reactions with N-character queries
+    reaction_context      pathway.get_reaction_context on sampled reactions
+    thermo_load           thermo.load of the caches built below (+ peak memory)
+    compound_cache_script scripts/compound_thermo_cache.py
+    reaction_cache_script scripts/reaction_thermo_cache.py
+
+The cache scripts run against benchmarks/standin/equilibrator_api, a
+deterministic offline stand-in for eQuilibrator, so their timings measure
+the scripts themselves and not the network or the real component
+contribution model.
+
+Every random choice comes from a generator seeded with --seed.
+
+Usage:
+    python benchmarks/run.py models/yeast-GEM.xml [--repeats 5] [--seed 0]
+                             [--output results.json] [--compare baseline.json]
+                             [--only optimize,search]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC = os.path.join(ROOT, 'src')
+STANDIN = os.path.join(ROOT, 'benchmarks', 'standin')
+DATA = os.path.join(ROOT, 'data')
+
+sys.path.insert(0, SRC)
+
+SEARCH_LENGTHS = (1, 2, 4, 8, 16)
+
+
+def summarize(times, **extra):
+    """Statistics of a list of durations (seconds)."""
+    ordered = sorted(times)
+    n = len(ordered)
+    return {
+        'n': n,
+        'mean': sum(ordered) / n,
+        'min': ordered[0],
+        'p50': ordered[n // 2],
+        'p95': ordered[min(n - 1, int(0.95 * n))],
+        'max': ordered[-1],
+        **extra
+    }
+
+
+def timed(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _run_python(args, env=None, cwd=SRC):
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=cwd, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def bench_app_start(repeats):
+    """
+    Import app.py in a fresh interpreter: without, then with a bytecode cache.
+    
+    The bytecode goes to a private pycache_prefix, so cold runs compile
+    every module (app and dependencies) and the repo's caches are untouched.
+    """
+    env = {k: v for k, v in os.environ.items() if k != 'PYTHONDONTWRITEBYTECODE'}
+    
+    def start(prefix):
+        return _run_python(['-X', f'pycache_prefix={prefix}', '-c', 'import app'], env=env)
+    
+    cold = []
+    for _ in range(repeats):
+        prefix = tempfile.mkdtemp(prefix='bench-pycache-')
+        cold.append(start(prefix))
+        shutil.rmtree(prefix, ignore_errors=True)
+    
+    prefix = tempfile.mkdtemp(prefix='bench-pycache-')
+    start(prefix)
+    warm = [start(prefix) for _ in range(repeats)]
+    shutil.rmtree(prefix, ignore_errors=True)
+    
+    return {'app_start_cold': summarize(cold), 'app_start_warm': summarize(warm)}
+
+
+def bench_model_load(model_path, repeats):
+    from data_access import cobra_model
+    times = timed(lambda: cobra_model.load(model_path), repeats)
+    return {'model_load': summarize(times)}
+
+
+def bench_optimize(client, repeats):
+    # First solve builds solver state; report it separately
+    start = time.perf_counter()
+    client.post('/api/optimize', json={'mode': 'fba'})
+    first = time.perf_counter() - start
+    times = timed(lambda: client.post('/api/optimize', json={'mode': 'fba'}), repeats)
+    return {'optimize': summarize(times, first=first)}
+
+
+def bench_search(client, rng, repeats, queries_per_length=20):
+    """Search latency per query length; queries are substrings of reaction names."""
+    from data_access import cobra_model
+    names = [rxn.name for rxn in cobra_model.get_model().reactions if rxn.name]
+    results = {}
+    for length in SEARCH_LENGTHS:
+        candidates = [n for n in names if len(n) >= length]
+        queries = []
+        for name in rng.sample(candidates, min(queries_per_length, len(candidates))):
+            start = rng.randrange(len(name) - length + 1)
+            queries.append(name[start:start + length])
+        
+        times = []
+        for _ in range(repeats):
+            for q in queries:
+                start = time.perf_counter()
+                client.get('/api/search/reactions', query_string={'q': q})
+                times.append(time.perf_counter() - start)
+        results[f'search_q{length}'] = summarize(times)
+    return results
+
+
+def bench_reaction_context(rng, repeats, sample_size=200):
+    from data_access import cobra_model
+    from services import pathway
+    ids = rng.sample(cobra_model.get_reaction_ids(), sample_size)
+    times = []
+    for _ in range(repeats):
+        for rxn_id in ids:
+            start = time.perf_counter()
+            pathway.get_reaction_context(rxn_id)
+            times.append(time.perf_counter() - start)
+    return {'reaction_context': summarize(times)}
+
+
+def bench_cache_scripts(model_path, out_dir, repeats):
+    """Both cache scripts against the eQuilibrator stand-in; leaves their output in out_dir."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([STANDIN, os.environ.get('PYTHONPATH', '')]))
+    compounds = os.path.join(out_dir, 'compounds_thermo.json')
+    reactions = os.path.join(out_dir, 'reactions_thermo.json')
+    
+    compound_args = [os.path.join(ROOT, 'scripts', 'compound_thermo_cache.py'), model_path, compounds]
+    reaction_args = [
+        os.path.join(ROOT, 'scripts', 'reaction_thermo_cache.py'), model_path, compounds, reactions,
+        os.path.join(DATA, 'compartment_parameters.json'), os.path.join(DATA, 'redox_couples.json')
+    ]
+    compound_times = [_run_python(compound_args, env=env, cwd=ROOT) for _ in range(repeats)]
+    reaction_times = [_run_python(reaction_args, env=env, cwd=ROOT) for _ in range(repeats)]
+    
+    return {
+        'compound_cache_script': summarize(compound_times),
+        'reaction_cache_script': summarize(reaction_times)
+    }
+
+
+def bench_thermo_load(data_dir, repeats):
+    from data_access import thermo
+    times = timed(lambda: thermo.load(data_dir), repeats)
+    
+    tracemalloc.start()
+    thermo.load(data_dir)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'thermo_load': summarize(times, retained_bytes=current, peak_bytes=peak, **thermo.stats())}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print mean ratios against a previous results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    print(f"\n{'case':<24} {'baseline (ms)':>14} {'now (ms)':>10} {'ratio':>7}")
+    for name, stats in results.items():
+        if name in baseline:
+            old, new = baseline[name]['mean'], stats['mean']
+            print(f"{name:<24} {old * 1000:>14.2f} {new * 1000:>10.2f} {new / old:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--script-repeats', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--only', help='Comma-separated case groups: start,load,optimize,search,context,scripts')
+    args = parser.parse_args()
+    
+    model_path = os.path.abspath(args.model)
+    groups = set(args.only.split(',')) if args.only else {
+        'start', 'load', 'optimize', 'search', 'context', 'scripts'
+    }
+    rng = random.Random(args.seed)
+    results = {}
+    
+    if 'start' in groups:
+        results.update(bench_app_start(args.repeats))
+    
+    from data_access import cobra_model
+    if groups & {'load', 'optimize', 'search', 'context'}:
+        if 'load' in groups:
+            results.update(bench_model_load(model_path, min(args.repeats, 3)))
+        elif not cobra_model.load(model_path):
+            sys.exit(f"Could not load {model_path}")
+        
+        import app
+        client = app.app.test_client()
+        if 'optimize' in groups:
+            results.update(bench_optimize(client, args.repeats))
+        if 'search' in groups:
+            results.update(bench_search(client, rng, args.repeats))
+        if 'context' in groups:
+            results.update(bench_reaction_context(rng, args.repeats))
+    
+    if 'scripts' in groups:
+        out_dir = tempfile.mkdtemp(prefix='bench-thermo-')
+        try:
+            results.update(bench_cache_scripts(model_path, out_dir, args.script_repeats))
+            results.update(bench_thermo_load(out_dir, args.repeats))
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'model': os.path.basename(model_path),
+            'seed': args.seed,
+            'repeats': args.repeats
+        },
+        'results': results
+    }
+    
+    print(f"{'case':<24} {'n':>5} {'mean (ms)':>11} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for name, stats in results.items():
+        print(f"{name:<24} {stats['n']:>5} {stats['mean'] * 1000:>11.2f} "
+              f"{stats['p50'] * 1000:>10.2f} {stats['p95'] * 1000:>10.2f}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
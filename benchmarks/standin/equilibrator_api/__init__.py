@@ -0,0 +1,129 @@
+"""
+Deterministic local stand-in for equilibrator_api.
+
+Implements the slice of the API the cache scripts use, with formation
+energies derived from a hash of each compound ID, so the scripts run
+offline, quickly and with identical output on every run. Put
+benchmarks/standin on PYTHONPATH ahead of the real package to use it.
+
+Values are not thermodynamically meaningful; the stand-in exists to time
+the scripts' own work (model parsing, formula building, caching).
+"""
+
+import hashlib
+import re
+
+F = 96.485  # kJ/(mol·V)
+
+# Deterministic misses, so the scripts' fallback paths run too
+MISS_ONE_IN = 12
+NAME_MISS_ONE_IN = 2
+
+
+def _digest(text):
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], 'big')
+
+
+class _Magnitude:
+    def __init__(self, magnitude):
+        self.magnitude = magnitude
+
+
+class Quantity:
+    """Minimal pint-like quantity: Q_(1.5, 'V') or Q_('254 mV')."""
+    
+    def __init__(self, value, unit=None):
+        if isinstance(value, str) and unit is None:
+            number, _, unit = value.partition(' ')
+            value = float(number)
+        self.magnitude = float(value)
+        self.unit = unit or 'dimensionless'
+    
+    def to_volts(self):
+        return self.magnitude / 1000.0 if self.unit == 'mV' else self.magnitude
+
+
+Q_ = Quantity
+
+
+class Measurement:
+    def __init__(self, value, error):
+        self.value = _Magnitude(value)
+        self.error = _Magnitude(error)
+
+
+class Compound:
+    def __init__(self, query):
+        self.query = query
+        digest = _digest(query)
+        self.inchi_key = f'STANDIN-{digest % 10 ** 10:010d}'
+        self.dgf = -2000.0 + (digest % 400000) / 100.0
+        self.error = 0.5 + (digest >> 20) % 50 / 10.0
+    
+    def __hash__(self):
+        return hash(self.query)
+    
+    def __eq__(self, other):
+        return isinstance(other, Compound) and other.query == self.query
+
+
+class Reaction:
+    """Parsed reaction formula: compound -> stoichiometric coefficient."""
+    
+    def __init__(self, sparse):
+        self.sparse = sparse
+
+
+class ComponentContribution:
+    def __init__(self):
+        self._p_h = Q_(7.0)
+        self._compounds = {}
+    
+    def get_compound(self, query):
+        if _digest(query) % MISS_ONE_IN == 0:
+            return None
+        if query not in self._compounds:
+            self._compounds[query] = Compound(query)
+        return self._compounds[query]
+    
+    def search_compound(self, name):
+        if _digest('name:' + name) % NAME_MISS_ONE_IN == 0:
+            return None
+        return self.get_compound('name:' + name) or Compound('name:' + name)
+    
+    def parse_reaction_formula(self, formula):
+        if '=' not in formula:
+            raise ValueError(f'Not a reaction formula: {formula}')
+        left, right = formula.split('=', 1)
+        sparse = {}
+        for side, sign in ((left, -1), (right, 1)):
+            for term in filter(None, (t.strip() for t in side.split(' + '))):
+                match = re.match(r'^(\d+(?:\.\d+)?(?:e-?\d+)?)\s+(\S+)$', term)
+                coef, query = (float(match.group(1)), match.group(2)) if match else (1.0, term)
+                compound = self.get_compound(query)
+                if compound is None:
+                    raise ValueError(f'Compound not found: {query}')
+                sparse[compound] = sparse.get(compound, 0) + sign * coef
+        if not left.strip() or not right.strip():
+            raise ValueError(f'Empty side in formula: {formula}')
+        return Reaction(sparse)
+    
+    def standard_dg_prime(self, reaction):
+        from .phased_reaction import PhasedReaction
+        if isinstance(reaction, PhasedReaction):
+            value = sum(coef * phased.dgf() for phased, coef in reaction.sparse_with_phases.items())
+            error = sum(abs(coef) * phased.compound.error for phased, coef in reaction.sparse_with_phases.items())
+        else:
+            value = sum(coef * c.dgf for c, coef in reaction.sparse.items())
+            error = sum(abs(coef) * c.error for c, coef in reaction.sparse.items())
+        # pH shifts every compound a little, as the Legendre transform would
+        value += (self._p_h.magnitude - 7.0) * 5.7 * sum(reaction.sparse.values())
+        return Measurement(value, error)
+    
+    def multicompartmental_standard_dg_prime(self, reaction_inner, reaction_outer, potential,
+                                             p_h_outer, ionic_strength_outer):
+        inner = self.standard_dg_prime(reaction_inner)
+        outer = self.standard_dg_prime(reaction_outer)
+        charge = sum(reaction_outer.sparse.values())
+        value = inner.value.magnitude + outer.value.magnitude + charge * F * potential.to_volts()
+        return Measurement(value, inner.error.magnitude + outer.error.magnitude)
@@ -0,0 +1,32 @@
+"""Stand-in PhasedCompound / RedoxCarrier (see equilibrator_api)."""
+
+from . import F
+
+
+class PhasedCompound:
+    def __init__(self, compound):
+        self.compound = compound
+    
+    def dgf(self):
+        return self.compound.dgf
+    
+    def __hash__(self):
+        return hash((type(self), self.compound))
+    
+    def __eq__(self, other):
+        return type(other) is type(self) and other.compound == self.compound
+
+
+class RedoxCarrier(PhasedCompound):
+    def __init__(self, compound, potential):
+        super().__init__(compound)
+        self.potential = potential
+    
+    def dgf(self):
+        return -F * self.potential.to_volts()
+    
+    def __hash__(self):
+        return hash((type(self), self.compound, self.potential.magnitude))
+    
+    def __eq__(self, other):
+        return super().__eq__(other) and other.potential.magnitude == self.potential.magnitude
@@ -0,0 +1,7 @@
+"""Stand-in PhasedReaction (see equilibrator_api)."""
+
+
+class PhasedReaction:
+    def __init__(self, sparse, sparse_with_phases=None):
+        self.sparse = sparse
+        self.sparse_with_phases = sparse_with_phases or {}
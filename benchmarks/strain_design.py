@@ -0,0 +1,77 @@
+"""
+strain_design.py
+
+Benchmark: growth-coupled knockout search.
+
+Runs the heuristic beam search for a product on a fixed time budget with
+one worker and with the configured worker count, reporting knockout sets
+scored per second and the best design each found, then times the result
+cache on a single-knockout search (only finished searches are cached).
+Finally runs OptKnock on the same budget and scores its design.
+
+Usage:
+    python benchmarks/strain_design.py models/yeast-GEM.xml ethanol [time_budget] [processes]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model
+from services import parallel, strain_design
+
+
+def _describe(result):
+    if not result['designs']:
+        return 'no design'
+    best = result['designs'][0]
+    return (f"{'+'.join(best['knockouts'])}: growth {best['growth']:.4f}, "
+            f"product {best['product_min']:.4f}-{best['product_max']:.4f}")
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    budget = float(sys.argv[3]) if len(sys.argv) > 3 else 60.0
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else parallel.default_processes()
+    
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    model = cobra_model.get_model()
+    product = strain_design.resolve_product(model, sys.argv[2])
+    cache_dir = tempfile.mkdtemp(prefix='strain-design-')
+    print(f"Product {product} ({model.reactions.get_by_id(product).name}), budget {budget:.0f} s")
+    
+    for workers in sorted({1, processes}):
+        result = strain_design.run(model, product, processes=workers, time_budget=budget,
+                                   cache_dir=cache_dir, refresh=True)
+        print(f"  heuristic, {workers} process(es): {result['evaluated']} sets from {result['candidates']} "
+              f"candidates in {result['seconds']:.1f} s ({result['evaluated'] / result['seconds']:.0f}/s, "
+              f"{result['status']})")
+        print(f"    best {_describe(result)}")
+    
+    # Only finished searches are cached: time the cache on single knockouts
+    strain_design.run(model, product, processes=processes, max_knockouts=1, time_budget=budget,
+                      cache_dir=cache_dir)
+    strain_design._results.clear()
+    start = time.perf_counter()
+    assert strain_design.run(model, product, processes=processes, max_knockouts=1, time_budget=budget,
+                             cache_dir=cache_dir)['cached'] == 'disk'
+    disk_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    assert strain_design.run(model, product, processes=processes, max_knockouts=1, time_budget=budget,
+                             cache_dir=cache_dir)['cached'] == 'memory'
+    print(f"  cache hit: disk {disk_seconds * 1000:.1f} ms, memory {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    result = strain_design.run(model, product, method='optknock', time_budget=budget, cache_dir=cache_dir)
+    objective = 'none' if result['milp_objective'] is None else f"{result['milp_objective']:.4f}"
+    print(f"  optknock: {result['seconds']:.1f} s ({result['status']}), {result['candidates']} candidates, "
+          f"MILP objective {objective}")
+    print(f"    best {_describe(result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+thermo_check.py
+
+Benchmark: thermodynamic consistency scan of an FBA solution.
+
+Times services.thermodynamics.consistency_scan on the current FBA solution
+against a per-reaction Python check (thermo cache lookup plus a walk over
+the reaction's metabolites), with the flagged sets compared. For loops,
+a known internal cycle is added to the solution and must be reported; the
+scan's loop detection is timed next to cobra's loopless_solution, the usual
+way to get rid of such loops.
+
+The thermo cache is read from data/ unless another directory holding
+reactions_thermo.json and compounds_thermo.json is given.
+
+Usage:
+    python benchmarks/thermo_check.py models/yeast-GEM.xml [thermo_data_dir] [repeats]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, thermo
+from services import thermodynamics
+
+
+def naive_flags(model, fluxes, bounds, k):
+    """Per-reaction check with dict lookups (the baseline)."""
+    met_index = {m.id: i for i, m in enumerate(model.metabolites)}
+    flagged = {}
+    for rxn, flux in zip(model.reactions, fluxes):
+        if abs(flux) <= thermodynamics.FLUX_TOLERANCE:
+            continue
+        t = (thermo.get_reaction(rxn.id) or {}).get('thermodynamics') or {}
+        if t.get('dG_prime') is None or (t.get('uncertainty') or 0.0) > thermodynamics.MAX_UNCERTAINTY:
+            continue
+        d = 1.0 if flux > 0 else -1.0
+        margin = d * t['dG_prime'] - k * (t.get('uncertainty') or 0.0)
+        if margin <= 0:
+            continue
+        best = 0.0
+        for met, coef in rxn.metabolites.items():
+            i = met_index[met.id]
+            # Most favorable: what the direction consumes high, what it makes low
+            ln_c = bounds['ln_upper'][i] if d * coef < 0 else bounds['ln_lower'][i]
+            best += d * coef * ln_c
+        flagged[rxn.id] = margin + thermodynamics.RT * best
+    return flagged
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    if not cobra_model.load(sys.argv[1]):
+        sys.exit(f"Could not load {sys.argv[1]}")
+    thermo.load(data_dir)
+    if not thermo.is_loaded():
+        sys.exit("No reactions_thermo.json; run scripts/reaction_thermo_cache.py or pass a data dir")
+    model = cobra_model.get_model()
+    solution = cobra_model.optimize('fba')
+    fluxes = cobra_model.get_flux_vector().copy()
+
+    start = time.perf_counter()
+    thermodynamics.consistency_scan(fluxes)
+    first_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = thermodynamics.consistency_scan(fluxes)
+    scan_seconds = (time.perf_counter() - start) / repeats
+
+    bounds = thermodynamics.concentration_bounds()
+    start = time.perf_counter()
+    expected = naive_flags(model, fluxes, bounds, thermodynamics.DEFAULT_K)
+    naive_seconds = time.perf_counter() - start
+    got = {r['id']: r['residual'] for r in result['reactions']}
+    diff = max((abs(got[r] - expected[r]) for r in expected if r in got), default=0.0)
+
+    print(f"FBA objective {solution.objective_value:.4f}: {result['active']} active, {result['checked']} with an "
+          f"estimate, {result['flagged']} flagged ({result['infeasible']} infeasible), {len(result['cycles'])} loops")
+    print(f"  consistency scan: {scan_seconds * 1000:6.2f} ms (first call, building arrays: {first_seconds * 1000:.0f} ms)")
+    print(f"  per-reaction:     {naive_seconds * 1000:6.2f} ms ({naive_seconds / scan_seconds:.0f}x); "
+          f"same flags: {set(got) == set(expected)}, max residual diff {diff:.2e}")
+
+    # Inject the largest loop found among all internal reactions run forward
+    system = thermodynamics.get_system(model)
+    forward = np.where(system['internal'], 1.0, 0.0)
+    cycle = thermodynamics.find_cycles(system, forward, forward, bounds)[0]
+    looped = fluxes.copy()
+    for entry in cycle['reactions']:
+        looped[system['reaction_index'][entry['id']]] += 10 * entry['loop_flux']
+    start = time.perf_counter()
+    found = thermodynamics.consistency_scan(looped)['cycles']
+    loop_seconds = time.perf_counter() - start
+    expected_ids = {entry['id'] for entry in cycle['reactions']}
+    detected = any(expected_ids <= {entry['id'] for entry in c['reactions']} for c in found)
+    print(f"\nInjected loop {sorted(expected_ids)}: detected {detected} ({len(found)} loop(s)), "
+          f"scan {loop_seconds * 1000:.2f} ms")
+
+    from cobra.flux_analysis import loopless_solution
+    start = time.perf_counter()
+    loopless_solution(model)
+    print(f"  cobra loopless_solution (removes loops, no report): {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
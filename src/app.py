@@ -1,14 +1,80 @@
 """ATACFlux - Flask routes."""
 
-from flask import Flask, render_template, jsonify, request
+import time
+
+from flask import Flask, Response, g, render_template, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+import metrics
+import profiler
+import warmup
+from data_access import thermo, cobra_model, constraints, annotations, solver, scenarios, gpr
+from services import (pathway, colors, sampling, sweep, accessibility, context, thermodynamics, network,
+                      compression, strain_design, envelope, dfba)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that times serialization as its own phase."""
+    
+    def dumps(self, obj, **kwargs):
+        with metrics.phase('serialize'):
+            return super().dumps(obj, **kwargs)
 
-from data_access import thermo, cobra_model, constraints, annotations
-from services import pathway, colors
 
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
+app.json = TimedJSONProvider(app)
+
+# Heavy dependencies (cobra, thermo caches) load on first use or from the
+# warm-up thread started below, never at import
+
+# FBA/pFBA solves go to the compressed model whenever one is available
+cobra_model.set_reducer(compression.solve)
+
+
+@app.before_request
+def _start_timer():
+    if metrics.is_enabled():
+        g.request_start = time.perf_counter()
+    if profiler.is_enabled():
+        g.profile = profiler.start_request(request.path)
+
+
+@app.after_request
+def _record_request(response):
+    # Streamed responses are timed up to their first byte
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.record('request', request.endpoint or 'unknown', time.perf_counter() - start)
+    return response
+
+
+@app.teardown_request
+def _finish_profile(exc):
+    # Teardown runs after a streamed body is fully sent
+    handle = g.pop('profile', None)
+    if handle is not None:
+        profiler.finish_request(handle)
+
+
+def _wants_ndjson():
+    """Whether the client asked for a streamed response (?format=ndjson)."""
+    return request.args.get('format') == 'ndjson'
+
+
+def _ndjson_response(records, headers=None):
+    """
+    Stream records as newline-delimited JSON, one record per line.
+    
+    Records are serialized as the generator yields them, so the full
+    payload is never held in memory and the first line goes out as soon as
+    it is ready.
+    """
+    def generate():
+        for record in records:
+            yield app.json.dumps(record) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers=headers)
 
-# Load data on startup
-thermo.load()
 
 # ============ Pages ============
 
@@ -17,6 +83,58 @@ def index():
     return render_template('index.html')
 
 
+# ============ Metrics ============
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Phase and request timing histograms, Prometheus text format (?format=json for a summary)."""
+    if request.args.get('format') == 'json':
+        return jsonify({'enabled': metrics.is_enabled(), 'warmup': warmup.status(), **metrics.snapshot()})
+    return Response(metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/profile', methods=['POST'])
+def start_profile():
+    """
+    Run the sampling profiler (only with ATACFLUX_PROFILER=1).
+    
+    Body: {"seconds": 10} samples every thread for N seconds and returns
+          the collapsed stacks;
+          {"match": "^/api/optimize"} profiles the next request whose path
+          matches and returns a profile_id for /api/profile/<profile_id>.
+          Optional "interval" sets the sampling period in seconds.
+    """
+    if not profiler.is_enabled():
+        return jsonify({'success': False, 'error': 'Profiler disabled; set ATACFLUX_PROFILER=1'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    interval = float(data.get('interval', profiler.DEFAULT_INTERVAL))
+    
+    try:
+        if data.get('match'):
+            profile_id = profiler.arm(data['match'], interval)
+            return jsonify({'success': True, 'profile_id': profile_id})
+        
+        collapsed = profiler.profile(float(data.get('seconds', 10)), interval)
+        return Response(collapsed, mimetype='text/plain')
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/profile/<profile_id>')
+def get_profile(profile_id):
+    """Collapsed stacks of a request profile once done, else its status."""
+    if not profiler.is_enabled():
+        return jsonify({'success': False, 'error': 'Profiler disabled; set ATACFLUX_PROFILER=1'}), 403
+    
+    result = profiler.get_result(profile_id)
+    if result is None:
+        return jsonify({'success': False, 'error': f'Profile {profile_id} not found'})
+    if result['status'] != 'done' or request.args.get('format') == 'json':
+        return jsonify({'success': True, **result})
+    return Response(result['collapsed'], mimetype='text/plain')
+
+
 # ============ Model API ============
 
 @app.route('/api/load_model', methods=['POST'])
@@ -69,26 +187,280 @@ def optimize():
     if not cobra_model.is_loaded():
         return jsonify({'success': False, 'error': 'No model loaded'})
     
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'fba')
+    
     try:
-        model = cobra_model.get_model()
-        
-        # Reset to original bounds first
-        cobra_model.reset_bounds()
+        constraint_results = _apply_conditions()
         
-        # Then apply active constraints
-        constraint_results = constraints.apply_to_model(model)
-        
-        solution = cobra_model.optimize()
+        solution = cobra_model.optimize(mode)
+        _cache_scenario_solution(mode, solution)
         return jsonify({
             'success': True,
+            'mode': mode,
             'status': solution.status,
             'objective_value': solution.objective_value,
-            'constraints_applied': constraint_results
+            'mode_objective': getattr(solution, 'mode_objective', None),
+            'constraints_applied': constraint_results,
+            'thermo_check': _thermo_check(solution.status) if data.get('thermo_check', True) else None
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 
+def _thermo_check(status, limit=20):
+    """Consistency scan of the current solution (top flagged reactions); never fails the request."""
+    if status != 'optimal':
+        return None
+    try:
+        return thermodynamics.consistency_scan(cobra_model.get_flux_vector(), limit=limit)
+    except Exception as e:
+        return {'error': str(e)}
+
+
+@app.route('/api/reference', methods=['POST'])
+def set_reference():
+    """
+    Set the MOMA/ROOM reference flux distribution.
+    
+    Body: {"source": "current"} to use the current solution, or
+          {"source": "wildtype"} for pFBA at the original bounds (default).
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json(silent=True) or {}
+    source = data.get('source', 'wildtype')
+    
+    try:
+        success = cobra_model.set_reference(use_current=(source == 'current'))
+        if not success:
+            return jsonify({'success': False, 'error': 'No current solution; run FBA first'})
+        return jsonify({'success': True, 'source': source})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/solver')
+def get_solver():
+    """Get solver policy, installed backends and per-solve timing summary."""
+    model = cobra_model.get_model()
+    return jsonify({
+        'policy': solver.get_policy(),
+        'active': solver.solver_name(model) if model else None,
+        'available': solver.available_solvers(),
+        'basis_policies': list(solver.BASIS_POLICIES),
+        'timings': solver.timing_summary()
+    })
+
+
+@app.route('/api/solver', methods=['POST'])
+def configure_solver():
+    """Set solver backend, basis policy, canonical tie-breaking and compression."""
+    data = request.get_json() or {}
+    try:
+        policy = solver.configure(
+            cobra_model.get_model(),
+            solver=data.get('solver'),
+            basis=data.get('basis'),
+            canonical=data.get('canonical'),
+            compress=data.get('compress')
+        )
+        return jsonify({'success': True, 'policy': policy})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+def _cache_scenario_solution(mode, solution):
+    """Store a solution with the active scenario, if the constraints still match it."""
+    active = scenarios.get_active(constraints.list_all())
+    # Scaled bounds (accessibility, context models) are not part of the scenario
+    if active is None or solution.status != 'optimal' or constraints.get_bound_scale() is not None:
+        return
+    scenarios.store_solution(
+        *active, cobra_model.get_model_hash(), mode, _solution_policy(mode),
+        solution, cobra_model.get_flux_vector()
+    )
+
+
+def _solution_policy(mode):
+    """Cache key of a scenario solution besides the mode: the solver policy, plus the reference for MOMA/ROOM."""
+    policy = solver.policy_key(cobra_model.get_model())
+    if mode in ('moma', 'room'):
+        # None until a reference is set; such a lookup never matches
+        policy += f'/reference={cobra_model.get_reference_digest()}'
+    return policy
+
+
+def _apply_conditions():
+    """Reset the model to its original bounds with the active constraints applied (one write)."""
+    return constraints.apply_to_model(cobra_model.get_model())
+
+
+# ============ Sampling API ============
+
+@app.route('/api/sample', methods=['POST'])
+def sample_fluxes():
+    """Sample the flux space under the current constraints."""
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    
+    try:
+        constraint_results = _apply_conditions()
+        model = cobra_model.get_model()
+        with model:
+            pruned = 0
+            reduced = None
+            if data.get('prune_blocked', True):
+                # Chains run on the compressed model when the policy allows it,
+                # which already leaves blocked reactions out
+                reduced = compression.prepare(model, compute=True)
+                if reduced is None:
+                    # Fixed reactions are skipped by the sampler's warm-up; undone on exit
+                    pruned = network.pin_blocked(model)
+                else:
+                    pruned = int(reduced['blocked'].sum())
+            result = sampling.sample(
+                model,
+                int(data.get('n', 1000)),
+                chunk_size=int(data.get('chunk_size', 1000)),
+                method=data.get('method', 'optgp'),
+                processes=data.get('processes'),
+                thinning=int(data.get('thinning', 100)),
+                seed=data.get('seed'),
+                reduced=reduced
+            )
+        return jsonify({'success': True, 'constraints_applied': constraint_results, 'pruned': pruned, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/sample/<sample_id>')
+def get_sample_summary(sample_id):
+    """Get the summary statistics of a previous sampling run."""
+    summary = sampling.load_summary(sample_id)
+    if summary is None:
+        return jsonify({'error': f'Sample run {sample_id} not found'})
+    return jsonify(summary)
+
+
+# ============ Network API ============
+
+@app.route('/api/network')
+def get_network():
+    """
+    Blocked reactions and dead-end metabolites under the current medium.
+    
+    Computed once per model and medium, then served from data/network.
+    Query: ids=false leaves out the ID lists; refresh=true recomputes.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    try:
+        _apply_conditions()
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        analysis = network.get_analysis(cobra_model.get_model(), refresh=refresh)
+        with_ids = request.args.get('ids', 'true').lower() == 'true'
+        return jsonify({'success': True, **network.summary(analysis, with_ids)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/compression')
+def get_compression():
+    """
+    Size of the compressed model for the current medium.
+    
+    Builds the network analysis and the reduced model if needed.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    try:
+        _apply_conditions()
+        reduced = compression.get_reduced(cobra_model.get_model(), compute=True)
+        return jsonify({
+            'success': True,
+            'enabled': solver.get_policy()['compress'],
+            **compression.stats(reduced)
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/fva', methods=['POST'])
+def run_fva():
+    """
+    Flux variability under the current constraints.
+    
+    Body: reactions (default all), fraction_of_optimum (default 1.0),
+    processes. Solved on the compressed model when the policy allows it.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    
+    try:
+        constraint_results = _apply_conditions()
+        start = time.perf_counter()
+        result = compression.fva(
+            cobra_model.get_model(),
+            data.get('reactions'),
+            fraction_of_optimum=float(data.get('fraction_of_optimum', 1.0)),
+            processes=data.get('processes')
+        )
+        return jsonify({
+            'success': True,
+            'constraints_applied': constraint_results,
+            'seconds': round(time.perf_counter() - start, 3),
+            **result
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+# ============ Condition Sweep API ============
+
+@app.route('/api/sweep', methods=['POST'])
+def sweep_conditions():
+    """
+    Sweep one or two exchange bounds over a grid (phenotype phase plane).
+    
+    Body: {"axes": [{"query": "glucose", "start": -10, "stop": 0, "steps": 11}, ...],
+           "processes": 4}
+    Each axis names its exchange by metabolite query or directly by "reaction".
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    axis_specs = data.get('axes') or []
+    
+    try:
+        constraint_results = _apply_conditions()
+        model = cobra_model.get_model()
+        
+        axes = []
+        for spec in axis_specs:
+            reaction_id = spec.get('reaction') or sweep.resolve_exchange(model, spec.get('query', ''))
+            axis = sweep.build_axis(
+                model, reaction_id,
+                float(spec.get('start', -10)), float(spec.get('stop', 0)), int(spec.get('steps', 11)),
+                spec.get('bound', 'lower')
+            )
+            axis['query'] = spec.get('query')
+            axes.append(axis)
+        
+        result = sweep.run(model, axes, processes=data.get('processes'))
+        return jsonify({'success': True, 'constraints_applied': constraint_results, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
 # ============ Reactions API ============
 
 @app.route('/api/reactions')
@@ -97,11 +469,33 @@ def list_reactions():
         return jsonify({'error': 'No model loaded'})
     
     query = request.args.get('q', '')
-    limit = int(request.args.get('limit', 50))
+    # Streamed listings default to every match
+    limit = request.args.get('limit', None if _wants_ndjson() else 50, type=int)
     offset = int(request.args.get('offset', 0))
     nonzero_flux = request.args.get('nonzero_flux', 'false').lower() == 'true'
+    sort = request.args.get('sort') or None
+    min_flux = request.args.get('min_flux', type=float)
+    max_flux = request.args.get('max_flux', type=float)
+    compartment = request.args.get('compartment') or None
+    subsystem = request.args.get('subsystem')
+    top_n = request.args.get('top', type=int)
+    # Hide blocked reactions (network analysis of the current medium)
+    live_only = request.args.get('live_only', 'false').lower() == 'true'
+    mask = network.live_mask() if live_only else None
+    
+    if _wants_ndjson():
+        total, rows = cobra_model.iter_reactions(
+            query, limit, offset, nonzero_flux,
+            sort=sort, min_flux=min_flux, max_flux=max_flux,
+            compartment=compartment, subsystem=subsystem, top_n=top_n, mask=mask
+        )
+        return _ndjson_response(rows, headers={'X-Total-Count': str(total)})
     
-    reactions, total = cobra_model.list_reactions(query, limit, offset, nonzero_flux)
+    reactions, total = cobra_model.list_reactions(
+        query, limit, offset, nonzero_flux,
+        sort=sort, min_flux=min_flux, max_flux=max_flux,
+        compartment=compartment, subsystem=subsystem, top_n=top_n, mask=mask
+    )
     
     return jsonify({
         'reactions': reactions,
@@ -123,6 +517,46 @@ def get_reaction(rxn_id):
     return jsonify(result)
 
 
+# ============ Genes API ============
+
+@app.route('/api/gene/<gene_id>')
+def get_gene(gene_id):
+    """A gene, its reactions and what its knockout disables."""
+    if not cobra_model.is_loaded():
+        return jsonify({'error': 'No model loaded'})
+    
+    result = cobra_model.get_gene_info(gene_id)
+    if result is None:
+        return jsonify({'error': f'Gene {gene_id} not found'})
+    
+    return jsonify(result)
+
+
+@app.route('/api/genes/knockout', methods=['POST'])
+def gene_knockouts():
+    """
+    Reactions disabled by gene knockout sets, evaluated together.
+    
+    Body: {"gene_sets": [["YAL012W"], ["YGR192C", "YJR009C"], ...]}
+    Only reports the GPR effect; add 'gene' constraints to knock out for solves.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    gene_sets = data.get('gene_sets') or []
+    try:
+        compiled = gpr.get_compiled(cobra_model.get_model())
+        reaction_ids = cobra_model.get_reaction_ids()
+        results = [
+            {'genes': genes, 'knocked_out': [reaction_ids[i] for i in off]}
+            for genes, off in zip(gene_sets, gpr.knocked_out(compiled, gene_sets))
+        ]
+        return jsonify({'success': True, 'results': results})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
 # ============ Thermodynamics API ============
 
 @app.route('/api/thermo_status')
@@ -136,12 +570,130 @@ def thermo_status():
 
 @app.route('/api/thermo_cache')
 def get_thermo_cache():
+    if _wants_ndjson():
+        # One line per reaction: {"id": ..., <thermo data>}
+        return _ndjson_response({'id': rxn_id, **data} for rxn_id, data in thermo.iter_reactions())
+    
     return jsonify({
         'success': True,
         'reactions': thermo.get_all_reactions()
     })
 
 
+def _concentration_bounds(data):
+    """Concentration bounds from a request body's concentration_files / concentrations."""
+    files = data.get('concentration_files') or []
+    if isinstance(files, str):
+        files = [files]
+    return thermodynamics.concentration_bounds(files=files, overrides=data.get('concentrations'))
+
+
+@app.route('/api/thermo/dg_prime', methods=['POST'])
+def get_dg_prime():
+    """
+    Concentration-aware ΔG' of reactions.
+    
+    Body: {"reactions": ["r_0534", ...],
+           "concentrations": {"s_0434": 0.003, "kegg:C00031": [1e-4, 1e-2]},
+           "concentration_files": ["bounds.csv"],
+           "at": {"s_0434": 0.002}}
+    concentrations/concentration_files set the bounds that dG_prime_min and
+    dG_prime_max span; dG_prime is at "at" (other metabolites at the
+    geometric mean of their bounds).
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    try:
+        bounds = _concentration_bounds(data)
+        reactions = thermodynamics.reaction_dg(data.get('reactions') or [], bounds, concentrations=data.get('at'))
+        return jsonify({
+            'success': True,
+            'temperature': thermodynamics.TEMPERATURE,
+            'reactions': reactions,
+            'unmatched_concentrations': bounds['unmatched']
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/thermo/mdf', methods=['POST'])
+def get_mdf():
+    """
+    Max-min Driving Force of one reaction set or a scan of many.
+    
+    Body: {"reactions": [...]}  or  {"subsystem": "Glycolysis / gluconeogenesis"}
+          for one pathway with driving forces and concentrations, or
+          {"pathways": {"name": [...], ...}} / {"subsystems": [...] or "all"}
+          for a ranked scan; plus "directions": "flux" (current solution,
+          default) or "forward", and the concentration options of
+          /api/thermo/dg_prime.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    try:
+        start = time.perf_counter()
+        bounds = _concentration_bounds(data)
+        directions = data.get('directions', 'flux')
+        
+        if data.get('reactions') or data.get('subsystem'):
+            if data.get('reactions'):
+                name, reaction_ids = 'reactions', data['reactions']
+            else:
+                name = data['subsystem']
+                reaction_ids = pathway.subsystem_reaction_ids([name])[name]
+            result = thermodynamics.mdf(reaction_ids, bounds, thermodynamics.directions_for(directions),
+                                        name=name)
+            return jsonify({'success': True, **result, 'unmatched_concentrations': bounds['unmatched']})
+        
+        if data.get('pathways'):
+            pathways = data['pathways']
+        elif data.get('subsystems'):
+            names = None if data['subsystems'] == 'all' else data['subsystems']
+            pathways = pathway.subsystem_reaction_ids(names)
+        else:
+            return jsonify({'success': False, 'error': 'reactions, subsystem, pathways or subsystems is required'})
+        results = thermodynamics.scan(pathways, bounds, directions=directions, detail=bool(data.get('detail')))
+        return jsonify({
+            'success': True,
+            'pathways': results,
+            'unmatched_concentrations': bounds['unmatched'],
+            'seconds': time.perf_counter() - start
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/thermo/check')
+def check_thermo_consistency():
+    """
+    Thermodynamic consistency of the current solution.
+    
+    Query: k (uncertainty multiplier, default 2), limit (reactions listed).
+    Flags active reactions running against ΔG'° ± k·uncertainty, ranked by
+    how far no concentration within the bounds can rescue them, and loops
+    among active internal reactions.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    fluxes = cobra_model.get_flux_vector()
+    if fluxes is None:
+        return jsonify({'success': False, 'error': 'No current solution; run FBA first'})
+    
+    try:
+        result = thermodynamics.consistency_scan(
+            fluxes,
+            k=request.args.get('k', thermodynamics.DEFAULT_K, type=float),
+            limit=request.args.get('limit', type=int)
+        )
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
 @app.route('/api/thermo/<rxn_id>')
 def get_thermo(rxn_id):
     data = thermo.get_reaction(rxn_id)
@@ -164,6 +716,31 @@ def get_metabolite(met_id):
     return jsonify(result)
 
 
+@app.route('/api/batch', methods=['POST'])
+def get_batch():
+    """
+    Fetch many reactions, metabolites and thermo entries in one request.
+    
+    Body: {"reactions": [...], "metabolites": [...], "thermo": [...],
+           "fields": ["id", "name", ...] or {"reactions": [...], ...}}
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'error': 'No model loaded'})
+    
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        result = pathway.get_batch(
+            reaction_ids=data.get('reactions') or [],
+            metabolite_ids=data.get('metabolites') or [],
+            thermo_ids=data.get('thermo') or [],
+            fields=data.get('fields')
+        )
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)})
+
+
 @app.route('/api/subsystems')
 def list_subsystems():
     if not cobra_model.is_loaded():
@@ -177,6 +754,12 @@ def get_subsystem(subsystem_name):
     if not cobra_model.is_loaded():
         return jsonify({'error': 'No model loaded'})
     
+    if _wants_ndjson():
+        reactions = pathway.iter_subsystem_reactions(subsystem_name)
+        if reactions is None:
+            return jsonify({'error': f'Subsystem {subsystem_name} not found'})
+        return _ndjson_response(reactions)
+    
     result = pathway.get_subsystem_reactions(subsystem_name)
     if result is None:
         return jsonify({'error': f'Subsystem {subsystem_name} not found'})
@@ -196,7 +779,8 @@ def list_constraints():
     
     return jsonify({
         'constraints': constraints.list_all(),
-        'presets': presets
+        'presets': presets,
+        'bound_scale': constraints.get_bound_scale()
     })
 
 
@@ -206,7 +790,7 @@ def add_constraint():
     data = request.get_json()
     
     constraint_id = data.get('id')
-    constraint_type = data.get('type')  # 'reaction' or 'exchange'
+    constraint_type = data.get('type')  # 'reaction', 'exchange' or 'gene'
     target = data.get('target')
     bounds = data.get('bounds')
     label = data.get('label')
@@ -216,7 +800,12 @@ def add_constraint():
     if not all([constraint_id, constraint_type, target, bounds is not None]):
         return jsonify({'success': False, 'error': 'Missing required fields'})
     
-    constraints.add(constraint_id, constraint_type, target, bounds, label, bound_type, target_info)
+    try:
+        # Resolved against the loaded model now, so bad targets fail here
+        constraints.add(constraint_id, constraint_type, target, bounds, label, bound_type, target_info,
+                        model=cobra_model.get_model())
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
     return jsonify({'success': True, 'constraints': constraints.list_all()})
 
 
@@ -261,6 +850,372 @@ def clear_constraints():
     return jsonify({'success': True, 'constraints': {}})
 
 
+# ============ Accessibility API ============
+
+@app.route('/api/accessibility', methods=['POST'])
+def ingest_accessibility():
+    """
+    Ingest ATAC-seq peak files and score reactions by promoter accessibility.
+    
+    Body: {"annotation": "genes.gff3",
+           "samples": [{"name": "wt", "path": "wt.narrowPeak.gz"}, ...],
+           "upstream": 1000, "downstream": 100, "processes": 1}
+    Paths are files on the server.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    if not data.get('annotation') or not data.get('samples'):
+        return jsonify({'success': False, 'error': 'annotation and samples are required'})
+    
+    try:
+        summary = accessibility.run(
+            cobra_model.get_model(),
+            data['samples'],
+            data['annotation'],
+            upstream=int(data.get('upstream', accessibility.DEFAULT_UPSTREAM)),
+            downstream=int(data.get('downstream', accessibility.DEFAULT_DOWNSTREAM)),
+            chunk_size=int(data.get('chunk_size', accessibility.DEFAULT_CHUNK_SIZE)),
+            processes=int(data.get('processes', 1)),
+            signal_column=data.get('signal_column')
+        )
+        return jsonify({'success': True, **summary})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/accessibility/<run_id>')
+def get_accessibility(run_id):
+    """Get the summary of a previous accessibility run."""
+    summary = accessibility.load_summary(run_id)
+    if summary is None:
+        return jsonify({'error': f'Accessibility run {run_id} not found'})
+    return jsonify(summary)
+
+
+@app.route('/api/accessibility/<run_id>/apply', methods=['POST'])
+def apply_accessibility(run_id):
+    """
+    Scale reaction bounds E-Flux style by one sample's accessibility.
+    
+    Body: {"sample": "wt", "min_scale": 0.0}; the scaling stays active for
+    every solve until /api/accessibility/clear.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    try:
+        reaction_ids = cobra_model.get_reaction_ids()
+        scale = accessibility.bound_scale(run_id, data.get('sample'), reaction_ids,
+                                          float(data.get('min_scale', 0.0)))
+        constraints.set_bound_scale('accessibility', scale, f"accessibility {run_id}/{data.get('sample')}",
+                                    reaction_ids)
+        return jsonify({'success': True, 'bound_scale': constraints.get_bound_scale()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/accessibility/clear', methods=['POST'])
+def clear_accessibility():
+    """Remove accessibility bound scaling (a context model stays applied)."""
+    constraints.set_bound_scale('accessibility', None)
+    return jsonify({'success': True})
+
+
+# ============ Context-Specific Models API ============
+
+@app.route('/api/context', methods=['POST'])
+def build_context_models():
+    """
+    Solve GIMME or iMAT for every sample of an omics matrix.
+    
+    Body: {"method": "gimme" | "imat",
+           "accessibility_run": "<run_id>"  or  "path": "expression.tsv",
+           "processes": 4, "low_quantile": 0.25, "high_quantile": 0.75,
+           "fraction": 0.9, "epsilon": 0.01, "timeout": 20}
+    The matrix comes from a stored accessibility run (gene signal) or a
+    genes x samples table on the server. Current conditions apply.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    try:
+        if data.get('accessibility_run'):
+            arrays = accessibility.load_run(data['accessibility_run'])
+            samples, genes, matrix = list(arrays['samples']), list(arrays['genes']), arrays['gene_signal']
+            source = f"accessibility {data['accessibility_run']}"
+        elif data.get('path'):
+            samples, genes, matrix = context.load_matrix(data['path'])
+            source = data['path']
+        else:
+            return jsonify({'success': False, 'error': 'accessibility_run or path is required'})
+        
+        _apply_conditions()
+        summary = context.run(
+            cobra_model.get_model(), samples, genes, matrix,
+            method=data.get('method', 'gimme'),
+            processes=data.get('processes'),
+            low_quantile=data.get('low_quantile'),
+            high_quantile=data.get('high_quantile'),
+            fraction=data.get('fraction'),
+            epsilon=data.get('epsilon'),
+            timeout=data.get('timeout'),
+            source=source
+        )
+        return jsonify({'success': True, **summary})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/context/<run_id>')
+def get_context_models(run_id):
+    """Get the summary of a previous context-specific model run."""
+    summary = context.load_summary(run_id)
+    if summary is None:
+        return jsonify({'error': f'Context run {run_id} not found'})
+    return jsonify(summary)
+
+
+@app.route('/api/context/<run_id>/apply', methods=['POST'])
+def apply_context_model(run_id):
+    """
+    Reduce the model to one sample's context.
+    
+    Body: {"sample": "wt"}; closes the low reactions the sample's solution
+    left inactive until /api/context/clear. Accessibility scaling stays
+    applied on top; applying another sample replaces this one.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    try:
+        reaction_ids = cobra_model.get_reaction_ids()
+        scale = context.bound_scale(run_id, data.get('sample'), reaction_ids)
+        constraints.set_bound_scale('context', scale, f"context {run_id}/{data.get('sample')}", reaction_ids)
+        return jsonify({'success': True, 'bound_scale': constraints.get_bound_scale()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/context/clear', methods=['POST'])
+def clear_context_model():
+    """Remove an applied context model (accessibility scaling stays applied)."""
+    constraints.set_bound_scale('context', None)
+    return jsonify({'success': True})
+
+
+# ============ Strain Design API ============
+
+@app.route('/api/strain_design', methods=['POST'])
+def design_strain():
+    """
+    Search knockout sets that couple product secretion to growth.
+    
+    Body: {"product": "ethanol" | "<exchange id>",
+           "method": "heuristic" | "optknock",
+           "max_knockouts": 3, "min_growth": 0.1, "beam": 10,
+           "time_budget": 60, "designs": 10, "processes": 4,
+           "candidates": [...], "exclude": [...], "refresh": false}
+    Current conditions apply; results are cached per conditions and request.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    if not data.get('product'):
+        return jsonify({'success': False, 'error': 'product is required'})
+    
+    try:
+        constraint_results = _apply_conditions()
+        model = cobra_model.get_model()
+        product = strain_design.resolve_product(model, data['product'])
+        result = strain_design.run(
+            model, product,
+            method=data.get('method', 'heuristic'),
+            processes=data.get('processes'),
+            candidates=data.get('candidates'),
+            exclude=data.get('exclude', ()),
+            refresh=bool(data.get('refresh', False)),
+            max_knockouts=data.get('max_knockouts'),
+            min_growth=data.get('min_growth'),
+            beam=data.get('beam'),
+            time_budget=data.get('time_budget'),
+            designs=data.get('designs')
+        )
+        return jsonify({'success': True, 'constraints_applied': constraint_results, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/envelope', methods=['POST'])
+def compute_envelope():
+    """
+    Product flux range over growth under the current constraints.
+    
+    Body: {"product": "ethanol" | "<exchange id>", "points": 20, "processes": 4}
+    Returns the min/max product flux and carbon yield per growth rate, with
+    the envelope outlines as polygons.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    if not data.get('product'):
+        return jsonify({'success': False, 'error': 'product is required'})
+    
+    try:
+        constraint_results = _apply_conditions()
+        model = cobra_model.get_model()
+        product = strain_design.resolve_product(model, data['product'])
+        result = envelope.run(
+            model, product,
+            points=int(data.get('points', envelope.DEFAULT_POINTS)),
+            processes=data.get('processes')
+        )
+        return jsonify({'success': True, 'constraints_applied': constraint_results, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/dfba', methods=['POST'])
+def simulate_dfba():
+    """
+    Batch culture by dynamic FBA under the current constraints.
+    
+    Body: {"initial": {"glucose": 100}, "track": ["ethanol"], "biomass": 0.05,
+           "hours": 48, "kinetics": {"glucose": {"vmax": 10, "km": 0.5}},
+           "dt_max": 0.25, "max_change": 0.1, "compute": false}
+    Returns biomass, growth, concentrations and exchange fluxes per time point.
+    """
+    if not cobra_model.is_loaded():
+        return jsonify({'success': False, 'error': 'No model loaded'})
+    
+    data = request.get_json() or {}
+    if not data.get('initial'):
+        return jsonify({'success': False, 'error': 'initial concentrations are required'})
+    
+    try:
+        constraint_results = _apply_conditions()
+        result = dfba.simulate(
+            cobra_model.get_model(), data['initial'],
+            biomass=float(data.get('biomass', 0.05)),
+            hours=float(data.get('hours', 48.0)),
+            track=data.get('track', []),
+            kinetics=data.get('kinetics'),
+            compute=bool(data.get('compute', False)),
+            **{key: data.get(key) for key in ('dt_max', 'dt_min', 'max_change')}
+        )
+        return jsonify({'success': True, 'constraints_applied': constraint_results, **result})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+# ============ Scenarios API ============
+
+@app.route('/api/scenarios')
+def list_scenarios():
+    """List stored scenarios and the one the current constraints came from."""
+    active = scenarios.get_active(constraints.list_all())
+    return jsonify({
+        'scenarios': scenarios.list_scenarios(),
+        'active': {'name': active[0], 'version': active[1]} if active else None
+    })
+
+
+@app.route('/api/scenarios', methods=['POST'])
+def save_scenario():
+    """
+    Save the current constraints as the next version of a named scenario.
+    
+    Body: {"name": "anaerobic_glc", "note": "optional description"}
+    """
+    data = request.get_json() or {}
+    try:
+        current = constraints.list_all()
+        version, created = scenarios.save(data.get('name'), current, data.get('note'))
+        scenarios.mark_active(scenarios.get(data['name'], version))
+        return jsonify({'success': True, 'name': data['name'], 'version': version, 'created': created})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/api/scenarios/<name>')
+def get_scenario(name):
+    """Get a scenario's constraints (latest version, or ?version=N) and its version list."""
+    scenario = scenarios.get(name, request.args.get('version', type=int))
+    if scenario is None:
+        return jsonify({'error': f'Scenario {name} not found'})
+    return jsonify(scenario)
+
+
+@app.route('/api/scenarios/<name>', methods=['DELETE'])
+def delete_scenario(name):
+    """Delete a scenario with all its versions and cached solutions."""
+    return jsonify({'success': scenarios.delete(name)})
+
+
+@app.route('/api/scenarios/<name>/activate', methods=['POST'])
+def activate_scenario(name):
+    """
+    Replace the active constraints with a stored scenario in one step.
+    
+    Body: {"version": 2, "mode": "fba", "solve": false}
+          version defaults to the latest; if the scenario was solved before
+          in this mode (same model and solver policy), its cached solution
+          becomes current without solving. With "solve": true a scenario
+          without a cached solution is solved and cached.
+    """
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'fba')
+    
+    scenario = scenarios.get(name, data.get('version'))
+    if scenario is None:
+        return jsonify({'success': False, 'error': f'Scenario {name} not found'})
+    
+    try:
+        # Validated first, then swapped in as a whole
+        constraints.replace(scenario['constraints'], cobra_model.get_model())
+        scenarios.mark_active(scenario)
+        
+        solution = None
+        constraint_results = None
+        if cobra_model.is_loaded():
+            constraint_results = _apply_conditions()
+            cached = None
+            if constraints.get_bound_scale() is None:
+                cached = scenarios.get_solution(
+                    name, scenario['version'], cobra_model.get_model_hash(), mode, _solution_policy(mode)
+                )
+            if cached is not None:
+                cobra_model.restore_solution(cached['fluxes'], cached['objective_value'], cached['status'])
+                solution = {**{k: v for k, v in cached.items() if k != 'fluxes'}, 'cached': True}
+            elif data.get('solve'):
+                result = cobra_model.optimize(mode)
+                _cache_scenario_solution(mode, result)
+                solution = {
+                    'status': result.status,
+                    'objective_value': result.objective_value,
+                    'mode_objective': getattr(result, 'mode_objective', None),
+                    'cached': False
+                }
+        
+        return jsonify({
+            'success': True,
+            'name': name,
+            'version': scenario['version'],
+            'mode': mode,
+            'constraints': constraints.list_all(),
+            'constraints_applied': constraint_results,
+            'solution': solution
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+
 @app.route('/api/search/reactions')
 def search_reactions_for_constraint():
     """Search reactions for constraint builder."""
@@ -273,13 +1228,12 @@ def search_reactions_for_constraint():
     
     results = []
     model = cobra_model.get_model()
-    compartment_names = model.compartments
+    compartment_names = cobra_model.get_compartment_names()
     
     for rxn in model.reactions:
         # Filter by compartment if specified (reaction has any metabolite in that compartment)
         if compartment:
-            rxn_compartments = set(m.compartment for m in rxn.metabolites.keys())
-            if compartment not in rxn_compartments:
+            if compartment not in cobra_model.get_reaction_compartments(rxn.id):
                 continue
         
         if query in rxn.id.lower() or query in rxn.name.lower():
@@ -309,13 +1263,13 @@ def search_metabolites_for_constraint():
     
     results = []
     model = cobra_model.get_model()
-    compartment_names = model.compartments  # dict of id -> name
+    compartment_names = cobra_model.get_compartment_names()  # dict of id -> name
     
     for met in model.metabolites:
         # Filter by compartment if specified
         if compartment and met.compartment != compartment:
             continue
-            
+        
         if query in met.id.lower() or query in met.name.lower():
             # Get ALL reactions this metabolite participates in
             reactions = []
@@ -372,4 +1326,9 @@ def search_by_annotation():
 
 
 if __name__ == '__main__':
+    from werkzeug.serving import is_running_from_reloader
+    
+    # With the debug reloader only the child process serves requests
+    if is_running_from_reloader():
+        warmup.start(port=5000)
     app.run(debug=True, port=5000)
@@ -4,3 +4,7 @@ from . import thermo
 from . import cobra_model
 from . import constraints
 from . import annotations
+from . import solver
+from . import flux_modes
+from . import scenarios
+from . import gpr
@@ -2,6 +2,8 @@
 
 from . import thermo
 
+_thermo_index = {'version': None, 'index': {}}  # (field, normalized value) -> yeast-GEM IDs
+
 
 def find_metabolite(model, query, match_type='any'):
     """
@@ -126,6 +128,74 @@ def find_metabolite_from_thermo_cache(model, query):
     return matches
 
 
+def _thermo_match_keys(data):
+    """(field, normalized value) pairs a thermo compound entry can be matched by."""
+    ids = data.get('identifiers', {})
+    keys = []
+    if ids.get('kegg'):
+        keys.append(('kegg', ids['kegg'].upper()))
+    if ids.get('chebi'):
+        keys.append(('chebi', ids['chebi'].replace('CHEBI:', '')))
+    if ids.get('metanetx'):
+        keys.append(('metanetx', ids['metanetx'].upper()))
+    if ids.get('bigg'):
+        keys.append(('bigg', ids['bigg'].lower()))
+    if data.get('name'):
+        keys.append(('name', data['name'].lower()))
+    return keys
+
+
+def _query_match_keys(query):
+    """The same (field, normalized value) pairs for a query string."""
+    return [
+        ('kegg', query.upper()),
+        ('chebi', query.replace('CHEBI:', '').replace('chebi:', '')),
+        ('metanetx', query.upper()),
+        ('bigg', query.lower().strip()),
+        ('name', query.lower().strip())
+    ]
+
+
+def _get_thermo_index():
+    """Identifier index over the thermo compound cache, rebuilt when the cache reloads."""
+    version = thermo.version()
+    if _thermo_index['version'] != version:
+        index = {}
+        for data in thermo.get_all_compounds().values():
+            gem_ids = data.get('identifiers', {}).get('yeast_gem', [])
+            for key in _thermo_match_keys(data):
+                index.setdefault(key, set()).update(gem_ids)
+        _thermo_index['index'] = index
+        _thermo_index['version'] = version
+    return _thermo_index['index']
+
+
+def find_metabolites_batch(model, queries):
+    """
+    Resolve many queries against an identifier index of the thermo cache.
+    
+    Same matching as find_metabolite_from_thermo_cache, but the cache is
+    scanned once per thermo version (to build the index) instead of once
+    per query.
+    Queries the cache doesn't know map to an empty list; callers fall back
+    to find_metabolite for those they need.
+    
+    Returns:
+        dict of query -> list of matching metabolites
+    """
+    index = _get_thermo_index()
+    gem_ids = {}
+    for query in queries:
+        gem_ids[query] = set()
+        for key in _query_match_keys(query):
+            gem_ids[query].update(index.get(key, ()))
+    
+    return {
+        query: [model.metabolites.get_by_id(m) for m in sorted(ids) if m in model.metabolites]
+        for query, ids in gem_ids.items()
+    }
+
+
 def find_exchange_reaction(model, metabolite):
     """
     Find exchange reaction(s) for a metabolite.
@@ -156,6 +226,11 @@ def find_exchange_by_query(model, query):
     if not metabolites:
         metabolites = find_metabolite(model, query)
     
+    return exchanges_for_metabolites(model, query, metabolites)
+
+
+def exchanges_for_metabolites(model, query, metabolites):
+    """find_exchange_by_query result for already resolved metabolites."""
     # Find exchange reactions
     exchanges = []
     for met in metabolites:
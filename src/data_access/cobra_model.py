@@ -1,23 +1,52 @@
 """COBRA model access layer."""
 
-import cobra
+import hashlib
 import os
 
+import numpy as np
+
+import metrics
+
+from . import flux_modes, gpr, solver
+
 # Module-level state
 _model = None
 _model_path = None
 _fba_solution = None
 _original_bounds = {}  # Store original bounds for reset
-
-
+_original_lower = None  # Original bounds as arrays aligned to the model's reactions
+_original_upper = None
+_model_hash = None  # Identity of the loaded model: reaction IDs and original bounds
+_reaction_table = {}  # Static reaction renderings, built once per model load
+_compartment_names = {}  # Compartment ID -> name, cached at load
+
+# Reaction index: position of each reaction in the model, and arrays aligned to it
+_reaction_ids = []
+_reaction_index = {}  # Reaction ID -> position
+_search_text = []  # Lowercased "id name genes" per reaction
+_subsystem_names = []  # Subsystem code -> subsystem name
+_subsystem_codes = None  # Subsystem code per reaction
+_compartment_masks = {}  # Compartment ID -> bool array of member reactions
+_flux_vector = None  # Latest solution fluxes, aligned to _reaction_ids
+_reducer = None  # Optional func(model, mode) -> Solution or None, see set_reducer
+
+
+@metrics.timed('model.load')
 def load(model_path=None):
     """Load COBRA model from file."""
     global _model, _model_path, _original_bounds
     
+    # cobra (pandas, optlang, sympy, libsbml) costs ~2 s to import; deferred
+    # so the app starts without it
+    import cobra
+    
     if model_path and os.path.exists(model_path):
         _model = cobra.io.read_sbml_model(model_path)
         _model_path = model_path
         _store_original_bounds()
+        _build_reaction_table()
+        _build_reaction_index()
+        gpr.get_compiled(_model)
         return True
     
     # Search default locations
@@ -34,41 +63,119 @@ def load(model_path=None):
             _model = cobra.io.read_sbml_model(full_path)
             _model_path = full_path
             _store_original_bounds()
+            _build_reaction_table()
+            _build_reaction_index()
+            gpr.get_compiled(_model)
             return True
     
     return False
 
 
 def _store_original_bounds():
-    """Store original bounds for all reactions."""
-    global _original_bounds
+    """Store original bounds for all reactions, and the model hash they define."""
+    global _original_bounds, _original_lower, _original_upper, _model_hash
     _original_bounds = {}
     if _model:
         for rxn in _model.reactions:
             _original_bounds[rxn.id] = (rxn.lower_bound, rxn.upper_bound)
+    _original_lower = np.array([lb for lb, _ in _original_bounds.values()], dtype=float)
+    _original_upper = np.array([ub for _, ub in _original_bounds.values()], dtype=float)
+    
+    digest = hashlib.sha1()
+    for rxn_id, (lb, ub) in _original_bounds.items():
+        digest.update(f'{rxn_id}:{lb!r}:{ub!r}\n'.encode())
+    _model_hash = digest.hexdigest()
 
 
+@metrics.timed('model.reset_bounds')
 def reset_bounds():
     """Reset all reactions to original bounds."""
-    if _model and _original_bounds:
-        for rxn in _model.reactions:
-            if rxn.id in _original_bounds:
-                rxn.bounds = _original_bounds[rxn.id]
+    if _model is not None and _original_lower is not None:
+        write_bounds(_original_lower, _original_upper)
+
+
+def get_original_bounds():
+    """Original bounds as (lower, upper) arrays aligned to the model's reactions."""
+    return _original_lower, _original_upper
+
+
+def get_bounds(model=None):
+    """Current bounds as (lower, upper) arrays aligned to the model's reactions."""
+    model = model or _model
+    n = len(model.reactions)
+    lower = np.fromiter((rxn.lower_bound for rxn in model.reactions), dtype=float, count=n)
+    upper = np.fromiter((rxn.upper_bound for rxn in model.reactions), dtype=float, count=n)
+    return lower, upper
+
+
+def write_bounds(lower, upper, model=None):
+    """
+    Bring every reaction's bounds to the given arrays in one pass.
+    
+    Only reactions whose bounds differ are written, so the solver sees a
+    handful of updates instead of one per reaction.
+    
+    Returns:
+        Number of reactions changed
+    """
+    model = model or _model
+    current_lower, current_upper = get_bounds(model)
+    changed = np.flatnonzero((current_lower != lower) | (current_upper != upper))
+    reactions = model.reactions
+    for i in changed:
+        reactions[i].bounds = (float(lower[i]), float(upper[i]))
+    return len(changed)
 
 
 def build_reaction_info(rxn, compartment_names=None, smart_break=True):
     """
     Build human-readable reaction info.
     
+    Served from the rendering table built at model load; reactions that are
+    not part of the loaded model are rendered on the fly.
+    
     Returns dict with:
         - equation: human-readable equation with metabolite names
         - equation_raw: original ID-based equation
         - location_type: 'compartment', 'compartments', or 'boundary'
         - location: the location value (e.g., "cytoplasm" or "extracellular ⇌ cytoplasm")
     """
-    if compartment_names is None:
-        compartment_names = _model.compartments if _model else {}
+    entry = _reaction_table.get(rxn.id)
+    if entry is None or entry['reaction'] is not rxn:
+        if compartment_names is None:
+            compartment_names = _compartment_names
+        entry = render_reaction(rxn, compartment_names)
     
+    return format_reaction_info(entry, rxn.lower_bound, rxn.upper_bound, smart_break)
+
+
+def format_reaction_info(entry, lower_bound, upper_bound, smart_break=True):
+    """Pick the bound-dependent variant of a rendered reaction."""
+    # Arrows follow the current bounds, exactly as cobra's reaction string does
+    reversible = lower_bound < 0 < upper_bound
+    if reversible:
+        raw_arrow = ' <=> '
+    elif lower_bound < 0 and upper_bound <= 0:
+        raw_arrow = ' <-- '
+    else:
+        raw_arrow = ' --> '
+    
+    return {
+        'equation': entry['equations'][2 * reversible + smart_break],
+        'equation_raw': entry['raw_reactants'] + raw_arrow + entry['raw_products'],
+        'location_type': entry['location_type'],
+        'location': entry['location'],
+        'is_exchange': entry['is_exchange']
+    }
+
+
+def render_reaction(rxn, compartment_names):
+    """
+    Render the static parts of a reaction.
+    
+    Everything that only depends on the stoichiometry is computed here, with
+    the human-readable equation in all four arrow/smart_break variants.
+    """
     # Collect compartment info
     all_compartments = set(m.compartment for m in rxn.metabolites.keys())
     single_compartment = len(all_compartments) == 1
@@ -104,14 +211,33 @@ def build_reaction_info(rxn, compartment_names=None, smart_break=True):
     
     left = ' + '.join(substrates) if substrates else '∅'
     right = ' + '.join(products) if products else '∅'
-    arrow = '⇌' if rxn.reversibility else '→'
-    human_equation = f"{left} {arrow} {right}"
     
-    # Smart line breaking for long equations
-    if smart_break and len(human_equation) > 60:
-        human_equation = human_equation.replace(f' {arrow} ', f' {arrow}\n')
-        if any(len(part) > 80 for part in human_equation.split('\n')):
-            human_equation = human_equation.replace(' + ', ' +\n')
+    # Indexed by 2 * reversible + smart_break
+    equations = []
+    for arrow in ('→', '⇌'):
+        human_equation = f"{left} {arrow} {right}"
+        equations.append(human_equation)
+        
+        # Smart line breaking for long equations
+        if len(human_equation) > 60:
+            human_equation = human_equation.replace(f' {arrow} ', f' {arrow}\n')
+            if any(len(part) > 80 for part in human_equation.split('\n')):
+                human_equation = human_equation.replace(' + ', ' +\n')
+        equations.append(human_equation)
+    
+    # ID-based sides of the equation (same ordering and format as cobra)
+    raw_reactants = []
+    raw_products = []
+    for m in sorted(rxn.metabolites, key=lambda met: met.id):
+        coef = rxn.metabolites[m]
+        prefix = '' if abs(coef) == 1 else str(abs(coef)).rstrip('.') + ' '
+        if coef >= 0:
+            raw_products.append(prefix + m.id)
+        else:
+            raw_reactants.append(prefix + m.id)
+    
+    # Compartments in order of first appearance
+    ordered_comps = list(dict.fromkeys(m.compartment for m in rxn.metabolites.keys()))
     
     # Determine location info
     if is_exchange:
@@ -122,10 +248,6 @@ def build_reaction_info(rxn, compartment_names=None, smart_break=True):
         location = f"{comp_name} ⇌ environment"
     elif is_transport:
         # Transport: compartment A ⇌ compartment B
-        ordered_comps = []
-        for m, coef in rxn.metabolites.items():
-            if m.compartment not in ordered_comps:
-                ordered_comps.append(m.compartment)
         comp_names_list = [compartment_names.get(c, c) for c in ordered_comps]
         location_type = 'compartments'
         location = ' ⇌ '.join(comp_names_list)
@@ -137,23 +259,62 @@ def build_reaction_info(rxn, compartment_names=None, smart_break=True):
         location = comp_name
     else:
         # Multi-compartment reaction (not transport)
-        ordered_comps = []
-        for m, coef in rxn.metabolites.items():
-            if m.compartment not in ordered_comps:
-                ordered_comps.append(m.compartment)
         comp_names_list = [compartment_names.get(c, c) for c in ordered_comps]
         location_type = 'compartments'
         location = ', '.join(comp_names_list)
     
     return {
-        'equation': human_equation,
-        'equation_raw': rxn.reaction,
+        'reaction': rxn,
+        'equations': tuple(equations),
+        'raw_reactants': ' + '.join(raw_reactants),
+        'raw_products': ' + '.join(raw_products),
         'location_type': location_type,
         'location': location,
-        'is_exchange': is_exchange
+        'is_exchange': is_exchange,
+        'compartments': ordered_comps
     }
 
 
+def _build_reaction_table():
+    """Render every reaction of the loaded model once."""
+    global _reaction_table, _compartment_names
+    _compartment_names = _model.compartments if _model else {}
+    _reaction_table = {}
+    if _model:
+        for rxn in _model.reactions:
+            _reaction_table[rxn.id] = render_reaction(rxn, _compartment_names)
+
+
+def _build_reaction_index():
+    """Build the reaction index and the static filter arrays aligned to it."""
+    global _reaction_ids, _reaction_index, _search_text
+    global _subsystem_names, _subsystem_codes, _compartment_masks, _flux_vector
+    
+    reactions = list(_model.reactions) if _model else []
+    n = len(reactions)
+    
+    _reaction_ids = [rxn.id for rxn in reactions]
+    _reaction_index = {rxn_id: i for i, rxn_id in enumerate(_reaction_ids)}
+    _search_text = [
+        f"{rxn.id} {rxn.name} {rxn.gene_reaction_rule}".lower() for rxn in reactions
+    ]
+    
+    codes = {}
+    _subsystem_codes = np.empty(n, dtype=np.int32)
+    for i, rxn in enumerate(reactions):
+        _subsystem_codes[i] = codes.setdefault(rxn.subsystem or '', len(codes))
+    _subsystem_names = list(codes)
+    
+    _compartment_masks = {}
+    for i, rxn_id in enumerate(_reaction_ids):
+        for comp in _reaction_table[rxn_id]['compartments']:
+            if comp not in _compartment_masks:
+                _compartment_masks[comp] = np.zeros(n, dtype=bool)
+            _compartment_masks[comp][i] = True
+    
+    _flux_vector = None
+
+
 def build_metabolite_reaction_info(rxn, selected_met, compartment_names=None):
     """
     Build reaction info relative to a selected metabolite.
@@ -162,7 +323,7 @@ def build_metabolite_reaction_info(rxn, selected_met, compartment_names=None):
     info = build_reaction_info(rxn, compartment_names)
     
     if compartment_names is None:
-        compartment_names = _model.compartments if _model else {}
+        compartment_names = _compartment_names
     
     # Determine description relative to selected metabolite
     is_exchange = len(rxn.metabolites) == 1
@@ -195,6 +356,17 @@ def get_model():
     return _model
 
 
+def get_reaction_compartments(rxn_id):
+    """Get compartments of a reaction, in order of first appearance."""
+    entry = _reaction_table.get(rxn_id)
+    return entry['compartments'] if entry else []
+
+
+def get_compartment_names():
+    """Get compartment ID -> name mapping of the loaded model."""
+    return _compartment_names
+
+
 def get_path():
     """Get path to loaded model."""
     return _model_path
@@ -213,34 +385,161 @@ def info():
     }
 
 
-def optimize():
-    """Run FBA optimization."""
-    global _fba_solution
+@metrics.timed('optimize')
+def optimize(mode='fba'):
+    """
+    Run FBA optimization.
+    
+    Args:
+        mode: 'fba', 'pfba', 'moma' or 'room'. MOMA/ROOM compare against the
+              reference set by set_reference (default: wild-type pFBA).
+    """
+    global _fba_solution, _flux_vector
     if _model is None:
         return None
     
-    # Reset GLPK basis to ensure consistent results
-    # (prevents warm-start from biasing toward previous solution path)
-    try:
-        import swiglpk as glpk
-        glpk.glp_std_basis(_model.solver.problem)
-    except (ImportError, AttributeError):
-        pass  # Non-GLPK solver or swiglpk not available
+    if mode in ('moma', 'room') and flux_modes.get_reference(_model) is None:
+        set_reference()
     
-    _fba_solution = _model.optimize()
+    # Solver backend, starting basis and tie-breaking follow the solver policy;
+    # a reducer (the compressed model) may answer first
+    _fba_solution = _reducer(_model, mode) if _reducer is not None else None
+    if _fba_solution is None:
+        _fba_solution = solver.solve(_model, mode)
+    _flux_vector = _fba_solution.fluxes.reindex(_reaction_ids, fill_value=0.0).to_numpy(dtype=float)
     return _fba_solution
 
 
+def set_reducer(func):
+    """
+    Route optimize through func(model, mode) first.
+    
+    func returns a cobra Solution over the model's reaction IDs, or None to
+    solve the model itself (services.compression.solve answers FBA/pFBA on
+    the compressed model).
+    """
+    global _reducer
+    _reducer = func
+
+
+def set_reference(use_current=False):
+    """
+    Set the reference flux distribution for MOMA/ROOM comparisons.
+    
+    Args:
+        use_current: Use the current solution instead of the wild type
+                     (pFBA at the model's original bounds, no constraints)
+    
+    Returns:
+        True if a reference was set
+    """
+    if _model is None:
+        return False
+    
+    if use_current:
+        if _flux_vector is None:
+            return False
+        fluxes = _flux_vector
+    else:
+        with _model:
+            reset_bounds()
+            fluxes = flux_modes.solve(_model, 'pfba').fluxes.to_numpy()
+    
+    flux_modes.set_reference(_model, fluxes)
+    return True
+
+
+def get_reference_digest():
+    """Digest of the current MOMA/ROOM reference, or None when none is set."""
+    if _model is None:
+        return None
+    return flux_modes.reference_digest(_model)
+
+
 def get_fba_solution():
     """Get current FBA solution."""
     return _fba_solution
 
 
+def restore_solution(fluxes, objective_value, status):
+    """
+    Make a previously computed solution current without solving.
+    
+    Args:
+        fluxes: Flux array aligned to get_reaction_ids()
+        objective_value: Objective value of that solution
+        status: Solver status string
+    """
+    global _fba_solution, _flux_vector
+    from cobra import Solution
+    import pandas as pd
+    
+    _flux_vector = np.asarray(fluxes, dtype=float)
+    _fba_solution = Solution(objective_value, status, fluxes=pd.Series(_flux_vector, index=_reaction_ids))
+
+
+def get_gene_info(gene_id):
+    """
+    A gene with the reactions its GPR index points to.
+    
+    Returns:
+        dict with id, name, reactions (id, name, gpr, flux) and knocked_out
+        (reactions the single-gene knockout disables), or None if not found
+    """
+    if _model is None:
+        return None
+    compiled = gpr.get_compiled(_model)
+    column = compiled['gene_index'].get(gene_id)
+    if column is None:
+        return None
+    
+    gene = _model.genes.get_by_id(gene_id)
+    reactions = _model.reactions
+    off = gpr.knocked_out(compiled, [[gene_id]])[0]
+    return {
+        'id': gene_id,
+        'name': gene.name or '',
+        'reactions': [
+            {
+                'id': reactions[i].id,
+                'name': reactions[i].name,
+                'gpr': reactions[i].gene_reaction_rule,
+                'flux': float(_flux_vector[i]) if _flux_vector is not None else None
+            }
+            for i in compiled['gene_reactions'][column]
+        ],
+        'knocked_out': [reactions[i].id for i in off]
+    }
+
+
+def get_model_hash():
+    """Hash identifying the loaded model (reaction IDs and original bounds)."""
+    return _model_hash
+
+
 def get_flux(rxn_id):
     """Get flux for a reaction from current FBA solution."""
-    if _fba_solution is None:
+    if _flux_vector is None:
         return None
-    return _fba_solution.fluxes.get(rxn_id)
+    i = _reaction_index.get(rxn_id)
+    if i is None:
+        return None
+    return float(_flux_vector[i])
+
+
+def get_flux_vector():
+    """Get current solution fluxes as an array aligned to get_reaction_ids()."""
+    return _flux_vector
+
+
+def get_reaction_ids():
+    """Get reaction IDs in model order (the index of all aligned arrays)."""
+    return _reaction_ids
+
+
+def get_reaction_index(rxn_id):
+    """Get the position of a reaction in the reaction index."""
+    return _reaction_index.get(rxn_id)
 
 
 def get_reaction(rxn_id):
@@ -263,47 +562,163 @@ def get_metabolite(met_id):
         return None
 
 
-def list_reactions(query=None, limit=50, offset=0, nonzero_flux_only=False):
-    """List reactions with optional search and flux filter."""
+def list_reactions(query=None, limit=50, offset=0, nonzero_flux_only=False,
+                   sort=None, min_flux=None, max_flux=None,
+                   compartment=None, subsystem=None, top_n=None, mask=None):
+    """
+    List reactions with optional search, filters and flux ordering.
+    
+    Filters are evaluated as boolean masks over the reaction index, and flux
+    ordering only partially sorts the rows needed for the requested page.
+    
+    Args:
+        query: Substring matched against ID, name and gene rule
+        limit, offset: Page of the (sorted) matches to return
+        nonzero_flux_only: Keep reactions with |flux| > 1e-6
+        sort: None (model order), 'abs_flux' (|flux| descending),
+              'flux' (ascending) or '-flux' (descending)
+        min_flux, max_flux: Inclusive flux range
+        compartment: Keep reactions with a metabolite in this compartment
+        subsystem: Keep reactions of this subsystem ('' for uncategorized)
+        top_n: Restrict matches to the top_n reactions by |flux|
+        mask: Optional bool array over the model's reactions to keep
+              (e.g. services.network.live_mask to hide blocked reactions)
+    
+    Returns:
+        (page of reaction dicts, total number of matches)
+    """
+    page, total, flux = _select_reactions(
+        query, limit, offset, nonzero_flux_only, sort, min_flux, max_flux, compartment, subsystem, top_n, mask
+    )
+    return [_reaction_row(i, flux) for i in page], total
+
+
+def iter_reactions(query=None, limit=None, offset=0, nonzero_flux_only=False,
+                   sort=None, min_flux=None, max_flux=None,
+                   compartment=None, subsystem=None, top_n=None, mask=None):
+    """
+    Stream reactions matching the same filters as list_reactions.
+    
+    Only the selected row indices are held; each reaction dict is built when
+    the consumer asks for it.
+    
+    Args:
+        limit: Number of rows to yield (None for every match)
+        (other arguments as in list_reactions)
+    
+    Returns:
+        (total number of matches, generator of reaction dicts)
+    """
+    page, total, flux = _select_reactions(
+        query, limit, offset, nonzero_flux_only, sort, min_flux, max_flux, compartment, subsystem, top_n, mask
+    )
+    return total, (_reaction_row(i, flux) for i in page)
+
+
+def _select_reactions(query, limit, offset, nonzero_flux_only, sort, min_flux, max_flux,
+                      compartment, subsystem, top_n, keep=None):
+    """Row indices of one page of matches, the match count and the flux vector used."""
+    none = np.zeros(0, dtype=int)
     if _model is None:
-        return [], 0
+        return none, 0, None
     
-    compartment_names = _model.compartments
+    n = len(_reaction_ids)
+    mask = np.ones(n, dtype=bool) if keep is None else np.array(keep, dtype=bool)
     
-    results = []
-    for rxn in _model.reactions:
-        if query:
-            searchable = f"{rxn.id} {rxn.name} {rxn.gene_reaction_rule}".lower()
-            if query.lower() not in searchable:
-                continue
-        
-        flux = None
-        if _fba_solution is not None:
-            flux = round(_fba_solution.fluxes.get(rxn.id, 0), 6)
-        
-        # Filter by non-zero flux if requested
-        if nonzero_flux_only:
-            if flux is None or abs(flux) <= 1e-6:
-                continue
-        
-        # Get location info
-        info = build_reaction_info(rxn, compartment_names, smart_break=False)
-        
-        results.append({
-            'id': rxn.id,
-            'name': rxn.name,
-            'equation': rxn.reaction,
-            'bounds': list(rxn.bounds),
-            'genes': rxn.gene_reaction_rule or '',
-            'subsystem': rxn.subsystem or '',
-            'flux': flux,
-            'location_type': info['location_type'],
-            'location': info['location'],
-            'compartments': list(dict.fromkeys(m.compartment for m in rxn.metabolites.keys()))
-        })
-    
-    total = len(results)
-    return results[offset:offset + limit], total
+    if query:
+        q = query.lower()
+        mask &= np.fromiter((q in text for text in _search_text), dtype=bool, count=n)
+    
+    if compartment:
+        comp_mask = _compartment_masks.get(compartment)
+        if comp_mask is None:
+            return none, 0, None
+        mask &= comp_mask
+    
+    if subsystem is not None:
+        if subsystem not in _subsystem_names:
+            return none, 0, None
+        mask &= _subsystem_codes == _subsystem_names.index(subsystem)
+    
+    flux = _flux_vector
+    if flux is None:
+        # Flux filters can't match anything without a solution
+        if nonzero_flux_only or min_flux is not None or max_flux is not None:
+            return none, 0, None
+        flux = np.zeros(n)
+    
+    if nonzero_flux_only:
+        mask &= np.abs(flux) > 1e-6
+    if min_flux is not None:
+        mask &= flux >= min_flux
+    if max_flux is not None:
+        mask &= flux <= max_flux
+    
+    idx = np.flatnonzero(mask)
+    
+    if top_n is not None:
+        if top_n <= 0:
+            return none, 0, None
+        if top_n < len(idx):
+            idx = np.sort(idx[_smallest(-np.abs(flux[idx]), top_n)])
+        if sort is None:
+            sort = 'abs_flux'
+    
+    total = len(idx)
+    if limit is None:
+        limit = total
+    
+    if sort in ('abs_flux', 'flux', '-flux'):
+        keys = {
+            'abs_flux': lambda: -np.abs(flux[idx]),
+            'flux': lambda: flux[idx],
+            '-flux': lambda: -flux[idx]
+        }[sort]()
+        page = _partial_sort(idx, keys, offset, limit)
+    else:
+        page = idx[offset:offset + limit]
+    
+    return page, total, flux
+
+
+def _partial_sort(idx, keys, offset, limit):
+    """Order idx by keys (model order breaks ties), sorting only up to the page end."""
+    end = min(offset + limit, len(idx))
+    if end <= offset:
+        return idx[:0]
+    head = _smallest(keys, end)
+    head = head[np.lexsort((idx[head], keys[head]))]
+    return idx[head[offset:end]]
+
+
+def _smallest(keys, k):
+    """Positions of the k smallest keys; of keys tied at the cut, the earliest positions are kept."""
+    if k >= len(keys):
+        return np.arange(len(keys))
+    kth = np.partition(keys, k - 1)[k - 1]
+    below = np.flatnonzero(keys < kth)
+    tied = np.flatnonzero(keys == kth)[:k - len(below)]
+    return np.concatenate([below, tied])
+
+
+def _reaction_row(i, flux):
+    """Build one reaction listing row from the reaction index."""
+    rxn_id = _reaction_ids[i]
+    rxn = _reaction_table[rxn_id]['reaction']
+    info = build_reaction_info(rxn, smart_break=False)
+    
+    return {
+        'id': rxn.id,
+        'name': rxn.name,
+        'equation': info['equation_raw'],
+        'bounds': list(rxn.bounds),
+        'genes': rxn.gene_reaction_rule or '',
+        'subsystem': rxn.subsystem or '',
+        'flux': round(float(flux[i]), 6) if _flux_vector is not None else None,
+        'location_type': info['location_type'],
+        'location': info['location'],
+        'compartments': list(get_reaction_compartments(rxn.id))
+    }
 
 
 def list_subsystems():
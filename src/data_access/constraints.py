@@ -1,25 +1,180 @@
-"""Constraint management for FBA conditions."""
+"""
+Constraint management for FBA conditions.
 
-from . import annotations
+Constraints are compiled into a plan when they are added, toggled or
+swapped: each target is resolved to a reaction index once (exchange
+constraints through their metabolite), and the enabled constraints become
+index and (lb, ub) arrays. Applying the plan is a single vectorized bound
+write over the model's original bounds. Bad targets or bounds raise at add
+time when a model is given.
 
-# Active constraints (in-memory, could persist to JSON later)
+Gene constraints are knockouts: the enabled ones are evaluated together
+through the compiled GPRs (data_access.gpr), so isozymes only go when all
+of them are knocked out, and every reaction whose rule turns off is fixed
+to zero on top of the other constraints.
+"""
+
+import json
+import os
+
+import numpy as np
+
+import metrics
+
+from . import annotations, cobra_model, gpr, thermo
+
+PRESETS_PATH = os.path.join(os.path.dirname(__file__), '../../data/presets.json')
+
+# Active constraints (in-memory; named sets persist in the scenario store)
 _constraints = {}
 
+CONSTRAINT_TYPES = ('reaction', 'exchange', 'gene')
+
+_preset_definitions = {}  # presets file path -> (mtime, definitions)
+_preset_cache = {}  # 'key' (model, thermo version, presets file) and resolved 'presets'
+
+# Per-reaction bound multipliers applied to the original bounds before the
+# constraints, one set per source: 'accessibility' (E-Flux) and 'context'
+# (a context-specific model). NaN leaves a reaction alone; where several
+# sources scale the same reaction, their multipliers multiply.
+BOUND_SCALE_SOURCES = ('accessibility', 'context')
+_bound_scales = {}  # source -> {'scale', 'label', 'reaction_ids'}
+
+# Compiled plan: resolved targets per constraint and the arrays built from them
+_plan = {
+    'model': None,  # Model the targets were resolved against
+    'resolved': {},  # constraint ID -> {'index', 'reaction', 'lb', 'ub'}, {'gene'} or {'error'}
+    'knocked_out': [],  # Reaction IDs disabled by the enabled gene constraints
+    'indices': np.zeros(0, dtype=int),
+    'lower': np.zeros(0),
+    'upper': np.zeros(0)
+}
+
+
+def _parse_bounds(bounds):
+    """(lb, ub) floats from a single fixed value or a pair; raises ValueError."""
+    if isinstance(bounds, (int, float)) and not isinstance(bounds, bool):
+        lb = ub = float(bounds)
+    else:
+        try:
+            lb, ub = (float(b) for b in bounds)
+        except (TypeError, ValueError):
+            raise ValueError(f'Bounds must be a number or a (lower, upper) pair, got {bounds!r}')
+    if lb > ub:
+        raise ValueError(f'Lower bound {lb} is greater than upper bound {ub}')
+    return lb, ub
+
 
-def add(constraint_id, constraint_type, target_id, bounds, label=None, bound_type=None, target_info=None):
+def resolve(model, constraint):
+    """
+    Resolve a constraint to the reaction whose bounds it sets.
+    
+    Returns:
+        dict with index (position in model.reactions), reaction ID, lb, ub;
+        for a gene knockout, {'gene': gene ID} (its reactions depend on the
+        other knockouts and are worked out when the plan is rebuilt)
+    
+    Raises:
+        ValueError if the target cannot be found or the bounds are invalid
+    """
+    if constraint['type'] not in CONSTRAINT_TYPES:
+        raise ValueError(f"Unknown constraint type {constraint['type']!r}")
+    lb, ub = _parse_bounds(constraint['bounds'])
+    target = constraint['target']
+    
+    if constraint['type'] == 'gene':
+        if (lb, ub) != (0.0, 0.0):
+            raise ValueError(f'Gene constraints are knockouts; bounds must be 0, got {constraint["bounds"]!r}')
+        gpr.gene_columns(gpr.get_compiled(model), [target])
+        return {'gene': target}
+    
+    if target in model.reactions:
+        rxn = model.reactions.get_by_id(target)
+    elif constraint['type'] == 'exchange' and target in model.metabolites:
+        # Metabolite ID: constrain its (first) exchange reaction
+        exchange_rxns = annotations.find_exchange_reaction(model, model.metabolites.get_by_id(target))
+        if not exchange_rxns:
+            raise ValueError(f'No exchange reaction for {target}')
+        rxn = exchange_rxns[0]
+    elif constraint['type'] == 'exchange':
+        raise ValueError(f'No exchange reaction for {target}')
+    else:
+        raise ValueError(f'Reaction {target} not found')
+    
+    return {'index': model.reactions.index(rxn), 'reaction': rxn.id, 'lb': lb, 'ub': ub}
+
+
+def _resolve_or_error(model, constraint):
+    try:
+        return resolve(model, constraint)
+    except ValueError as e:
+        return {'error': str(e)}
+
+
+def _rebuild_arrays():
+    """
+    Plan arrays from the resolved, enabled constraints.
+    
+    Later constraints win on a shared reaction; gene knockouts win over all.
+    """
+    bounds = {}
+    knockouts = []
+    for cid, c in _constraints.items():
+        entry = _plan['resolved'].get(cid)
+        if not c['enabled'] or entry is None or 'error' in entry:
+            continue
+        if 'gene' in entry:
+            knockouts.append(entry['gene'])
+        else:
+            bounds[entry['index']] = (entry['lb'], entry['ub'])
+    
+    _plan['knocked_out'] = []
+    if knockouts and _plan['model'] is not None:
+        model = _plan['model']
+        off = gpr.knocked_out(gpr.get_compiled(model), [knockouts])[0]
+        for i in off:
+            bounds[int(i)] = (0.0, 0.0)
+        _plan['knocked_out'] = [model.reactions[int(i)].id for i in off]
+    _plan['indices'] = np.fromiter(bounds.keys(), dtype=int, count=len(bounds))
+    _plan['lower'] = np.array([lb for lb, _ in bounds.values()], dtype=float)
+    _plan['upper'] = np.array([ub for _, ub in bounds.values()], dtype=float)
+
+
+def compile_plan(model):
+    """Resolve every constraint against a model and rebuild the plan arrays."""
+    _plan['model'] = model
+    _plan['resolved'] = {cid: _resolve_or_error(model, c) for cid, c in _constraints.items()}
+    _rebuild_arrays()
+    return _plan
+
+
+def get_plan(model):
+    """The compiled plan for a model, recompiling if it was built for another one."""
+    if _plan['model'] is not model:
+        compile_plan(model)
+    return _plan
+
+
+def add(constraint_id, constraint_type, target_id, bounds, label=None, bound_type=None, target_info=None,
+        model=None):
     """
     Add a constraint.
     
     Args:
         constraint_id: Unique ID for this constraint
-        constraint_type: 'reaction' or 'exchange' (metabolite)
-        target_id: Reaction ID or metabolite ID
+        constraint_type: 'reaction', 'exchange' (metabolite) or 'gene' (knockout, bounds 0)
+        target_id: Reaction ID, metabolite ID or gene ID
         bounds: Tuple (lower, upper) or single value for fixed
         label: Human-readable label
         bound_type: 'fixed', 'max', 'min', or 'range' (for editing)
         target_info: Original target info dict (for editing)
+        model: COBRA model to resolve the target against now; without it
+               the target is resolved when the plan is next applied
+    
+    Raises:
+        ValueError if the bounds are invalid or the target is not in the model
     """
-    _constraints[constraint_id] = {
+    constraint = {
         'type': constraint_type,
         'target': target_id,
         'bounds': bounds,
@@ -28,12 +183,27 @@ def add(constraint_id, constraint_type, target_id, bounds, label=None, bound_typ
         'boundType': bound_type,
         'targetInfo': target_info
     }
+    if constraint_type not in CONSTRAINT_TYPES:
+        raise ValueError(f'Unknown constraint type {constraint_type!r}')
+    _parse_bounds(bounds)
+    
+    if model is not None:
+        if _plan['model'] is not model:
+            compile_plan(model)
+        _plan['resolved'][constraint_id] = resolve(model, constraint)
+    elif _plan['model'] is not None:
+        _plan['resolved'][constraint_id] = _resolve_or_error(_plan['model'], constraint)
+    
+    _constraints[constraint_id] = constraint
+    _rebuild_arrays()
 
 
 def remove(constraint_id):
     """Remove a constraint."""
     if constraint_id in _constraints:
         del _constraints[constraint_id]
+        _plan['resolved'].pop(constraint_id, None)
+        _rebuild_arrays()
         return True
     return False
 
@@ -45,6 +215,7 @@ def toggle(constraint_id, enabled=None):
             _constraints[constraint_id]['enabled'] = not _constraints[constraint_id]['enabled']
         else:
             _constraints[constraint_id]['enabled'] = enabled
+        _rebuild_arrays()
         return True
     return False
 
@@ -67,60 +238,163 @@ def get_enabled():
 def clear():
     """Clear all constraints."""
     _constraints.clear()
+    _plan['resolved'] = {}
+    _rebuild_arrays()
+
+
+def replace(new_constraints, model=None):
+    """
+    Swap in a whole constraint set at once (scenario activation).
+    
+    Every entry is validated (and resolved, if a model is given) before
+    anything changes, so on error the current set is left untouched.
+    
+    Args:
+        new_constraints: {constraint_id: constraint dict} as from list_all()
+        model: COBRA model to resolve the targets against
+    """
+    global _constraints
+    swapped = {}
+    for cid, c in new_constraints.items():
+        if c.get('type') not in CONSTRAINT_TYPES:
+            raise ValueError(f"Constraint {cid}: unknown type {c.get('type')!r}")
+        if not c.get('target') or c.get('bounds') is None:
+            raise ValueError(f"Constraint {cid}: target and bounds are required")
+        swapped[cid] = {
+            'type': c['type'],
+            'target': c['target'],
+            'bounds': c['bounds'],
+            'label': c.get('label') or cid,
+            'enabled': c.get('enabled', True),
+            'boundType': c.get('boundType'),
+            'targetInfo': c.get('targetInfo')
+        }
+    
+    resolved = {}
+    if model is not None:
+        for cid, c in swapped.items():
+            try:
+                resolved[cid] = resolve(model, c)
+            except ValueError as e:
+                raise ValueError(f'Constraint {cid}: {e}')
+    
+    _constraints = swapped
+    if model is not None:
+        _plan['model'] = model
+        _plan['resolved'] = resolved
+        _rebuild_arrays()
+    elif _plan['model'] is not None:
+        compile_plan(_plan['model'])
+
+
+def set_bound_scale(source, scale, label=None, reaction_ids=None):
+    """
+    Scale the original bounds of every reaction before constraints apply.
+    
+    Args:
+        source: 'accessibility' or 'context'; each source has its own
+                multipliers, so setting one leaves the other in place
+        scale: Multipliers aligned to the model's reactions (NaN = unscaled),
+               or None to remove this source's scaling
+        label: Where the multipliers came from, for display
+        reaction_ids: Reaction order of scale, checked against the model
+    """
+    if source not in BOUND_SCALE_SOURCES:
+        raise ValueError(f"Unknown bound scale source: {source}")
+    if scale is None:
+        _bound_scales.pop(source, None)
+        return
+    _bound_scales[source] = {
+        'scale': np.asarray(scale, dtype=float),
+        'label': label,
+        'reaction_ids': list(reaction_ids) if reaction_ids is not None else None
+    }
+
+
+def get_bound_scale():
+    """Active bound scaling: {'label', 'scaled_reactions', 'sources'}, or None."""
+    if not _bound_scales:
+        return None
+    combined = _combined_scale(len(cobra_model.get_reaction_ids() or []))
+    return {
+        'label': '; '.join(s['label'] or source for source, s in _bound_scales.items()),
+        'scaled_reactions': int((~np.isnan(combined)).sum()),
+        'sources': {
+            source: {'label': s['label'], 'scaled_reactions': int((~np.isnan(s['scale'])).sum())}
+            for source, s in _bound_scales.items()
+        }
+    }
+
+
+def _combined_scale(n):
+    """Product of the sources' multipliers that fit the loaded model's n reactions (NaN = unscaled)."""
+    combined = np.full(n, np.nan)
+    for s in _bound_scales.values():
+        scale, ids = s['scale'], s['reaction_ids']
+        if len(scale) != n or (ids is not None and ids != cobra_model.get_reaction_ids()):
+            continue
+        combined = np.where(np.isnan(combined), scale, np.where(np.isnan(scale), combined, combined * scale))
+    return combined
+
+
+def _scaled(lower, upper):
+    """Original bounds times the bound scale, where one is set for this model."""
+    if not _bound_scales:
+        return lower, upper
+    scale = _combined_scale(len(lower))
+    mask = ~np.isnan(scale)
+    lower[mask] *= scale[mask]
+    upper[mask] *= scale[mask]
+    return lower, upper
 
 
-def apply_to_model(model):
+@metrics.timed('constraints.apply')
+def apply_to_model(model, original_bounds=None):
     """
-    Apply all enabled constraints to a COBRA model.
+    Set the model to its original bounds with all enabled constraints applied.
+    
+    One vectorized write: the plan's bounds are laid over the original
+    bounds (times the bound scale, if set) and only reactions whose bounds
+    change are touched.
+    
+    Args:
+        model: The loaded model, or a copy of it (worker models)
+        original_bounds: (lower, upper) to start from, e.g. captured when a
+                         model that isn't a copy of the loaded one was
+                         made; by default the loaded model's original bounds
+    
     Returns dict of {constraint_id: success/error}
     """
-    results = {}
+    plan = get_plan(model)
+    
+    copy_of_loaded = (model is cobra_model.get_model()
+                      or [rxn.id for rxn in model.reactions] == cobra_model.get_reaction_ids())
+    if original_bounds is not None:
+        lower, upper = (np.array(bounds, dtype=float) for bounds in original_bounds)
+    else:
+        lower, upper = cobra_model.get_original_bounds()
+        if lower is None or not copy_of_loaded:
+            raise ValueError("Original bounds of this model are unknown; pass original_bounds")
+        lower, upper = lower.copy(), upper.copy()
+    if copy_of_loaded:
+        lower, upper = _scaled(lower, upper)
+    lower[plan['indices']] = plan['lower']
+    upper[plan['indices']] = plan['upper']
+    cobra_model.write_bounds(lower, upper, model)
     
+    results = {}
     for cid, constraint in _constraints.items():
         if not constraint['enabled']:
             continue
-            
-        try:
-            if constraint['type'] == 'reaction':
-                rxn = model.reactions.get_by_id(constraint['target'])
-                bounds = constraint['bounds']
-                if isinstance(bounds, (int, float)):
-                    rxn.bounds = (bounds, bounds)
-                else:
-                    rxn.bounds = tuple(bounds)
-                results[cid] = {'success': True}
-                
-            elif constraint['type'] == 'exchange':
-                # Find exchange reaction for this metabolite
-                met_id = constraint['target']
-                exchange_rxn = None
-                
-                # Target might be reaction ID directly (from selection)
-                try:
-                    exchange_rxn = model.reactions.get_by_id(met_id)
-                except KeyError:
-                    # Or it might be metabolite ID - find its exchange
-                    try:
-                        met = model.metabolites.get_by_id(met_id)
-                        exchange_rxns = annotations.find_exchange_reaction(model, met)
-                        if exchange_rxns:
-                            exchange_rxn = exchange_rxns[0]  # Use first if multiple
-                    except KeyError:
-                        pass
-                
-                if exchange_rxn:
-                    bounds = constraint['bounds']
-                    if isinstance(bounds, (int, float)):
-                        exchange_rxn.bounds = (bounds, bounds)
-                    else:
-                        exchange_rxn.bounds = tuple(bounds)
-                    results[cid] = {'success': True, 'reaction': exchange_rxn.id}
-                else:
-                    results[cid] = {'success': False, 'error': f'No exchange reaction for {met_id}'}
-                    
-        except Exception as e:
-            results[cid] = {'success': False, 'error': str(e)}
-    
+        entry = plan['resolved'][cid]
+        if 'error' in entry:
+            results[cid] = {'success': False, 'error': entry['error']}
+        elif constraint['type'] == 'exchange':
+            results[cid] = {'success': True, 'reaction': entry['reaction']}
+        elif constraint['type'] == 'gene':
+            results[cid] = {'success': True, 'knocked_out': plan['knocked_out']}
+        else:
+            results[cid] = {'success': True}
     return results
 
 
@@ -140,7 +414,11 @@ def build_preset_from_query(model, name, metabolite_query, bounds, bound_descrip
         dict with constraint info, or None if not found
     """
     result = annotations.find_exchange_by_query(model, metabolite_query)
-    
+    return _preset_from_result(name, metabolite_query, result, bounds, bound_description)
+
+
+def _preset_from_result(name, metabolite_query, result, bounds, bound_description):
+    """Preset constraint from a find_exchange_by_query result, or None."""
     if not result['exchanges']:
         return None
     
@@ -162,47 +440,71 @@ def build_preset_from_query(model, name, metabolite_query, bounds, bound_descrip
     }
 
 
+def load_preset_definitions(path=None):
+    """
+    Preset definitions from data/presets.json (re-read when the file changes).
+    
+    Returns:
+        List of dicts with name, label, description, queries (tried in
+        order), bounds and bound_description
+    """
+    path = path or PRESETS_PATH
+    mtime = os.path.getmtime(path)
+    cached = _preset_definitions.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            definitions = json.load(f)['presets']
+        for definition in definitions:
+            definition['bounds'] = tuple(definition['bounds'])
+        _preset_definitions[path] = cached = (mtime, definitions)
+    return cached[1]
+
+
 def get_available_presets(model):
     """
     Get available presets for a model by querying annotations.
     Data-driven: discovers what's possible rather than assuming.
+    
+    Resolution is memoized per model, thermo cache version and presets
+    file; all preset queries share one scan of the thermo compound cache.
+    The exchange bounds shown in derived_from are refreshed on every call.
     """
-    preset_definitions = [
-        {
-            'name': 'anaerobic',
-            'label': 'Anaerobic',
-            'description': 'No oxygen uptake',
-            'queries': ['C00007', 'oxygen', 'O2'],  # Try multiple identifiers
-            'bounds': (0, 0),
-            'bound_description': '= 0'
-        },
-        {
-            'name': 'glucose_limited',
-            'label': 'Glucose limited',
-            'description': 'Restrict glucose uptake',
-            'queries': ['C00031', 'glucose', 'D-glucose'],
-            'bounds': (-1, 0),
-            'bound_description': '≤ 1 mmol/gDW/h'
-        },
-        {
-            'name': 'no_ethanol',
-            'label': 'No ethanol',
-            'description': 'Block ethanol production',
-            'queries': ['C00469', 'ethanol'],
-            'bounds': (0, 0),
-            'bound_description': '= 0'
-        }
-    ]
+    key = (id(model), cobra_model.get_model_hash() if model is cobra_model.get_model() else None,
+           thermo.version(), os.path.getmtime(PRESETS_PATH))
+    if _preset_cache.get('key') != key:
+        _preset_cache['key'] = key
+        _preset_cache['presets'] = _discover_presets(model, load_preset_definitions())
+    
+    available = {}
+    for name, preset in _preset_cache['presets'].items():
+        constraint = dict(preset['constraint'])
+        derived = dict(constraint['derived_from'])
+        derived['all_exchanges'] = [
+            {**exchange, 'bounds': list(model.reactions.get_by_id(exchange['id']).bounds)}
+            for exchange in derived['all_exchanges']
+        ]
+        derived['exchange_reaction'] = derived['all_exchanges'][0]
+        constraint['derived_from'] = derived
+        available[name] = {**preset, 'constraint': constraint}
+    return available
+
+
+def _discover_presets(model, preset_definitions):
+    """Resolve preset definitions against a model (the uncached part of get_available_presets)."""
+    queries = list(dict.fromkeys(q for d in preset_definitions for q in d['queries']))
+    from_thermo = annotations.find_metabolites_batch(model, queries)
     
     available = {}
     
     for preset_def in preset_definitions:
         # Try each query until one works
         for query in preset_def['queries']:
-            constraint = build_preset_from_query(
-                model,
+            # Model-wide search only for queries the thermo cache doesn't know
+            metabolites = from_thermo[query] or annotations.find_metabolite(model, query)
+            constraint = _preset_from_result(
                 preset_def['name'],
                 query,
+                annotations.exchanges_for_metabolites(model, query, metabolites),
                 preset_def['bounds'],
                 preset_def['bound_description']
             )
@@ -236,7 +538,8 @@ def apply_preset(model, preset_name):
         constraint['type'],
         constraint['target'],
         constraint['bounds'],
-        constraint['label']
+        constraint['label'],
+        model=model
     )
     
     return {
@@ -0,0 +1,380 @@
+"""
+Flux comparison modes on one persistent solver template.
+
+Modes:
+    fba   - plain FBA (non-unique flux vector)
+    pfba  - parsimonious FBA: minimize total flux at the optimal objective,
+            ties broken by a fixed order of the reactions and the optimum
+            settled in exact arithmetic (GLPK)
+    moma  - linear MOMA: minimize sum |v - v_ref|
+    room  - linear ROOM: minimize the (relaxed) number of reactions whose
+            flux leaves the v_ref +/- (delta*|v_ref| + epsilon) band
+
+cobra's pfba/moma/room add their variables and constraints inside a model
+context and remove them again, rebuilding the LP on every call. Here they
+are added, on first use, to a private copy of the model that lives as long
+as the loaded model. Switching modes swaps the objective coefficients in
+place and frees the rows of the inactive modes (free rows cost the simplex
+far less than vacuous bounded ones), so each solve reuses the same LP and
+starts from its previous basis.
+"""
+
+import hashlib
+
+import numpy as np
+
+MODES = ('fba', 'pfba', 'moma', 'room')
+
+MAX_TEMPLATES = 2  # The loaded model and its compressed copy
+
+# pFBA cost spread: flux variable k of n costs 1 + TIE_BREAK * k / n, so
+# equally short flux vectors no longer tie and the optimum is one point.
+# Total flux can exceed its minimum by at most this fraction.
+TIE_BREAK = 1e-4
+
+_templates = {}  # id(source model) -> template
+
+
+def _build_template(model):
+    """Copy the model and add the pFBA objective floor."""
+    from cobra.util.solver import linear_reaction_coefficients
+    
+    tmodel = model.copy()
+    prob = tmodel.problem
+    reactions = list(tmodel.reactions)
+    flux_variables = [v for rxn in reactions for v in (rxn.forward_variable, rxn.reverse_variable)]
+    
+    model_objective = {}
+    for rxn, coef in linear_reaction_coefficients(tmodel).items():
+        model_objective[rxn.forward_variable] = coef
+        model_objective[rxn.reverse_variable] = -coef
+    
+    # Holds the objective at its optimum while pFBA minimizes total flux
+    floor = prob.Constraint(tmodel.solver.objective.expression, name='mode_objective_floor')
+    tmodel.add_cons_vars([floor], sloppy=True)
+    
+    # Largest bound magnitude: ROOM rows use it as big-M, so a relaxed
+    # reaction can take any flux the conditions allow
+    big_m = max([abs(b) for rxn in reactions for b in rxn.bounds if np.isfinite(b)] + [1000.0])
+    
+    return {
+        'source': model,
+        'model': tmodel,
+        'reactions': reactions,
+        'direction': tmodel.solver.objective.direction,
+        'model_objective': model_objective,
+        'big_m': big_m,
+        'floor': floor,
+        'objectives': {
+            'fba': model_objective,
+            'pfba': {
+                v: 1.0 + TIE_BREAK * k / len(flux_variables) for k, v in enumerate(flux_variables)
+            }
+        },
+        'active': 'fba',
+        'structures': {},  # 'moma'/'room' -> (variables, upper rows, lower rows)
+        'loaded': {},  # 'moma'/'room' -> reference version written into its rows
+        'bases': {},  # mode -> its last GLPK basis
+        'lower_bounds': np.array([rxn.lower_bound for rxn in reactions]),
+        'upper_bounds': np.array([rxn.upper_bound for rxn in reactions]),
+        'reference': None,
+        'reference_version': 0,
+        'band': (0.03, 0.001)
+    }
+
+
+def _add_structure(template, mode):
+    """
+    Add the MOMA distance or ROOM indicator variables and rows (once).
+    
+    Per reaction, MOMA:  v - d <= w          and  v + d >= w
+                  ROOM:  v - y(M - w_u) <= w_u  and  v - y(-M - w_l) >= w_l
+    Rows are created empty and filled after they are added to the solver;
+    building thousands of symbolic expressions is far slower.
+    """
+    from optlang.symbolics import Zero
+    
+    tmodel = template['model']
+    prob = tmodel.problem
+    ub = 1 if mode == 'room' else None
+    
+    variables, upper, lower = [], [], []
+    for rxn in template['reactions']:
+        variables.append(prob.Variable(f'mode_{mode}_var_{rxn.id}', lb=0, ub=ub))
+        upper.append(prob.Constraint(Zero, name=f'mode_{mode}_upper_{rxn.id}'))
+        lower.append(prob.Constraint(Zero, name=f'mode_{mode}_lower_{rxn.id}'))
+    tmodel.add_cons_vars(variables + upper + lower, sloppy=True)
+    
+    for rxn, var, up, low in zip(template['reactions'], variables, upper, lower):
+        fwd, rev = rxn.forward_variable, rxn.reverse_variable
+        up.set_linear_coefficients({fwd: 1, rev: -1, var: -1})
+        low.set_linear_coefficients({fwd: 1, rev: -1, var: 1})
+    
+    template['structures'][mode] = (variables, upper, lower)
+    template['objectives'][mode] = {var: 1.0 for var in variables}
+
+
+def _load_reference(template, mode):
+    """Write the reference fluxes into the rows of a mode."""
+    variables, upper, lower = template['structures'][mode]
+    w = template['reference']
+    
+    if mode == 'moma':
+        for i in range(len(w)):
+            upper[i].ub = w[i]
+            lower[i].lb = w[i]
+    else:
+        delta, epsilon = template['band']
+        band = delta * np.abs(w) + epsilon
+        w_u, w_l = w + band, w - band
+        big_m = template['big_m']
+        for i in range(len(w)):
+            # y = 0 keeps v within [w_l, w_u]; y = 1 relaxes it to [-M, M]
+            upper[i].set_linear_coefficients({variables[i]: -(big_m - w_u[i])})
+            upper[i].ub = w_u[i]
+            lower[i].set_linear_coefficients({variables[i]: -(-big_m - w_l[i])})
+            lower[i].lb = w_l[i]
+    
+    template['loaded'][mode] = template['reference_version']
+
+
+def _free_rows(template, mode):
+    """Drop the bounds of a mode's rows, taking them out of the LP."""
+    variables, upper, lower = template['structures'][mode]
+    for row in upper:
+        row.ub = None
+    for row in lower:
+        row.lb = None
+    del template['loaded'][mode]
+
+
+def _activate(template, mode):
+    """Make a mode's objective and rows the live ones in the template."""
+    if mode in ('moma', 'room'):
+        if mode not in template['structures']:
+            _add_structure(template, mode)
+        if template['loaded'].get(mode) != template['reference_version']:
+            _load_reference(template, mode)
+    for other in list(template['loaded']):
+        if other != mode:
+            _free_rows(template, other)
+    
+    if template['active'] != mode:
+        tmodel = template['model']
+        _stash_basis(template)
+        coefficients = {var: 0 for var in template['objectives'][template['active']]}
+        coefficients.update(template['objectives'][mode])
+        tmodel.solver.objective.set_linear_coefficients(coefficients)
+        tmodel.solver.objective.direction = template['direction'] if mode == 'fba' else 'min'
+        template['active'] = mode
+        _restore_basis(template)
+
+
+def _is_glpk(tmodel):
+    return tmodel.solver.interface.__name__.endswith('glpk_interface')
+
+
+def _stash_basis(template):
+    """Keep the final basis of the active mode for when it is next solved (GLPK)."""
+    tmodel = template['model']
+    if not _is_glpk(tmodel):
+        return
+    import swiglpk as glpk
+    problem = tmodel.solver.problem
+    template['bases'][template['active']] = (
+        [glpk.glp_get_row_stat(problem, i) for i in range(1, glpk.glp_get_num_rows(problem) + 1)],
+        [glpk.glp_get_col_stat(problem, j) for j in range(1, glpk.glp_get_num_cols(problem) + 1)]
+    )
+
+
+def _restore_basis(template):
+    """Start the active mode from its own last basis (GLPK)."""
+    tmodel = template['model']
+    basis = template['bases'].get(template['active'])
+    if basis is None or not _is_glpk(tmodel):
+        return
+    import swiglpk as glpk
+    problem = tmodel.solver.problem
+    rows, cols = basis
+    n_rows, n_cols = glpk.glp_get_num_rows(problem), glpk.glp_get_num_cols(problem)
+    if len(rows) > n_rows or len(cols) > n_cols:
+        return
+    # Rows and columns added since (another mode's structure) enter as
+    # basic rows and nonbasic columns at their lower bound of 0
+    rows = rows + [glpk.GLP_BS] * (n_rows - len(rows))
+    cols = cols + [glpk.GLP_NL] * (n_cols - len(cols))
+    for i, stat in enumerate(rows, 1):
+        glpk.glp_set_row_stat(problem, i, stat)
+    for j, stat in enumerate(cols, 1):
+        glpk.glp_set_col_stat(problem, j, stat)
+
+
+def _restart_from_standard_basis(tmodel):
+    """
+    Reset a GLPK basis after a spurious infeasible status.
+    
+    GLPK's simplex can declare the pFBA floor infeasible when it starts from
+    a MOMA/ROOM basis whose rows have since been freed; the same LP solves
+    from the standard basis.
+    """
+    if not _is_glpk(tmodel):
+        return False
+    import swiglpk as glpk
+    glpk.glp_std_basis(tmodel.solver.problem)
+    return True
+
+
+def _polish_exact(tmodel):
+    """
+    Re-solve the LP in exact arithmetic from its final basis (GLPK).
+    
+    The floating-point simplex stops at any vertex within its tolerances,
+    so which one depends on where it started; the tie-broken pFBA optimum
+    is a single point, and glp_exact reaches that point from any basis.
+    """
+    if not _is_glpk(tmodel):
+        return False
+    import swiglpk as glpk
+    parm = glpk.glp_smcp()
+    glpk.glp_init_smcp(parm)
+    parm.msg_lev = glpk.GLP_MSG_OFF
+    problem = tmodel.solver.problem
+    return glpk.glp_exact(problem, parm) == 0 and glpk.glp_get_status(problem) == glpk.GLP_OPT
+
+
+def _set_floor(template, bound, slack=0.0):
+    """Hold the model objective at a bound (less slack) in the template."""
+    if template['direction'] == 'max':
+        template['floor'].lb = bound - slack
+    else:
+        template['floor'].ub = bound + slack
+
+
+def get_template(model):
+    """Get the solver template for a model, building it on first use."""
+    template = _templates.get(id(model))
+    if template is None or template['source'] is not model \
+            or type(template['model'].solver) is not type(model.solver):
+        _templates.pop(id(model), None)
+        while len(_templates) >= MAX_TEMPLATES:
+            _templates.pop(next(iter(_templates)))
+        template = _templates[id(model)] = _build_template(model)
+    return template
+
+
+def sync_bounds(model):
+    """Copy the model's current bounds to its template, touching only changed reactions."""
+    template = get_template(model)
+    lower = np.array([rxn.lower_bound for rxn in model.reactions])
+    upper = np.array([rxn.upper_bound for rxn in model.reactions])
+    changed = np.flatnonzero((lower != template['lower_bounds']) | (upper != template['upper_bounds']))
+    for i in changed:
+        template['reactions'][i].bounds = (lower[i], upper[i])
+    template['lower_bounds'] = lower
+    template['upper_bounds'] = upper
+    return template
+
+
+def set_reference(model, fluxes, delta=0.03, epsilon=0.001):
+    """
+    Set the reference flux vector (aligned to model.reactions) for MOMA/ROOM.
+    
+    ROOM's tolerance band is w +/- (delta*|w| + epsilon). The rows of each
+    mode are rewritten the next time that mode is solved.
+    """
+    template = get_template(model)
+    template['reference'] = np.asarray(fluxes, dtype=float)
+    template['band'] = (delta, epsilon)
+    template['reference_version'] += 1
+    return template
+
+
+def get_reference(model):
+    """Get the reference flux vector of the model's template, if set."""
+    template = _templates.get(id(model))
+    if template is None or template['source'] is not model:
+        return None
+    return template['reference']
+
+
+def reference_digest(model):
+    """Digest of the MOMA/ROOM reference (fluxes and ROOM band), or None when none is set."""
+    reference = get_reference(model)
+    if reference is None:
+        return None
+    digest = hashlib.sha1(np.ascontiguousarray(reference, dtype='<f8').tobytes())
+    digest.update(repr(_templates[id(model)]['band']).encode())
+    return digest.hexdigest()[:16]
+
+
+def prepare(model, mode):
+    """
+    Sync the model's bounds to its template and switch the template to a mode.
+    
+    Called by solve; callers that set their own starting basis (the solver
+    policy) call it first, so the mode switch doesn't overwrite that basis.
+    
+    Returns:
+        The template dict; template['model'] is the LP that will be solved
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown optimization mode: {mode}")
+    
+    template = sync_bounds(model)
+    if mode in ('moma', 'room') and template['reference'] is None:
+        raise ValueError(f"{mode.upper()} needs a reference flux distribution")
+    _activate(template, mode)
+    return template
+
+
+def solve(model, mode='fba', fraction_of_optimum=1.0):
+    """
+    Solve the model in one of the comparison modes.
+    
+    The model's current bounds are synced to the template first. The
+    optimum that pFBA holds fixed comes from the model itself, so the
+    template never re-solves plain FBA. MOMA and ROOM need a reference
+    set with set_reference.
+    
+    Returns:
+        cobra Solution with objective_value set to the model's own objective;
+        the mode's objective is attached as solution.mode_objective (for
+        pFBA the total flux, without the tie-break costs)
+    """
+    from cobra.core import get_solution
+    
+    if mode == 'pfba':
+        optimum = model.slim_optimize(error_value=float('nan'))
+        if np.isnan(optimum):
+            # Infeasible/unbounded: report the plain FBA result
+            mode = 'fba'
+    
+    template = prepare(model, mode)
+    tmodel = template['model']
+    floor = template['floor']
+    if mode == 'pfba':
+        # The model's optimum can sit a solver tolerance above what the
+        # template reaches; a floor pinned to it stalls GLPK on numerical
+        # instability from some start bases, so relax it up front
+        bound = optimum * fraction_of_optimum
+        _set_floor(template, bound, tmodel.tolerance * max(1.0, abs(bound)))
+    
+    try:
+        tmodel.slim_optimize(error_value=float('nan'))
+        if tmodel.solver.status == 'infeasible' and _restart_from_standard_basis(tmodel):
+            tmodel.slim_optimize(error_value=float('nan'))
+        if tmodel.solver.status == 'optimal' and mode == 'pfba':
+            _polish_exact(tmodel)
+        solution = get_solution(tmodel, reactions=template['reactions'])
+    finally:
+        floor.lb = None
+        floor.ub = None
+    
+    solution.mode_objective = solution.objective_value
+    if solution.status == 'optimal':
+        if mode == 'pfba':
+            solution.mode_objective = float(np.abs(solution.fluxes.values).sum())
+        solution.objective_value = float(sum(
+            coef * var.primal for var, coef in template['model_objective'].items()
+        ))
+    return solution
@@ -0,0 +1,246 @@
+"""
+Gene-protein-reaction rules compiled for numeric evaluation.
+
+Every reaction's rule is compiled once, at model load, from cobra's GPR
+syntax tree into a flat program over a samples x genes matrix:
+    AND (enzyme complex: every subunit is needed) -> min
+    OR  (isozymes: any one suffices)              -> sum
+Identical sub-expressions are shared, and nodes are ordered by depth so
+each level is one gather plus one np.minimum/np.add.reduceat over all
+reactions at once, instead of one Python walk per reaction and sample.
+With 0/1 gene values the same program answers knockouts (a rule is off
+when it evaluates to 0). A gene -> reaction index is built alongside.
+
+Usage:
+    from data_access import gpr
+    
+    compiled = gpr.get_compiled(model)
+    # matrix: samples x len(compiled['genes'])
+    scores = gpr.reaction_scores(compiled, matrix)  # samples x reactions, NaN without a rule
+    off = gpr.knocked_out(compiled, [['YAL012W'], ['YGR192C', 'YJR009C']])
+"""
+
+import ast
+
+import numpy as np
+
+import metrics
+
+_compiled = {'model': None}
+
+
+def compile_rule(body, gene_index):
+    """
+    Compile a GPR syntax tree (cobra's rxn.gpr.body) to nested tuples.
+    
+    Returns:
+        int (gene column), ('and' | 'or', children), or None for an empty
+        rule or one naming no known gene
+    """
+    if body is None:
+        return None
+    if isinstance(body, ast.Expression):
+        return compile_rule(body.body, gene_index)
+    if isinstance(body, ast.Name):
+        return gene_index.get(body.id)
+    if isinstance(body, ast.BoolOp):
+        op = 'and' if isinstance(body.op, ast.And) else 'or'
+        children = [c for c in (compile_rule(v, gene_index) for v in body.values) if c is not None]
+        if not children:
+            return None
+        if len(children) == 1:
+            return children[0]
+        return (op, children)
+    raise ValueError(f'Unsupported GPR node: {ast.dump(body)}')
+
+
+def _rule_genes(rule, out):
+    """Collect the gene columns a compiled rule mentions."""
+    if isinstance(rule, int):
+        out.add(rule)
+    else:
+        for child in rule[1]:
+            _rule_genes(child, out)
+    return out
+
+
+def _build_program(rules, n_genes):
+    """
+    Flatten nested-tuple rules into level-ordered reduce steps.
+    
+    Value columns 0..n_genes-1 are the genes; internal nodes follow,
+    numbered so every step (one depth, one operator) writes a contiguous
+    block that only reads columns written before it.
+    
+    Returns:
+        (steps, n_nodes, reaction_nodes) - reaction_nodes is the value
+        column of each reaction's rule, -1 without a rule
+    """
+    nodes = {}  # (op, child keys) -> (temporary id, depth)
+    
+    def visit(rule):
+        if isinstance(rule, int):
+            return ('gene', rule), 0
+        # A gene or sub-expression listed twice under one node counts once
+        children = dict(visit(child) for child in rule[1])
+        if len(children) == 1:
+            return next(iter(children.items()))
+        key = (rule[0], tuple(sorted(children)))
+        if key not in nodes:
+            nodes[key] = (len(nodes), 1 + max(children.values()))
+        return key, nodes[key][1]
+    
+    roots = [visit(rule)[0] if rule is not None else None for rule in rules]
+    
+    # Renumber internal nodes by (depth, op) so each step is a contiguous block
+    order = sorted(nodes, key=lambda key: (nodes[key][1], key[0]))
+    column = {key: n_genes + i for i, key in enumerate(order)}
+    
+    def col(key):
+        return key[1] if key[0] == 'gene' else column[key]
+    
+    steps = []
+    i = 0
+    while i < len(order):
+        depth, op = nodes[order[i]][1], order[i][0]
+        j = i
+        while j < len(order) and nodes[order[j]][1] == depth and order[j][0] == op:
+            j += 1
+        children = [[col(child) for child in key[1]] for key in order[i:j]]
+        steps.append({
+            'reduce': np.minimum if op == 'and' else np.add,
+            'start': n_genes + i,
+            'stop': n_genes + j,
+            'gather': np.fromiter((c for group in children for c in group), dtype=np.intp),
+            'offsets': np.cumsum([0] + [len(group) for group in children[:-1]], dtype=np.intp)
+        })
+        i = j
+    
+    reaction_nodes = np.array([col(key) if key is not None else -1 for key in roots], dtype=np.intp)
+    return steps, n_genes + len(order), reaction_nodes
+
+
+@metrics.timed('gpr.compile')
+def compile_model(model):
+    """
+    Compile every reaction's GPR and index genes to reactions.
+    
+    Returns:
+        dict with genes (gene IDs, the matrix column order), gene_index
+        (gene ID -> column), reaction_nodes (program column per reaction,
+        -1 without a rule), has_rule (bool per reaction), gene_reactions
+        (reaction positions per gene column), reaction_genes (gene columns
+        per reaction) and the program (steps, n_nodes)
+    """
+    genes = [g.id for g in model.genes]
+    gene_index = {g: i for i, g in enumerate(genes)}
+    rules = [compile_rule(rxn.gpr.body, gene_index) for rxn in model.reactions]
+    steps, n_nodes, reaction_nodes = _build_program(rules, len(genes))
+    
+    reaction_genes = [sorted(_rule_genes(rule, set())) if rule is not None else [] for rule in rules]
+    gene_reactions = [[] for _ in genes]
+    for j, columns in enumerate(reaction_genes):
+        for g in columns:
+            gene_reactions[g].append(j)
+    
+    return {
+        'genes': genes,
+        'gene_index': gene_index,
+        'reaction_nodes': reaction_nodes,
+        'has_rule': reaction_nodes >= 0,
+        'gene_reactions': [np.array(r, dtype=np.intp) for r in gene_reactions],
+        'reaction_genes': reaction_genes,
+        'steps': steps,
+        'n_nodes': n_nodes
+    }
+
+
+def get_compiled(model):
+    """Compiled rules for a model (compiled at load; compiles here for other models)."""
+    global _compiled
+    if _compiled['model'] is not model:
+        _compiled = {'model': model, **compile_model(model)}
+    return _compiled
+
+
+def evaluate(compiled, matrix):
+    """
+    Run the program over a samples x genes matrix.
+    
+    Returns:
+        samples x reactions array; NaN for reactions without a rule
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    n_genes = len(compiled['genes'])
+    if matrix.shape[1] != n_genes:
+        raise ValueError(f'Expected {n_genes} gene columns, got {matrix.shape[1]}')
+    if compiled['n_nodes'] == 0:
+        return np.full((matrix.shape[0], len(compiled['reaction_nodes'])), np.nan)
+    
+    values = np.empty((matrix.shape[0], compiled['n_nodes']))
+    values[:, :n_genes] = matrix
+    for step in compiled['steps']:
+        values[:, step['start']:step['stop']] = step['reduce'].reduceat(
+            values[:, step['gather']], step['offsets'], axis=1
+        )
+    
+    nodes = compiled['reaction_nodes']
+    scores = values[:, np.maximum(nodes, 0)]
+    scores[:, ~compiled['has_rule']] = np.nan
+    return scores
+
+
+def reaction_scores(compiled, matrix):
+    """
+    Aggregate gene values to reactions (AND -> min, OR -> sum).
+    
+    Args:
+        compiled: Result of compile_model / get_compiled
+        matrix: samples x genes array, columns in compiled['genes'] order
+    
+    Returns:
+        samples x reactions array; NaN for reactions without a rule
+    """
+    return evaluate(compiled, matrix)
+
+
+def gene_columns(compiled, gene_ids):
+    """Matrix columns of gene IDs; raises ValueError for unknown genes."""
+    index = compiled['gene_index']
+    missing = [g for g in gene_ids if g not in index]
+    if missing:
+        raise ValueError(f"Gene(s) not in model: {', '.join(missing)}")
+    return [index[g] for g in gene_ids]
+
+
+def reactions_for_genes(compiled, gene_ids):
+    """Positions of the reactions whose rules mention any of the genes."""
+    columns = gene_columns(compiled, gene_ids)
+    if not columns:
+        return np.zeros(0, dtype=np.intp)
+    return np.unique(np.concatenate([compiled['gene_reactions'][c] for c in columns]))
+
+
+def knocked_out(compiled, gene_sets):
+    """
+    Reactions disabled by each gene knockout set, all sets in one evaluation.
+    
+    Args:
+        compiled: Result of compile_model / get_compiled
+        gene_sets: Iterable of gene ID lists, one knockout set each
+    
+    Returns:
+        List (one per set) of reaction position arrays whose rule is off
+    """
+    gene_sets = [list(genes) for genes in gene_sets]
+    if not gene_sets:
+        return []
+    matrix = np.ones((len(gene_sets), len(compiled['genes'])))
+    for i, genes in enumerate(gene_sets):
+        matrix[i, gene_columns(compiled, genes)] = 0.0
+    # Only reactions mentioning a knocked gene can turn off
+    candidates = reactions_for_genes(compiled, sorted({g for genes in gene_sets for g in genes}))
+    off = evaluate(compiled, matrix)[:, candidates] <= 0
+    return [candidates[row] for row in off]
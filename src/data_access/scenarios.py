@@ -0,0 +1,280 @@
+"""
+Scenario store: named, versioned constraint sets in SQLite.
+
+Saving a name again adds a new version (unless the constraint set is
+identical to the latest one); old versions stay readable. Each version can
+carry cached FBA solutions, keyed by the model hash, the solve mode and the
+solver policy, so activating a scenario that was solved before restores its
+fluxes without touching the solver.
+
+Tables:
+    scenarios  (name, created, updated)
+    versions   (name, version, digest, constraints JSON, note, created)
+    solutions  (name, version, model_hash, mode, policy, status,
+                objective_value, mode_objective, fluxes float64 blob, created)
+
+Usage:
+    from data_access import scenarios
+    
+    version = scenarios.save('anaerobic_glc', constraints.list_all())
+    scenario = scenarios.get('anaerobic_glc')           # latest version
+    constraints.replace(scenario['constraints'])
+    scenarios.mark_active(scenario)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '../../data/scenarios.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    name TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT NOT NULL REFERENCES scenarios(name) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    constraints TEXT NOT NULL,
+    note TEXT,
+    created REAL NOT NULL,
+    PRIMARY KEY (name, version)
+);
+CREATE TABLE IF NOT EXISTS solutions (
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    model_hash TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    status TEXT NOT NULL,
+    objective_value REAL,
+    mode_objective REAL,
+    fluxes BLOB NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (name, version, model_hash, mode, policy),
+    FOREIGN KEY (name, version) REFERENCES versions(name, version) ON DELETE CASCADE
+);
+"""
+
+_db_path = DB_PATH
+_initialized = set()  # paths whose schema exists
+_lock = threading.Lock()
+_active = None  # {'name', 'version', 'digest'} of the last activated scenario
+
+
+def set_path(path):
+    """Use a different database file (tests, benchmarks)."""
+    global _db_path, _active
+    _db_path = path
+    _active = None
+
+
+def _connect():
+    conn = sqlite3.connect(_db_path, timeout=10)
+    conn.execute('PRAGMA foreign_keys = ON')
+    if _db_path not in _initialized:
+        with _lock:
+            os.makedirs(os.path.dirname(os.path.abspath(_db_path)), exist_ok=True)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.executescript(SCHEMA)
+            _initialized.add(_db_path)
+    return conn
+
+
+def digest(constraint_set):
+    """Stable hash of a constraint set (independent of key order)."""
+    return hashlib.sha1(json.dumps(constraint_set, sort_keys=True).encode()).hexdigest()
+
+
+def save(name, constraint_set, note=None):
+    """
+    Store a constraint set under a name as its next version.
+    
+    Args:
+        name: Scenario name
+        constraint_set: {constraint_id: constraint dict} as from constraints.list_all()
+        note: Optional free-text description of this version
+    
+    Returns:
+        (version, created) - created is False when the set equals the
+        latest version, which is returned unchanged
+    """
+    if not name:
+        raise ValueError('Scenario name required')
+    
+    set_digest = digest(constraint_set)
+    now = time.time()
+    conn = _connect()
+    try:
+        with conn:
+            row = conn.execute(
+                'SELECT version, digest FROM versions WHERE name = ? ORDER BY version DESC LIMIT 1', (name,)
+            ).fetchone()
+            if row is not None and row[1] == set_digest:
+                return row[0], False
+            
+            version = 1 if row is None else row[0] + 1
+            conn.execute(
+                'INSERT INTO scenarios (name, created, updated) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET updated = excluded.updated',
+                (name, now, now)
+            )
+            conn.execute(
+                'INSERT INTO versions (name, version, digest, constraints, note, created) VALUES (?, ?, ?, ?, ?, ?)',
+                (name, version, set_digest, json.dumps(constraint_set), note, now)
+            )
+        return version, True
+    finally:
+        conn.close()
+
+
+def list_scenarios():
+    """All scenarios with their latest version, version count and timestamps."""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            'SELECT s.name, MAX(v.version), COUNT(v.version), s.created, s.updated '
+            'FROM scenarios s JOIN versions v ON v.name = s.name '
+            'GROUP BY s.name ORDER BY s.updated DESC'
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {'name': name, 'latest_version': latest, 'versions': count, 'created': created, 'updated': updated}
+        for name, latest, count, created, updated in rows
+    ]
+
+
+def get(name, version=None):
+    """
+    Get one version of a scenario (latest if version is None).
+    
+    Returns:
+        dict with name, version, digest, constraints, note, created and the
+        list of all versions, or None if not found
+    """
+    conn = _connect()
+    try:
+        if version is None:
+            row = conn.execute(
+                'SELECT version, digest, constraints, note, created FROM versions '
+                'WHERE name = ? ORDER BY version DESC LIMIT 1', (name,)
+            ).fetchone()
+        else:
+            row = conn.execute(
+                'SELECT version, digest, constraints, note, created FROM versions '
+                'WHERE name = ? AND version = ?', (name, int(version))
+            ).fetchone()
+        if row is None:
+            return None
+        versions = conn.execute(
+            'SELECT version, note, created FROM versions WHERE name = ? ORDER BY version', (name,)
+        ).fetchall()
+    finally:
+        conn.close()
+    
+    return {
+        'name': name,
+        'version': row[0],
+        'digest': row[1],
+        'constraints': json.loads(row[2]),
+        'note': row[3],
+        'created': row[4],
+        'versions': [{'version': v, 'note': n, 'created': c} for v, n, c in versions]
+    }
+
+
+def delete(name):
+    """Delete a scenario with all its versions and cached solutions."""
+    global _active
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute('DELETE FROM solutions WHERE name = ?', (name,))
+            conn.execute('DELETE FROM versions WHERE name = ?', (name,))
+            deleted = conn.execute('DELETE FROM scenarios WHERE name = ?', (name,)).rowcount
+    finally:
+        conn.close()
+    if _active and _active['name'] == name:
+        _active = None
+    return deleted > 0
+
+
+def mark_active(scenario):
+    """Remember which scenario version the current constraint set came from."""
+    global _active
+    _active = {'name': scenario['name'], 'version': scenario['version'], 'digest': scenario['digest']}
+
+
+def get_active(constraint_set):
+    """
+    The active scenario, if the current constraints still match it.
+    
+    Returns:
+        (name, version), or None once the constraints were edited
+    """
+    if _active is None or digest(constraint_set) != _active['digest']:
+        return None
+    return _active['name'], _active['version']
+
+
+def store_solution(name, version, model_hash, mode, policy, solution, fluxes):
+    """
+    Cache a solution for a scenario version.
+    
+    Args:
+        name, version: Scenario version the solution belongs to
+        model_hash: cobra_model.get_model_hash() of the solved model
+        mode: Solve mode ('fba', 'pfba', 'moma', 'room')
+        policy: Solver policy key (backend and tie-breaking)
+        solution: cobra Solution (status, objective_value, mode_objective)
+        fluxes: Flux array aligned to the model's reaction index
+    """
+    conn = _connect()
+    try:
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO solutions (name, version, model_hash, mode, policy, status, '
+                'objective_value, mode_objective, fluxes, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    name, version, model_hash, mode, policy, solution.status,
+                    solution.objective_value, getattr(solution, 'mode_objective', None),
+                    np.ascontiguousarray(fluxes, dtype='<f8').tobytes(), time.time()
+                )
+            )
+    finally:
+        conn.close()
+
+
+def get_solution(name, version, model_hash, mode, policy):
+    """
+    Cached solution for a scenario version, or None.
+    
+    Returns:
+        dict with status, objective_value, mode_objective and fluxes (array)
+    """
+    conn = _connect()
+    try:
+        row = conn.execute(
+            'SELECT status, objective_value, mode_objective, fluxes FROM solutions '
+            'WHERE name = ? AND version = ? AND model_hash = ? AND mode = ? AND policy = ?',
+            (name, version, model_hash, mode, policy)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {
+        'status': row[0],
+        'objective_value': row[1],
+        'mode_objective': row[2],
+        'fluxes': np.frombuffer(row[3], dtype='<f8')
+    }
@@ -0,0 +1,234 @@
+"""
+Solver backend and basis policy for FBA solves.
+
+Policies:
+    solver:    any installed optlang backend ('glpk', 'highs', 'gurobi', ...)
+    basis:     'cold'   - start every solve from the standard basis (GLPK)
+               'warm'   - keep the basis of the previous solve
+               'cached' - restore the basis last seen for the same bounds
+                          fingerprint, falling back to warm (GLPK)
+    canonical: tie-break the non-unique FBA flux vector with pFBA, whose
+               costs are spread in a fixed reaction order
+               (flux_modes.TIE_BREAK) and whose optimum is settled in
+               exact arithmetic, so the reported fluxes don't depend on
+               the starting basis (GLPK)
+    compress:  answer FBA/pFBA on the compressed model when one is
+               available for the medium (services.compression)
+
+The basis policy applies to every LP a solve runs: the model itself for
+plain FBA, the flux_modes template for pFBA/MOMA/ROOM, and for pFBA also
+the model's FBA solve that sets the objective floor.
+
+Every solve is timed and recorded with the policy it ran under.
+"""
+
+import hashlib
+import time
+from collections import deque
+
+import numpy as np
+
+import metrics
+
+from . import flux_modes
+
+BASIS_POLICIES = ('cold', 'warm', 'cached')
+
+_policy = {
+    'solver': None,  # None = keep whatever the model was loaded with
+    'basis': 'warm',
+    'canonical': True,
+    'compress': True
+}
+_basis_cache = {}  # (mode, bounds fingerprint) -> (row statuses, column statuses)
+_timings = deque(maxlen=1000)
+
+
+def available_solvers():
+    """Names of installed optlang solver backends."""
+    import optlang
+    return sorted(name.lower() for name, ok in optlang.available_solvers.items() if ok)
+
+
+def solver_name(model):
+    """Name of the solver backend a model is using."""
+    return model.solver.interface.__name__.split('.')[-1].replace('_interface', '')
+
+
+def get_policy():
+    """Get the current solver policy."""
+    return dict(_policy)
+
+
+def policy_key(model):
+    """Policy settings that change the reported fluxes, as a cache key."""
+    key = f"{solver_name(model)}/{'canonical' if _policy['canonical'] else 'raw'}"
+    # pFBA results change with its tie-break costs
+    key += f'/tie={flux_modes.TIE_BREAK:g}'
+    return key + '/compressed' if _policy['compress'] else key
+
+
+def configure(model=None, solver=None, basis=None, canonical=None, compress=None):
+    """
+    Update the solver policy.
+    
+    Args:
+        model: Model to switch to the new solver backend (if solver is given)
+        solver: optlang backend name
+        basis: 'cold', 'warm' or 'cached'
+        canonical: Tie-break fluxes with pFBA
+        compress: Solve FBA/pFBA on the compressed model
+    
+    Returns:
+        The updated policy
+    """
+    if basis is not None:
+        if basis not in BASIS_POLICIES:
+            raise ValueError(f"Unknown basis policy: {basis}")
+        _policy['basis'] = basis
+    
+    if canonical is not None:
+        _policy['canonical'] = bool(canonical)
+    
+    if compress is not None:
+        _policy['compress'] = bool(compress)
+    
+    if solver is not None:
+        solver = solver.lower()
+        if solver not in available_solvers():
+            raise ValueError(f"Solver {solver} is not installed")
+        _policy['solver'] = solver
+        if model is not None:
+            apply_solver(model)
+    
+    return get_policy()
+
+
+def apply_solver(model):
+    """Switch a model to the configured solver backend, if it differs."""
+    global _basis_cache
+    if _policy['solver'] and solver_name(model) != _policy['solver']:
+        model.solver = _policy['solver']
+        _basis_cache = {}
+
+
+def bounds_fingerprint(model):
+    """Hash of all reaction bounds, identifying a constraint set."""
+    bounds = np.fromiter(
+        (b for rxn in model.reactions for b in rxn.bounds),
+        dtype=float, count=2 * len(model.reactions)
+    )
+    return hashlib.sha1(bounds.tobytes()).hexdigest()
+
+
+def _is_glpk(model):
+    return solver_name(model) == 'glpk'
+
+
+def _prepare_basis(model, fingerprint):
+    """Set the starting basis according to the basis policy."""
+    if not _is_glpk(model):
+        return False
+    
+    import swiglpk as glpk
+    problem = model.solver.problem
+    
+    if _policy['basis'] == 'cold':
+        glpk.glp_std_basis(problem)
+    elif _policy['basis'] == 'cached' and fingerprint in _basis_cache:
+        rows, cols = _basis_cache[fingerprint]
+        if len(rows) == glpk.glp_get_num_rows(problem) and len(cols) == glpk.glp_get_num_cols(problem):
+            for i, stat in enumerate(rows, 1):
+                glpk.glp_set_row_stat(problem, i, stat)
+            for j, stat in enumerate(cols, 1):
+                glpk.glp_set_col_stat(problem, j, stat)
+            return True
+    return False
+
+
+def _store_basis(model, fingerprint):
+    """Remember the final basis of a solve under its fingerprint."""
+    if _policy['basis'] != 'cached' or not _is_glpk(model):
+        return
+    
+    import swiglpk as glpk
+    problem = model.solver.problem
+    rows = [glpk.glp_get_row_stat(problem, i) for i in range(1, glpk.glp_get_num_rows(problem) + 1)]
+    cols = [glpk.glp_get_col_stat(problem, j) for j in range(1, glpk.glp_get_num_cols(problem) + 1)]
+    _basis_cache[fingerprint] = (rows, cols)
+
+
+def solve(model, mode='fba'):
+    """
+    Optimize the model under the current policy.
+    
+    Args:
+        model: COBRA model
+        mode: 'fba', 'pfba', 'moma' or 'room' (see flux_modes); with
+              canonical tie-breaking, 'fba' is answered by pFBA
+    
+    Returns:
+        cobra Solution; objective_value is always the model objective
+    """
+    apply_solver(model)
+    if mode == 'fba' and _policy['canonical']:
+        mode = 'pfba'
+    
+    start = time.perf_counter()
+    # pFBA takes its objective floor from plain FBA on the model itself, so
+    # that LP starts from the policy's basis as well as the template
+    stages = [('fba', model)] if mode in ('fba', 'pfba') else []
+    if mode != 'fba':
+        stages.append((mode, flux_modes.prepare(model, mode)['model']))
+    fingerprint = bounds_fingerprint(model) if _policy['basis'] == 'cached' else None
+    cache_hit = [_prepare_basis(lp, (stage, fingerprint)) for stage, lp in stages][-1]
+    
+    if mode == 'fba':
+        solution = model.optimize()
+    else:
+        solution = flux_modes.solve(model, mode)
+    for stage, lp in stages:
+        _store_basis(lp, (stage, fingerprint))
+    
+    _record(model, mode, time.perf_counter() - start, solution.status, cache_hit)
+    return solution
+
+
+def _record(model, mode, seconds, status, cache_hit):
+    if metrics.is_enabled():
+        metrics.record('phase', f'solve.{mode}', seconds)
+    _timings.append({
+        'solver': solver_name(model),
+        'mode': mode,
+        'basis': _policy['basis'],
+        'canonical': _policy['canonical'],
+        'cache_hit': cache_hit,
+        'status': status,
+        'seconds': seconds,
+        'timestamp': time.time()
+    })
+
+
+def timings():
+    """Recent per-solve timings, oldest first."""
+    return list(_timings)
+
+
+def timing_summary():
+    """Solve time statistics grouped by solver and policy."""
+    groups = {}
+    for t in _timings:
+        key = f"{t['solver']}/{t['basis']}/{t['mode']}"
+        groups.setdefault(key, []).append(t['seconds'])
+    
+    summary = {}
+    for key, values in groups.items():
+        arr = np.array(values)
+        summary[key] = {
+            'count': len(arr),
+            'mean_ms': round(float(arr.mean()) * 1000, 3),
+            'p50_ms': round(float(np.percentile(arr, 50)) * 1000, 3),
+            'p95_ms': round(float(np.percentile(arr, 95)) * 1000, 3),
+            'max_ms': round(float(arr.max()) * 1000, 3)
+        }
+    return summary
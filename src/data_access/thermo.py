@@ -1,17 +1,29 @@
-"""Thermodynamic data access layer."""
+"""
+Thermodynamic data access layer.
+
+The caches load on first access (or from the start-up warm-up thread), not
+at import.
+"""
 
 import json
 import os
+import threading
+
+import metrics
 
 # Module-level cache
 _reactions = {}
 _compounds = {}
+_compounds_by_met = {}  # yeast-GEM metabolite ID -> compound entry
 _loaded = False
+_version = 0  # Bumped on every load, for caches derived from the thermo data
+_load_lock = threading.Lock()
 
 
+@metrics.timed('thermo.load')
 def load(data_dir=None):
     """Load thermodynamic caches from JSON files."""
-    global _reactions, _compounds, _loaded
+    global _reactions, _compounds, _compounds_by_met, _loaded, _version
     
     if data_dir is None:
         data_dir = os.path.join(os.path.dirname(__file__), '../../data')
@@ -26,44 +38,76 @@ def load(data_dir=None):
         with open(compounds_path) as f:
             _compounds = json.load(f)
     
+    # First entry listing a metabolite wins, as in the old linear scan
+    _compounds_by_met = {}
+    for data in _compounds.values():
+        for met_id in data.get('identifiers', {}).get('yeast_gem', []):
+            _compounds_by_met.setdefault(met_id, data)
+    
+    _version += 1
     _loaded = True
 
 
+def ensure_loaded():
+    """Load the default caches unless something already loaded them."""
+    if _loaded:
+        return
+    with _load_lock:
+        if not _loaded:
+            load()
+
+
+def version():
+    """Counter that changes whenever the caches are (re)loaded."""
+    ensure_loaded()
+    return _version
+
+
 def is_loaded():
     """Check if caches are loaded."""
+    ensure_loaded()
     return _loaded and len(_reactions) > 0
 
 
 def get_reaction(rxn_id):
     """Get thermo data for a reaction."""
+    ensure_loaded()
     return _reactions.get(rxn_id)
 
 
 def get_compound(compound_id):
     """Get thermo data for a compound by cache key."""
+    ensure_loaded()
     return _compounds.get(compound_id)
 
 
 def get_compound_by_met_id(met_id):
     """Get thermo data for a compound by yeast-GEM metabolite ID."""
-    for key, data in _compounds.items():
-        if met_id in data.get('identifiers', {}).get('yeast_gem', []):
-            return data
-    return None
+    ensure_loaded()
+    return _compounds_by_met.get(met_id)
 
 
 def get_all_reactions():
     """Get full reactions cache (for client-side use)."""
+    ensure_loaded()
     return _reactions
 
 
+def iter_reactions():
+    """Stream the reactions cache as (reaction ID, thermo data) pairs."""
+    ensure_loaded()
+    return iter(_reactions.items())
+
+
 def get_all_compounds():
     """Get full compounds cache."""
+    ensure_loaded()
     return _compounds
 
 
 def stats():
     """Get cache statistics."""
+    ensure_loaded()
     return {
         'reactions_count': len(_reactions),
         'compounds_count': len(_compounds),
@@ -0,0 +1,216 @@
+"""
+On-demand statistical profiler for the live server.
+
+A sampler thread snapshots the Python stacks of the other threads every few
+milliseconds (sys._current_frames) and counts them as collapsed stacks:
+one line per distinct stack, frames joined by ';' from root to leaf,
+followed by the sample count. The output loads directly into flamegraph.pl,
+speedscope or inferno.
+
+A snapshot counts for the sampling intervals that passed since the previous
+one, not as a single sample. swiglpk holds the GIL through a whole simplex
+or branch and bound, so the sampler only runs again once the call returns.
+The solving thread is then still in the frame that made the call, and that
+stack gets the solve's time.
+
+Each stack gets a root frame naming its phase, so solver and serialization
+time group together in the flamegraph:
+    [glpk]       inside the GLPK simplex/integer solver (the native call
+                 shows as its optlang wrapper frame)
+    [solve]      in the solve path outside GLPK (cobra/optlang bookkeeping)
+    [serialize]  JSON encoding of a response
+    [request]    anything else
+
+Two modes:
+    profile(seconds)   sample every thread for N seconds
+    arm(pattern)       sample only the thread serving the next request whose
+                       path matches pattern; collected with get_result(id)
+
+Opt-in: nothing runs unless ATACFLUX_PROFILER=1 is set.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+DEFAULT_INTERVAL = 0.005
+MAX_SECONDS = 120
+MAX_DEPTH = 256
+MAX_RESULTS = 20
+
+# (filename fragment, function names or None for any, phase); walking from
+# the leaf, the first frame that matches labels the stack
+PHASE_FRAMES = (
+    (os.path.join('optlang', 'glpk_interface.py'), ('_run_glp_simplex', '_run_glp_mip'), 'glpk'),
+    ('swiglpk', None, 'glpk'),
+    (os.path.join('data_access', 'solver.py'), ('solve',), 'solve'),
+    (os.path.join('data_access', 'flux_modes.py'), ('solve',), 'solve'),
+    (os.path.join('optlang', ''), None, 'solve'),
+    (os.path.join('json', 'encoder.py'), None, 'serialize'),
+    (os.path.join('flask', 'json'), None, 'serialize'),
+)
+
+_enabled = os.environ.get('ATACFLUX_PROFILER', '').lower() in ('1', 'true', 'yes')
+_lock = threading.RLock()
+_armed = OrderedDict()  # profile id -> compiled path pattern, waiting for a request
+_results = OrderedDict()  # profile id -> result dict
+
+
+def is_enabled():
+    """Whether the profiler endpoints may run."""
+    return _enabled
+
+
+def enable(on=True):
+    """Allow or forbid profiling at runtime."""
+    global _enabled
+    _enabled = bool(on)
+
+
+def _phase(frames):
+    for frame in reversed(frames):
+        filename = frame.f_code.co_filename
+        for fragment, functions, name in PHASE_FRAMES:
+            if fragment in filename and (functions is None or frame.f_code.co_name in functions):
+                return name
+    return 'request'
+
+
+def _collapse(frame):
+    """Collapsed stack string (root first) for one thread's current frame."""
+    frames = []
+    while frame is not None and len(frames) < MAX_DEPTH:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    
+    names = [f'[{_phase(frames)}]']
+    for f in frames:
+        code = f.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        names.append(f'{module}:{code.co_name}')
+    return ';'.join(names)
+
+
+class Sampler(threading.Thread):
+    """Background thread counting the stacks of the given (or all other) threads."""
+    
+    def __init__(self, thread_ids=None, interval=DEFAULT_INTERVAL):
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0  # Sampling intervals covered, the weight of every stack counted
+        self.snapshots = 0  # Times the sampler actually ran
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        due = 0.0  # Intervals elapsed and not yet counted
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            due += (now - last) / self.interval
+            last = now
+            weight = max(1, round(due))
+            due -= weight
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                self.counts[_collapse(frame)] += weight
+            self.samples += weight
+            self.snapshots += 1
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.collapsed()
+    
+    def collapsed(self):
+        """Collapsed-stack text, heaviest stacks first."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+def profile(seconds, interval=DEFAULT_INTERVAL):
+    """
+    Sample every other thread of the process for a number of seconds.
+    
+    Returns:
+        Collapsed-stack text
+    """
+    seconds = min(float(seconds), MAX_SECONDS)
+    sampler = Sampler(interval=interval)
+    sampler.start()
+    time.sleep(seconds)
+    return sampler.stop()
+
+
+def arm(pattern, interval=DEFAULT_INTERVAL):
+    """
+    Profile the next request whose path matches a regular expression.
+    
+    Returns:
+        Profile ID to collect the result with get_result
+    """
+    profile_id = uuid.uuid4().hex[:12]
+    with _lock:
+        _armed[profile_id] = (re.compile(pattern), interval)
+        _store(profile_id, {'status': 'armed', 'pattern': pattern})
+    return profile_id
+
+
+def start_request(path):
+    """
+    Start sampling the calling thread if an armed profile matches path.
+    
+    Returns:
+        (profile id, sampler) to pass to finish_request, or None
+    """
+    if not _armed:
+        return None
+    with _lock:
+        for profile_id, (regex, interval) in _armed.items():
+            if regex.search(path):
+                del _armed[profile_id]
+                break
+        else:
+            return None
+    
+    sampler = Sampler(thread_ids=[threading.get_ident()], interval=interval)
+    sampler.start()
+    _store(profile_id, {'status': 'running', 'pattern': regex.pattern, 'path': path})
+    return profile_id, sampler
+
+
+def finish_request(handle):
+    """Stop a request profile and keep its result."""
+    profile_id, sampler = handle
+    collapsed = sampler.stop()
+    with _lock:
+        _store(profile_id, {
+            **_results.get(profile_id, {}),
+            'status': 'done',
+            'samples': sampler.samples,
+            'snapshots': sampler.snapshots,
+            'collapsed': collapsed
+        })
+
+
+def get_result(profile_id):
+    """Result of an armed profile: status, and the collapsed stacks once done."""
+    with _lock:
+        return _results.get(profile_id)
+
+
+def _store(profile_id, result):
+    with _lock:
+        _results[profile_id] = result
+        _results.move_to_end(profile_id)
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
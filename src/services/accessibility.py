@@ -0,0 +1,388 @@
+"""
+ATAC-seq accessibility ingestion and E-Flux bound scaling.
+
+Pipeline:
+    1. Promoter index: gene positions come from a GFF3/GTF annotation or a
+       6-column gene BED file. Each gene's promoter is the window
+       [TSS - upstream, TSS + downstream) on its strand. Per chromosome the
+       windows are sorted by start.
+    2. Peaks: BED or narrowPeak files (optionally gzipped) are read in
+       chunks; each chunk is matched to overlapping promoters with
+       searchsorted and its signal summed per gene. Memory is bounded by the
+       chunk size and the number of genes, not by the file length.
+    3. Reactions: gene signal aggregates through the compiled GPRs
+       (AND -> min, OR -> sum, see data_access.gpr).
+    4. E-Flux: per sample, reaction scores are divided by the largest score
+       and scale the original bounds; reactions without a GPR keep theirs.
+
+Chromosome names are compared without a leading 'chr' (chrIV == IV).
+Runs are stored in data/accessibility/<id>.npz with a JSON summary.
+
+Usage:
+    from services import accessibility
+    
+    run = accessibility.run(model, [{'name': 'wt', 'path': 'wt.narrowPeak.gz'}],
+                            'saccharomyces_cerevisiae.gff')
+    scale = accessibility.bound_scale(run['id'], 'wt', [rxn.id for rxn in model.reactions])
+    constraints.set_bound_scale('accessibility', scale, f"accessibility {run['id']}/wt")
+"""
+
+import gzip
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data_access import gpr
+
+RUNS_DIR = os.path.join(os.path.dirname(__file__), '../../data/accessibility')
+
+DEFAULT_UPSTREAM = 1000
+DEFAULT_DOWNSTREAM = 100
+DEFAULT_CHUNK_SIZE = 500000
+
+GENE_FEATURES = ('gene', 'ORF', 'transposable_element_gene', 'blocked_reading_frame')
+GENE_ATTRIBUTES = ('ID', 'Name', 'gene', 'gene_id', 'locus_tag', 'Alias')
+PEAK_SIGNAL_COLUMNS = {'.narrowpeak': 6, '.broadpeak': 6}  # signalValue; BED uses the score column
+
+
+def _normalize_chrom(name):
+    name = str(name)
+    return name[3:] if name[:3].lower() == 'chr' else name
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt')
+    return open(path)
+
+
+def _gff_attributes(text):
+    """GFF3 (key=value;...) or GTF (key "value"; ...) attributes as a dict."""
+    attributes = {}
+    for part in text.strip().strip(';').split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        if '=' in part:
+            key, value = part.split('=', 1)
+        else:
+            key, _, value = part.partition(' ')
+        attributes[key.strip()] = value.strip().strip('"')
+    return attributes
+
+
+def read_gene_positions(path, gene_ids):
+    """
+    Positions of the given genes from an annotation file.
+    
+    Args:
+        path: GFF3/GTF (.gff, .gff3, .gtf, optionally .gz) or gene BED
+              (chrom, start, end, name, score, strand)
+        gene_ids: Gene IDs to look for (e.g. the model's)
+    
+    Returns:
+        dict of gene ID -> (chrom, tss, strand), 0-based TSS
+    """
+    wanted = set(gene_ids)
+    positions = {}
+    base = path[:-3] if path.endswith('.gz') else path
+    is_bed = base.lower().endswith('.bed')
+    
+    with _open_text(path) as f:
+        for line in f:
+            if line.startswith('##FASTA'):
+                break
+            if not line.strip() or line.startswith(('#', 'track', 'browser')):
+                continue
+            fields = line.rstrip('\n').split('\t')
+            
+            if is_bed:
+                if len(fields) < 6 or fields[3] not in wanted:
+                    continue
+                chrom, start, end, name, strand = fields[0], int(fields[1]), int(fields[2]), fields[3], fields[5]
+                candidates = [name]
+            else:
+                if len(fields) < 9 or fields[2] not in GENE_FEATURES:
+                    continue
+                chrom, start, end, strand = fields[0], int(fields[3]) - 1, int(fields[4]), fields[6]
+                attributes = _gff_attributes(fields[8])
+                candidates = [attributes[k] for k in GENE_ATTRIBUTES if k in attributes]
+            
+            for gene_id in candidates:
+                if gene_id in wanted and gene_id not in positions:
+                    tss = end - 1 if strand == '-' else start
+                    positions[gene_id] = (_normalize_chrom(chrom), tss, strand)
+                    break
+    return positions
+
+
+def build_promoter_index(positions, genes, upstream=DEFAULT_UPSTREAM, downstream=DEFAULT_DOWNSTREAM):
+    """
+    Sorted promoter windows per chromosome.
+    
+    Args:
+        positions: read_gene_positions result
+        genes: Gene list defining the column order of gene signal
+        upstream, downstream: Window around the TSS, in bp, strand aware
+    
+    Returns:
+        dict with 'chroms' (chrom -> (starts, ends, gene columns), sorted by
+        start), 'max_length', 'indexed' (bool per gene: has a promoter
+        window) and 'genes_indexed'
+    """
+    by_chrom = {}
+    indexed = np.zeros(len(genes), dtype=bool)
+    for col, gene_id in enumerate(genes):
+        if gene_id not in positions:
+            continue
+        chrom, tss, strand = positions[gene_id]
+        if strand == '-':
+            start, end = tss - downstream + 1, tss + upstream + 1
+        else:
+            start, end = tss - upstream, tss + downstream
+        by_chrom.setdefault(chrom, []).append((max(0, start), end, col))
+        indexed[col] = True
+    
+    chroms = {}
+    for chrom, windows in by_chrom.items():
+        windows.sort()
+        chroms[chrom] = tuple(np.array(column) for column in zip(*windows))
+    return {
+        'chroms': chroms,
+        'max_length': upstream + downstream,
+        'indexed': indexed,
+        'genes_indexed': int(indexed.sum())
+    }
+
+
+def _peak_columns(path):
+    """(header lines to skip, number of columns) from the first lines of a peak file."""
+    skip = 0
+    with _open_text(path) as f:
+        for line in f:
+            if line.startswith(('#', 'track', 'browser')) or not line.strip():
+                skip += 1
+                continue
+            return skip, len(line.rstrip('\n').split('\t'))
+    return skip, 0
+
+
+def iter_peak_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, signal_column=None):
+    """
+    Stream a BED/narrowPeak file as (chroms, starts, ends, signal) chunks.
+    
+    The signal is narrowPeak's signalValue, a BED file's score column, or 1
+    per peak for 3-column BED; signal_column (0-based) overrides.
+    """
+    import pandas as pd
+    
+    skip, n_columns = _peak_columns(path)
+    if n_columns < 3:
+        return
+    if signal_column is None:
+        base = path[:-3] if path.endswith('.gz') else path
+        signal_column = PEAK_SIGNAL_COLUMNS.get(os.path.splitext(base)[1].lower())
+        if signal_column is None and n_columns >= 5:
+            signal_column = 4
+    usecols = [0, 1, 2] + ([signal_column] if signal_column is not None else [])
+    
+    reader = pd.read_csv(
+        path, sep='\t', header=None, skiprows=skip, usecols=usecols, chunksize=chunk_size,
+        dtype={0: str, 1: np.int64, 2: np.int64}, compression='infer', comment='#', na_values=['.']
+    )
+    for chunk in reader:
+        if signal_column is None:
+            signal = np.ones(len(chunk))
+        else:
+            # A '.' score counts as 1, like a 3-column BED
+            signal = np.nan_to_num(chunk[signal_column].to_numpy(dtype=float), nan=1.0)
+        yield chunk[0].to_numpy(), chunk[1].to_numpy(), chunk[2].to_numpy(), signal
+
+
+def _add_overlaps(totals, window_index, max_length, starts, ends, signal):
+    """
+    Add each peak's signal to every promoter it overlaps (one chromosome).
+    
+    Returns:
+        Number of peaks overlapping at least one promoter
+    """
+    w_starts, w_ends, w_genes = window_index
+    # Windows overlapping [s, e) start in (s - max_length, e)
+    lo = np.searchsorted(w_starts, starts - max_length, side='right')
+    hi = np.searchsorted(w_starts, ends, side='left')
+    any_hit = np.zeros(len(starts), dtype=bool)
+    for k in range(int((hi - lo).max(initial=0))):
+        candidate = lo + k
+        valid = np.flatnonzero(candidate < hi)
+        windows = candidate[valid]
+        hit = w_ends[windows] > starts[valid]
+        np.add.at(totals, w_genes[windows[hit]], signal[valid[hit]])
+        any_hit[valid[hit]] = True
+    return int(any_hit.sum())
+
+
+def gene_signal(path, index, n_genes, chunk_size=DEFAULT_CHUNK_SIZE, signal_column=None):
+    """
+    Total peak signal over each gene's promoter for one peak file.
+    
+    Returns:
+        (signal per gene, NaN for genes without a promoter window; peaks
+        read, peaks overlapping a promoter)
+    """
+    # Genes missing from the annotation have no data, which is not the same as closed chromatin
+    totals = np.full(n_genes, np.nan)
+    totals[index['indexed']] = 0.0
+    peaks = 0
+    matched = 0
+    normalized = {}  # raw chromosome name -> index key or None
+    for chroms, starts, ends, signal in iter_peak_chunks(path, chunk_size, signal_column):
+        peaks += len(starts)
+        for raw in np.unique(chroms):
+            if raw not in normalized:
+                key = _normalize_chrom(raw)
+                normalized[raw] = key if key in index['chroms'] else None
+            key = normalized[raw]
+            if key is None:
+                continue
+            rows = np.flatnonzero(chroms == raw)
+            matched += _add_overlaps(totals, index['chroms'][key], index['max_length'],
+                                     starts[rows], ends[rows], signal[rows])
+    return totals, peaks, matched
+
+
+def _sample_signal(args):
+    name, path, index, n_genes, chunk_size, signal_column = args
+    start = time.perf_counter()
+    totals, peaks, matched = gene_signal(path, index, n_genes, chunk_size, signal_column)
+    return name, totals, {'peaks': peaks, 'promoter_peaks': matched, 'seconds': time.perf_counter() - start}
+
+
+def ingest(samples, annotation, genes, upstream=DEFAULT_UPSTREAM, downstream=DEFAULT_DOWNSTREAM,
+           chunk_size=DEFAULT_CHUNK_SIZE, processes=1, signal_column=None):
+    """
+    Promoter accessibility per gene for a batch of samples.
+    
+    Args:
+        samples: List of {'name', 'path'} peak files
+        annotation: Gene annotation file (see read_gene_positions)
+        genes: Gene IDs, the column order of the result
+        processes: Samples read in parallel worker processes
+    
+    Returns:
+        dict with samples (names), genes, signal (samples x genes),
+        per-sample stats and genes_indexed
+    """
+    positions = read_gene_positions(annotation, genes)
+    index = build_promoter_index(positions, genes, upstream, downstream)
+    tasks = [(s['name'], s['path'], index, len(genes), chunk_size, signal_column) for s in samples]
+    
+    if processes > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(min(processes, len(tasks))) as pool:
+            results = list(pool.map(_sample_signal, tasks))
+    else:
+        results = [_sample_signal(task) for task in tasks]
+    
+    return {
+        'samples': [name for name, _, _ in results],
+        'genes': list(genes),
+        'signal': np.vstack([totals for _, totals, _ in results]) if results else np.zeros((0, len(genes))),
+        'stats': {name: stats for name, _, stats in results},
+        'genes_indexed': index['genes_indexed']
+    }
+
+
+def eflux_scale(scores, min_scale=0.0):
+    """
+    E-Flux bound multipliers from reaction scores (samples x reactions).
+    
+    Each sample's scores are divided by its largest score; reactions without
+    a GPR or with a gene outside the annotation (NaN) stay NaN, meaning
+    "leave the bounds alone".
+    """
+    scores = np.asarray(scores, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        top = np.nanmax(np.where(np.isnan(scores), -np.inf, scores), axis=1, keepdims=True)
+        scale = np.where(top > 0, scores / top, 0.0)
+    scale = np.where(np.isnan(scores), np.nan, np.clip(scale, min_scale, 1.0))
+    return scale
+
+
+def run(model, samples, annotation, upstream=DEFAULT_UPSTREAM, downstream=DEFAULT_DOWNSTREAM,
+        chunk_size=DEFAULT_CHUNK_SIZE, processes=1, signal_column=None, output_dir=None):
+    """
+    Ingest peak files, aggregate to reactions and store the run.
+    
+    Returns:
+        Summary dict (id, samples, per-sample stats, gene and reaction coverage)
+    """
+    output_dir = output_dir or RUNS_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    run_id = uuid.uuid4().hex[:12]
+    
+    start = time.perf_counter()
+    compiled = gpr.get_compiled(model)
+    result = ingest(samples, annotation, compiled['genes'], upstream, downstream,
+                    chunk_size, processes, signal_column)
+    scores = gpr.reaction_scores(compiled, result['signal'])
+    
+    np.savez_compressed(
+        os.path.join(output_dir, f'{run_id}.npz'),
+        samples=np.array(result['samples']),
+        genes=np.array(result['genes']),
+        gene_signal=result['signal'],
+        reaction_ids=np.array([rxn.id for rxn in model.reactions]),
+        reaction_scores=scores
+    )
+    summary = {
+        'id': run_id,
+        'annotation': annotation,
+        'samples': result['samples'],
+        'stats': result['stats'],
+        'upstream': upstream,
+        'downstream': downstream,
+        'genes': len(result['genes']),
+        'genes_indexed': result['genes_indexed'],
+        'genes_with_signal': {
+            name: int((row > 0).sum()) for name, row in zip(result['samples'], result['signal'])
+        },
+        'reactions_with_rule': int(compiled['has_rule'].sum()),
+        'seconds': time.perf_counter() - start
+    }
+    with open(os.path.join(output_dir, f'{run_id}.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def load_summary(run_id, output_dir=None):
+    """Stored summary of a previous run, or None."""
+    path = os.path.join(output_dir or RUNS_DIR, f'{os.path.basename(run_id)}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_run(run_id, output_dir=None):
+    """Arrays of a previous run (samples, genes, gene_signal, reaction_ids, reaction_scores)."""
+    path = os.path.join(output_dir or RUNS_DIR, f'{os.path.basename(run_id)}.npz')
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def bound_scale(run_id, sample, reaction_ids, min_scale=0.0, output_dir=None):
+    """
+    E-Flux multipliers of one sample, aligned to reaction_ids.
+    
+    Reactions missing from the run or without a GPR get NaN (unscaled).
+    """
+    data = load_run(run_id, output_dir)
+    samples = list(data['samples'])
+    if sample not in samples:
+        raise ValueError(f'Sample {sample} not in run {run_id}')
+    scale = eflux_scale(data['reaction_scores'][[samples.index(sample)]], min_scale)[0]
+    position = {rxn_id: i for i, rxn_id in enumerate(data['reaction_ids'])}
+    return np.array([scale[position[r]] if r in position else np.nan for r in reaction_ids])
@@ -0,0 +1,445 @@
+"""
+Lossless network compression: a reduced model that solves like the full one.
+
+Three steps on the model's stoichiometry, for the medium of a cached
+network analysis (see services.network):
+    1. Blocked reactions are removed.
+    2. Linear chains are merged: a metabolite touched by exactly two
+       reactions fixes their flux ratio at steady state, so they become one
+       reaction and the metabolite disappears. Repeated until no such
+       metabolite is left.
+    3. Fully coupled sets are lumped: reactions whose rows in the nullspace
+       of the chain-merged matrix are proportional carry proportional flux
+       in every steady state.
+Each reduced reaction u_g stands for its members v_j = f_j·u_g and is scaled
+so that Σ|f_j| = 1: total flux (the pFBA objective) is the same in both
+models. Bounds of a reduced reaction are the intersection of its members'
+bounds divided by f_j, so any constraint on the full model carries over.
+
+FBA and pFBA (cobra_model.optimize, through set_reducer), FVA and sampling
+run on the reduced model and expand back to the original reaction IDs.
+MOMA and ROOM compare per-reaction fluxes and keep using the full model.
+
+Usage:
+    from services import compression
+    
+    reduced = compression.prepare(model)  # None: use the full model
+    fluxes = compression.expand(reduced, reduced_fluxes)
+"""
+
+import time
+from collections import defaultdict
+
+import numpy as np
+
+import metrics
+from data_access import cobra_model, solver
+from . import network
+
+COEF_TOLERANCE = 1e-9  # Coefficients below this (relative) cancel when merging
+COUPLING_DECIMALS = 9  # Nullspace rows equal to this many decimals are coupled
+BOUND_TOLERANCE = 1e-9
+
+_reduced = {'key': None}
+
+
+def _merge(groups, a, b, ratio):
+    """Fold group b into group a with u_b = ratio·u_a (columns, members and directions)."""
+    ga, gb = groups[a], groups.pop(b)
+    column = dict(ga['column'])
+    for met, coef in gb['column'].items():
+        column[met] = column.get(met, 0.0) + ratio * coef
+    scale = max([abs(c) for c in ga['column'].values()] + [1.0])
+    ga['column'] = {met: coef for met, coef in column.items() if abs(coef) > COEF_TOLERANCE * scale}
+    ga['members'].extend((j, ratio * f) for j, f in gb['members'])
+    forward = ga['forward'] and (gb['forward'] if ratio > 0 else gb['reverse'])
+    reverse = ga['reverse'] and (gb['reverse'] if ratio > 0 else gb['forward'])
+    ga['forward'], ga['reverse'] = forward, reverse
+    return gb
+
+
+def _merge_chains(groups):
+    """Merge reactions through metabolites that only two reactions touch."""
+    touching = defaultdict(set)
+    for g, group in groups.items():
+        for met in group['column']:
+            touching[met].add(g)
+    queue = [met for met, gs in touching.items() if len(gs) <= 2]
+    merged = 0
+    while queue:
+        met = queue.pop()
+        gs = touching.get(met)
+        if not gs or len(gs) > 2:
+            continue
+        if len(gs) == 1:
+            # Only one reaction left on it: that reaction cannot carry flux
+            g = gs.pop()
+            for other in groups.pop(g)['column']:
+                touching[other].discard(g)
+                queue.append(other)
+            continue
+        a, b = sorted(gs)
+        ratio = -groups[a]['column'][met] / groups[b]['column'][met]
+        old_a = set(groups[a]['column'])
+        gb = _merge(groups, a, b, ratio)
+        merged += 1
+        for other in gb['column']:
+            touching[other].discard(b)
+        for other in old_a | set(gb['column']):
+            if other in groups[a]['column']:
+                touching[other].add(a)
+            else:
+                touching[other].discard(a)
+            if len(touching[other]) <= 2:
+                queue.append(other)
+        if not (groups[a]['forward'] or groups[a]['reverse']):
+            for other in groups.pop(a)['column']:
+                touching[other].discard(a)
+                queue.append(other)
+    return merged
+
+
+def _lump_coupled(groups):
+    """Lump groups whose nullspace rows are proportional."""
+    order = sorted(groups)
+    mets = sorted({met for g in order for met in groups[g]['column']})
+    if not order or not mets:
+        return 0
+    met_pos = {met: i for i, met in enumerate(mets)}
+    matrix = np.zeros((len(mets), len(order)))
+    for k, g in enumerate(order):
+        for met, coef in groups[g]['column'].items():
+            matrix[met_pos[met], k] = coef
+    
+    _, singular, vt = np.linalg.svd(matrix)
+    tolerance = max(matrix.shape) * np.finfo(float).eps * (singular[0] if len(singular) else 0.0)
+    rank = int((singular > tolerance).sum())
+    kernel = vt[rank:].T
+    if kernel.shape[1] == 0:
+        return 0
+    
+    norms = np.linalg.norm(kernel, axis=1)
+    lumped = 0
+    seen = {}
+    for k, g in enumerate(order):
+        if norms[k] < COEF_TOLERANCE:
+            continue
+        row = kernel[k] / norms[k]
+        lead = row[np.flatnonzero(np.abs(row) > 10 ** -COUPLING_DECIMALS)[0]]
+        signature = np.round(row * np.sign(lead), COUPLING_DECIMALS).tobytes()
+        if signature not in seen:
+            seen[signature] = k
+            continue
+        first = seen[signature]
+        ratio = float(kernel[k] @ kernel[first] / (kernel[first] @ kernel[first]))
+        _merge(groups, order[first], g, ratio)
+        lumped += 1
+    return lumped
+
+
+@metrics.timed('compression.build')
+def build(model, analysis):
+    """
+    Reduce a model for the medium of a network analysis.
+    
+    Args:
+        model: COBRA model (the one the analysis was computed for)
+        analysis: network.get_analysis result
+    
+    Returns:
+        dict with model (reduced cobra Model), key, member_index /
+        member_group / member_factor (v[member_index] = member_factor ·
+        u[member_group]), blocked, reaction_ids (original) and stats
+    """
+    import cobra
+    
+    start = time.perf_counter()
+    s = network.stoichiometry(model)
+    met_ids = s['met_ids']
+    blocked = np.asarray(analysis['blocked'], dtype=bool)
+    groups = {}
+    for j in np.flatnonzero(~blocked).tolist():
+        k = slice(s['indptr'][j], s['indptr'][j + 1])
+        groups[j] = {
+            'column': {met_ids[i]: c for i, c in zip(s['rows'][k].tolist(), s['coefs'][k].tolist())},
+            'members': [(j, 1.0)],
+            'forward': bool(analysis['can_forward'][j]),
+            'reverse': bool(analysis['can_reverse'][j])
+        }
+    
+    merged = _merge_chains(groups)
+    after_chains = len(groups)
+    lumped = _lump_coupled(groups)
+    
+    # Scale to Σ|f_j| = 1 with the first member running forward
+    order = sorted(groups)
+    for g in order:
+        group = groups[g]
+        weight = sum(abs(f) for _, f in group['members'])
+        if group['members'][0][1] < 0:
+            weight = -weight
+            group['forward'], group['reverse'] = group['reverse'], group['forward']
+        group['members'] = [(j, f / weight) for j, f in group['members']]
+        group['column'] = {met: c / weight for met, c in group['column'].items()}
+    
+    member_index, member_group, member_factor = [], [], []
+    for k, g in enumerate(order):
+        for j, f in groups[g]['members']:
+            member_index.append(j)
+            member_group.append(k)
+            member_factor.append(f)
+    member_index = np.array(member_index, dtype=np.intp)
+    member_group = np.array(member_group, dtype=np.intp)
+    member_factor = np.array(member_factor, dtype=float)
+    
+    # The reduced cobra model, with the objective carried over
+    reduced = cobra.Model(f'{model.id}_reduced')
+    metabolites = {}
+    for g in order:
+        for met_id in groups[g]['column']:
+            if met_id not in metabolites:
+                met = model.metabolites.get_by_id(met_id)
+                metabolites[met_id] = cobra.Metabolite(met_id, compartment=met.compartment)
+    reactions = []
+    rxn_ids = s['reaction_ids']
+    for g in order:
+        members = groups[g]['members']
+        rxn = cobra.Reaction(rxn_ids[members[0][0]] if len(members) == 1
+                             else f'{rxn_ids[members[0][0]]}+{len(members) - 1}')
+        rxn.bounds = (-1000.0 if groups[g]['reverse'] else 0.0, 1000.0 if groups[g]['forward'] else 0.0)
+        rxn.add_metabolites({metabolites[m]: c for m, c in groups[g]['column'].items()})
+        reactions.append(rxn)
+    reduced.add_reactions(reactions)
+    
+    from cobra.util.solver import linear_reaction_coefficients
+    objective = np.zeros(len(rxn_ids))
+    for rxn, coef in linear_reaction_coefficients(model).items():
+        objective[s['reaction_ids'].index(rxn.id)] = coef
+    coefficients = np.bincount(member_group, member_factor * objective[member_index], minlength=len(order))
+    reduced.objective = {reactions[k]: float(c) for k, c in enumerate(coefficients) if c != 0}
+    reduced.objective_direction = model.objective_direction
+    solver.apply_solver(reduced)
+    
+    return {
+        'key': analysis['key'],
+        'model': reduced,
+        'reaction_ids': list(rxn_ids),
+        'member_index': member_index,
+        'member_group': member_group,
+        'member_factor': member_factor,
+        'blocked': blocked,
+        'bounds': None,
+        'stats': {
+            'reactions': len(rxn_ids),
+            'metabolites': len(met_ids),
+            'blocked_removed': int(blocked.sum()),
+            'chain_merges': merged,
+            'after_chains': after_chains,
+            'coupled_lumps': lumped,
+            'reduced_reactions': len(reactions),
+            'reduced_metabolites': len(reduced.metabolites),
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+    }
+
+
+def get_reduced(model=None, compute=False):
+    """
+    Reduced model for the model's current medium, built once per network analysis.
+    
+    Args:
+        model: COBRA model (default: the loaded one)
+        compute: Run the network analysis if it is not cached; otherwise
+                 return None until it is
+    
+    Returns:
+        build() result, or None
+    """
+    global _reduced
+    model = model or cobra_model.get_model()
+    if model is None:
+        return None
+    analysis = network.get_analysis(model, compute=compute)
+    if analysis is None:
+        return None
+    if _reduced['key'] != analysis['key'] or _reduced.get('source') is not model:
+        _reduced = {'key': analysis['key'], 'source': model, 'result': build(model, analysis)}
+    return _reduced['result']
+
+
+def sync_bounds(reduced, model):
+    """
+    Bring the reduced model's bounds to the model's current ones.
+    
+    Returns:
+        False if they don't carry over (a blocked reaction forced to carry
+        flux, or members whose bounds leave no common flux); the full model
+        then answers the solve and reports it
+    """
+    lower, upper = cobra_model.get_bounds(model)
+    forced = reduced['blocked'] & ((lower > BOUND_TOLERANCE) | (upper < -BOUND_TOLERANCE))
+    if forced.any():
+        return False
+    
+    group_lower, group_upper = group_bounds(reduced, lower, upper)
+    if (group_lower > group_upper + BOUND_TOLERANCE).any():
+        return False
+    group_lower = np.minimum(group_lower, group_upper)
+    cobra_model.write_bounds(group_lower, group_upper, reduced['model'])
+    return True
+
+
+def group_bounds(reduced, lower, upper):
+    """Reduced-reaction bounds from original ones: the intersection of the members' bounds over f_j."""
+    index, group, factor = reduced['member_index'], reduced['member_group'], reduced['member_factor']
+    n = len(reduced['model'].reactions)
+    member_lower = np.where(factor > 0, lower[index], upper[index]) / factor
+    member_upper = np.where(factor > 0, upper[index], lower[index]) / factor
+    group_lower = np.full(n, -np.inf)
+    group_upper = np.full(n, np.inf)
+    np.maximum.at(group_lower, group, member_lower)
+    np.minimum.at(group_upper, group, member_upper)
+    return group_lower, group_upper
+
+
+def locate(reduced, reaction_index):
+    """
+    Where an original reaction lives in the solved model.
+    
+    Returns:
+        (reaction index, factor) with v = factor · u of that reaction; the
+        reaction itself with factor 1 when reduced is None (full model);
+        None if the reaction is blocked
+    """
+    if reduced is None:
+        return reaction_index, 1.0
+    k = np.flatnonzero(reduced['member_index'] == reaction_index)
+    if len(k) == 0:
+        return None
+    return int(reduced['member_group'][k[0]]), float(reduced['member_factor'][k[0]])
+
+
+def prepare(model=None, compute=False):
+    """
+    Reduced model with the model's current bounds, or None to use the full model.
+    
+    None when compression is off in the solver policy, no network analysis
+    is cached for the medium (unless compute), or the bounds don't carry over.
+    """
+    if not solver.get_policy().get('compress'):
+        return None
+    model = model or cobra_model.get_model()
+    reduced = get_reduced(model, compute=compute)
+    if reduced is None or not sync_bounds(reduced, model):
+        return None
+    return reduced
+
+
+def expand(reduced, fluxes):
+    """
+    Original-reaction fluxes from reduced ones.
+    
+    Args:
+        fluxes: Vector over the reduced reactions, or a matrix with one
+                row per sample
+    
+    Returns:
+        Array over the original reactions (blocked ones 0), same layout
+    """
+    fluxes = np.asarray(fluxes, dtype=float)
+    shape = fluxes.shape[:-1] + (len(reduced['reaction_ids']),)
+    out = np.zeros(shape)
+    out[..., reduced['member_index']] = fluxes[..., reduced['member_group']] * reduced['member_factor']
+    return out
+
+
+def expand_range(reduced, lower, upper):
+    """Original-reaction (min, max) arrays from ranges over the reduced reactions."""
+    a = expand(reduced, lower)
+    b = expand(reduced, upper)
+    return np.minimum(a, b), np.maximum(a, b)
+
+
+def solve(model, mode='fba'):
+    """
+    Solve FBA/pFBA on the reduced model (cobra_model's reducer hook).
+    
+    Returns:
+        cobra Solution over the original reaction IDs, or None when the
+        full model should be solved (MOMA/ROOM, compression off or not
+        available for the current medium)
+    """
+    if mode not in ('fba', 'pfba'):
+        return None
+    reduced = prepare(model)
+    if reduced is None:
+        return None
+    
+    from cobra import Solution
+    import pandas as pd
+    
+    result = solver.solve(reduced['model'], mode)
+    fluxes = expand(reduced, result.fluxes.to_numpy(dtype=float))
+    solution = Solution(result.objective_value, result.status,
+                        fluxes=pd.Series(fluxes, index=reduced['reaction_ids']))
+    solution.mode_objective = getattr(result, 'mode_objective', None)
+    solution.reduced = True
+    return solution
+
+
+@metrics.timed('compression.fva')
+def fva(model=None, reaction_ids=None, fraction_of_optimum=1.0, processes=None, compute=True):
+    """
+    Flux variability of original reactions, solved on the reduced model.
+    
+    Each reduced reaction is solved once for all its members; blocked
+    reactions are [0, 0] without an LP. Falls back to cobra's FVA on the
+    full model when no reduced model is available.
+    
+    Args:
+        model: COBRA model (default: the loaded one)
+        reaction_ids: Original reactions (default: all)
+        fraction_of_optimum: Share of the optimal objective to hold
+        processes: FVA worker processes (default: cobra's configuration)
+        compute: Run the network analysis if it is not cached
+    
+    Returns:
+        dict with reaction_ids, minimum, maximum (lists) and reduced (bool)
+    """
+    from cobra.flux_analysis import flux_variability_analysis
+    
+    model = model or cobra_model.get_model()
+    reaction_ids = list(reaction_ids) if reaction_ids is not None else [r.id for r in model.reactions]
+    reduced = prepare(model, compute=compute)
+    if reduced is None:
+        ranges = flux_variability_analysis(model, reaction_ids, fraction_of_optimum=fraction_of_optimum,
+                                           processes=processes)
+        return {'reaction_ids': reaction_ids, 'minimum': ranges['minimum'].tolist(),
+                'maximum': ranges['maximum'].tolist(), 'reduced': False}
+    
+    index = {rxn_id: i for i, rxn_id in enumerate(reduced['reaction_ids'])}
+    missing = [rxn_id for rxn_id in reaction_ids if rxn_id not in index]
+    if missing:
+        raise ValueError(f"Reaction(s) not found: {', '.join(missing[:10])}")
+    positions = np.array([index[rxn_id] for rxn_id in reaction_ids], dtype=np.intp)
+    
+    # Reduced reactions behind the requested originals
+    group_of = np.full(len(reduced['reaction_ids']), -1)
+    group_of[reduced['member_index']] = reduced['member_group']
+    needed = np.unique(group_of[positions][group_of[positions] >= 0])
+    reduced_model = reduced['model']
+    n = len(reduced_model.reactions)
+    lower, upper = np.zeros(n), np.zeros(n)
+    if len(needed):
+        ranges = flux_variability_analysis(reduced_model, [reduced_model.reactions[k] for k in needed.tolist()],
+                                           fraction_of_optimum=fraction_of_optimum, processes=processes)
+        lower[needed] = ranges['minimum'].to_numpy()
+        upper[needed] = ranges['maximum'].to_numpy()
+    minimum, maximum = expand_range(reduced, lower, upper)
+    return {'reaction_ids': reaction_ids, 'minimum': minimum[positions].tolist(),
+            'maximum': maximum[positions].tolist(), 'reduced': True}
+
+
+def stats(reduced):
+    """JSON-friendly summary of a reduced model."""
+    return {'key': reduced['key'], **reduced['stats']}
@@ -0,0 +1,211 @@
+"""
+Dynamic FBA of a batch culture (static optimization approach).
+
+The state is the biomass X (gDW/L) and the concentrations C (mM) of the
+tracked exchange metabolites, as numpy arrays. Each step:
+    1. Uptake kinetics set the tracked exchange bounds, all at once:
+           uptake <= vmax · C / (km + C)     (Michaelis-Menten)
+    2. FBA gives the growth rate μ (1/h) and the exchange fluxes v
+       (mmol/gDW/h); an infeasible LP (nothing left to grow or maintain on)
+       counts as μ = 0, v = 0. A culture that no longer changes is
+       stationary, and the run jumps to the end.
+    3. With μ and v held over the step, the state advances exactly:
+           X(t + dt) = X · e^{μ dt}
+           C(t + dt) = C + v · X · (e^{μ dt} - 1) / μ
+The step adapts to the culture: it is the largest step in which no
+consumed metabolite loses more than max_change of its concentration and
+the biomass grows by no more than max_change, and it grows by at most
+STEP_GROWTH per step, up to dt_max.
+
+One LP serves the whole run: only the tracked bounds change between steps,
+and each solve starts from the basis of the previous step (no return to
+the standard basis). The compressed model is used when the network
+analysis for the culture's medium (tracked uptakes open) is cached, or
+computed with compute=True.
+
+Usage:
+    from services import dfba
+    
+    result = dfba.simulate(model, {'glucose': 20.0}, track=['ethanol'], biomass=0.05, hours=48)
+    # result['time'], result['biomass'], result['concentrations']['r_1714'] -> lists per step
+"""
+
+import time
+
+import numpy as np
+
+from data_access import cobra_model
+from . import compression, sweep
+
+DEFAULTS = {
+    'vmax': 10.0,  # mmol/gDW/h, uptake kinetics of tracked metabolites without their own
+    'km': 0.5,  # mM
+    'dt_max': 0.25,  # h
+    'dt_min': 1e-4,  # h
+    'max_change': 0.1  # largest relative change of a consumed metabolite or the biomass per step
+}
+STEP_GROWTH = 1.5  # A step is at most this much longer than the previous one
+DEPLETED = 1e-9  # mM; concentrations below this count as none
+
+
+def resolve_exchange(model, query):
+    """Exchange reaction ID from an ID or a metabolite query (see sweep.resolve_exchange)."""
+    if query in model.reactions:
+        return query
+    return sweep.resolve_exchange(model, query)
+
+
+def _orientation(rxn):
+    """+1 when positive flux secretes the metabolite (A -->), -1 when it takes it up (--> A)."""
+    (coefficient,) = rxn.metabolites.values()
+    return -1.0 if coefficient > 0 else 1.0
+
+
+def simulate(model, initial, biomass=0.05, hours=48.0, track=(), kinetics=None, compute=False, **options):
+    """
+    Simulate a batch culture.
+    
+    Args:
+        model: COBRA model with the desired bounds already applied
+        initial: {exchange ID or metabolite query: concentration (mM)}
+        biomass: Initial biomass (gDW/L)
+        hours: Culture time
+        track: More exchanges or queries to follow from 0 mM (products)
+        kinetics: {exchange ID or query: {'vmax': ..., 'km': ...}}; every
+                  tracked metabolite is taken up with Michaelis-Menten
+                  kinetics (DEFAULTS unless given here)
+        compute: Run the network analysis for the culture's medium if it is
+                 not cached, so the compressed model is used
+        **options: dt_max, dt_min, max_change (see DEFAULTS)
+    
+    Returns:
+        dict with exchanges, time, biomass, growth, concentrations and
+        fluxes ({exchange: list per step}), steps, infeasible_steps,
+        reduced and seconds
+    """
+    unknown = set(options) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown option(s): {', '.join(sorted(unknown))}")
+    params = {**DEFAULTS, **{k: float(v) for k, v in options.items() if v is not None}}
+    if hours <= 0 or biomass <= 0:
+        raise ValueError("hours and biomass must be positive")
+    
+    start = time.perf_counter()
+    concentrations = {}
+    for query, value in initial.items():
+        concentrations[resolve_exchange(model, query)] = float(value)
+    for query in track:
+        concentrations.setdefault(resolve_exchange(model, query), 0.0)
+    if not concentrations:
+        raise ValueError("No metabolites to simulate")
+    exchanges = list(concentrations)
+    rates = {resolve_exchange(model, query): spec for query, spec in (kinetics or {}).items()}
+    vmax = np.array([float(rates.get(ex, {}).get('vmax', params['vmax'])) for ex in exchanges])
+    km = np.array([float(rates.get(ex, {}).get('km', params['km'])) for ex in exchanges])
+    
+    reactions = [model.reactions.get_by_id(ex) for ex in exchanges]
+    orientation = np.array([_orientation(rxn) for rxn in reactions])
+    index = np.array([model.reactions.index(rxn) for rxn in reactions])
+    
+    with model:
+        # Open every tracked uptake to vmax, so the medium (and the
+        # compressed model it selects) covers all steps
+        for rxn, sign, rate in zip(reactions, orientation, vmax):
+            if sign > 0:
+                rxn.lower_bound = min(rxn.lower_bound, -rate)
+            else:
+                rxn.upper_bound = max(rxn.upper_bound, rate)
+        reduced = compression.prepare(model, compute=compute)
+        lower, upper = cobra_model.get_bounds(model)
+        solved = reduced['model'] if reduced is not None else model
+        located = [compression.locate(reduced, j) for j in index.tolist()]
+        with solved:
+            result = _run(solved, reduced, located, lower, upper, index, orientation, vmax, km,
+                          np.array([concentrations[ex] for ex in exchanges]), float(biomass), float(hours), params)
+    
+    return {
+        'exchanges': exchanges,
+        'names': [rxn.name for rxn in reactions],
+        'time': result['time'].tolist(),
+        'biomass': result['biomass'].tolist(),
+        # Rates hold over the step that follows each time point; the last point has none
+        'growth': result['growth'].tolist() + [None],
+        'concentrations': {ex: result['concentrations'][:, k].tolist() for k, ex in enumerate(exchanges)},
+        'fluxes': {ex: result['fluxes'][:, k].tolist() + [None] for k, ex in enumerate(exchanges)},
+        'steps': len(result['time']) - 1,
+        'infeasible_steps': result['infeasible'],
+        'reduced': reduced is not None,
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+
+
+def _run(solved, reduced, located, lower, upper, index, orientation, vmax, km, concentration, biomass,
+         hours, params):
+    """Integrate the culture on the solved model; returns the per-step arrays."""
+    # Tracked exchanges blocked in the compressed model never carry flux
+    live = np.array([loc is not None for loc in located])
+    groups = np.array([loc[0] for loc in located if loc is not None], dtype=int)
+    factors = np.array([loc[1] for loc in located if loc is not None])
+    # Only the (reduced) reactions holding tracked exchanges are rewritten per step
+    targets = [(g, solved.reactions[g]) for g in np.unique(groups).tolist()]
+    variables = [(solved.reactions[g].forward_variable, solved.reactions[g].reverse_variable)
+                 for g in groups.tolist()]
+    lower, upper = lower.copy(), upper.copy()
+    uptake_side = orientation > 0  # uptake is the lower bound
+    
+    times, masses, growth_rates, states, flux_rows = [0.0], [biomass], [], [concentration.copy()], []
+    t, dt = 0.0, params['dt_max']
+    infeasible = 0
+    while t < hours - 1e-12:
+        # 1. Kinetics -> bounds, vectorized over the tracked exchanges
+        available = np.where(concentration > DEPLETED, concentration, 0.0)
+        uptake = vmax * available / (km + available)
+        lower[index] = np.where(uptake_side, -uptake, lower[index])
+        upper[index] = np.where(uptake_side, upper[index], uptake)
+        if reduced is not None:
+            group_lower, group_upper = compression.group_bounds(reduced, lower, upper)
+        else:
+            group_lower, group_upper = lower, upper
+        for g, rxn in targets:
+            rxn.bounds = (min(group_lower[g], group_upper[g]), group_upper[g])
+        
+        # 2. FBA from the previous basis
+        mu = solved.slim_optimize(error_value=float('nan'))
+        v = np.zeros(len(index))
+        if np.isnan(mu):
+            mu = 0.0
+            infeasible += 1
+        else:
+            v[live] = factors * np.array([fwd.primal - rev.primal for fwd, rev in variables])
+        change = orientation * v  # mmol/gDW/h into the medium
+        
+        # 3. Adaptive step, then the exact update
+        limit = params['dt_max']
+        consumed = change < 0
+        if consumed.any():
+            limit = min(limit, np.min(params['max_change'] * concentration[consumed] / (-change[consumed] * biomass)))
+        if mu > 0:
+            limit = min(limit, np.log1p(params['max_change']) / mu)
+        dt = max(min(dt * STEP_GROWTH, limit, hours - t), min(params['dt_min'], hours - t))
+        if mu == 0 and not change.any():
+            # Nothing changes, so every later step would solve the same LP
+            dt = hours - t
+        integral = np.expm1(mu * dt) / mu if mu > 0 else dt  # ∫ X dt / X(t)
+        concentration = np.maximum(concentration + change * biomass * integral, 0.0)
+        biomass *= np.exp(mu * dt)
+        t += dt
+        
+        times.append(t)
+        masses.append(biomass)
+        growth_rates.append(mu)
+        states.append(concentration)
+        flux_rows.append(v)
+    
+    return {
+        'time': np.array(times),
+        'biomass': np.array(masses),
+        'growth': np.array(growth_rates),
+        'concentrations': np.array(states),
+        'fluxes': np.array(flux_rows).reshape(-1, len(index)),
+        'infeasible': infeasible
+    }
@@ -0,0 +1,167 @@
+"""
+Production envelope: the product flux range over growth.
+
+For N growth rates between the minimum and maximum of the model objective,
+the product exchange flux is minimized and maximized with growth fixed.
+The growth points are split into contiguous segments, one per worker
+process (services.parallel); within a segment each LP starts from the basis
+of the previous one, and the min/max order alternates so that consecutive
+solves share an objective direction. The compressed model answers when one
+is available for the medium (services.compression).
+
+Carbon yields normalize each flux distribution by its carbon uptake:
+    carbon yield = product carbon flux / Σ carbon taken up by exchanges
+with carbon counted from the metabolite formulas (atoms of C per unit flux).
+
+Usage:
+    from services import envelope
+    
+    result = envelope.run(model, 'r_1761', points=20, processes=4)
+    # result['polygon'] -> [[growth, product], ...] around the envelope
+"""
+
+import time
+
+import numpy as np
+
+from . import compression, parallel
+
+DEFAULT_POINTS = 20
+
+
+def carbon_content(rxn):
+    """Carbon atoms leaving the model per unit of forward flux (from metabolite formulas)."""
+    return -sum(coef * met.elements.get('C', 0) for met, coef in rxn.metabolites.items())
+
+
+def _flux(model, located):
+    rxn = model.reactions[located[0]]
+    return located[1] * (rxn.forward_variable.primal - rxn.reverse_variable.primal)
+
+
+def _set_growth(row, value):
+    # Move the bound that keeps lb <= ub valid first
+    if row.ub is not None and value > row.ub:
+        row.ub = value
+        row.lb = value
+    else:
+        row.lb = value
+        row.ub = value
+
+
+def _solve_segment(model, task):
+    """Minimize and maximize the product along one segment of growth points."""
+    points = []
+    with model:
+        prob = model.problem
+        row = prob.Constraint(model.solver.objective.expression, name='envelope_growth')
+        model.add_cons_vars([row])
+        index, factor = task['product']
+        rxn = model.reactions[index]
+        model.objective = prob.Objective(factor * rxn.forward_variable - factor * rxn.reverse_variable,
+                                         direction='max')
+        
+        for step, (i, growth) in enumerate(zip(task['indices'], task['growth'])):
+            _set_growth(row, growth)
+            point = {'index': i}
+            for direction in (('max', 'min') if step % 2 == 0 else ('min', 'max')):
+                model.solver.objective.direction = direction
+                value = model.slim_optimize(error_value=float('nan'))
+                if np.isnan(value):
+                    point[direction] = (None, None)
+                    continue
+                uptake = sum(max(0.0, -carbon * _flux(model, located))
+                             for located, carbon in task['carbon_exchanges'])
+                point[direction] = (value, uptake)
+            points.append(point)
+    return points
+
+
+def _polygon(growth, lower, upper):
+    """Envelope outline: the upper edge by increasing growth, then the lower edge back."""
+    top = [[g, u] for g, u in zip(growth, upper) if u is not None]
+    bottom = [[g, l] for g, l in zip(growth, lower) if l is not None]
+    return top + bottom[::-1]
+
+
+def run(model, product_id, points=DEFAULT_POINTS, processes=None):
+    """
+    Compute the production envelope of a product exchange.
+    
+    Args:
+        model: COBRA model with the desired bounds already applied
+        product_id: Exchange reaction of the product
+        points: Number of growth rates, evenly spaced from the minimum to
+                the maximum of the model objective
+        processes: Worker processes (default: cobra's configuration)
+    
+    Returns:
+        dict with growth, product_min/max and carbon_yield_min/max (lists
+        aligned to growth, None where infeasible), the polygon and
+        carbon_polygon outlines, product_carbon, reduced and seconds
+    """
+    if points < 2:
+        raise ValueError("Envelope needs at least two points")
+    
+    start = time.perf_counter()
+    reduced = compression.prepare(model)
+    solved = reduced['model'] if reduced is not None else model
+    reaction_index = {rxn.id: j for j, rxn in enumerate(model.reactions)}
+    
+    product = compression.locate(reduced, reaction_index[product_id])
+    if product is None:
+        raise ValueError(f"Product exchange {product_id} cannot carry flux under the current conditions")
+    product_carbon = carbon_content(model.reactions.get_by_id(product_id))
+    # Only exchanges whose bounds allow taking carbon up are read after each solve
+    carbon_exchanges = []
+    for rxn in model.boundary:
+        carbon = carbon_content(rxn)
+        if (carbon > 0 and rxn.lower_bound < 0) or (carbon < 0 and rxn.upper_bound > 0):
+            located = compression.locate(reduced, reaction_index[rxn.id])
+            if located is not None:
+                carbon_exchanges.append((located, carbon))
+    
+    growth_max = solved.slim_optimize(error_value=float('nan'))
+    if np.isnan(growth_max):
+        raise ValueError("The model is infeasible under the current conditions")
+    with solved:
+        solved.objective_direction = 'min' if solved.objective_direction == 'max' else 'max'
+        growth_min = solved.slim_optimize(error_value=float('nan'))
+    growth = np.linspace(growth_min, growth_max, int(points))
+    
+    n_segments = max(1, min(processes or parallel.default_processes(), len(growth)))
+    tasks = [
+        {
+            'indices': segment.tolist(),
+            'growth': growth[segment].tolist(),
+            'product': product,
+            'carbon_exchanges': carbon_exchanges
+        }
+        for segment in np.array_split(np.arange(len(growth)), n_segments)
+    ]
+    
+    n = len(growth)
+    fluxes = {'min': [None] * n, 'max': [None] * n}
+    yields = {'min': [None] * n, 'max': [None] * n}
+    for segment in parallel.map_model(solved, _solve_segment, tasks, processes):
+        for point in segment:
+            for direction in ('min', 'max'):
+                value, uptake = point[direction]
+                fluxes[direction][point['index']] = value
+                if value is not None and product_carbon and uptake > 0:
+                    yields[direction][point['index']] = product_carbon * value / uptake
+    
+    growth = growth.tolist()
+    return {
+        'product': product_id,
+        'growth': growth,
+        'product_min': fluxes['min'],
+        'product_max': fluxes['max'],
+        'carbon_yield_min': yields['min'],
+        'carbon_yield_max': yields['max'],
+        'polygon': _polygon(growth, fluxes['min'], fluxes['max']),
+        'carbon_polygon': _polygon(growth, yields['min'], yields['max']),
+        'product_carbon': product_carbon,
+        'reduced': reduced is not None,
+        'seconds': round(time.perf_counter() - start, 3)
+    }
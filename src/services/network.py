@@ -0,0 +1,483 @@
+"""
+Blocked reactions and dead-end metabolites, cached per model and medium.
+
+Whether a reaction can carry flux only depends on which directions each
+reaction may run in, not on how far: any flux through the cone
+    S v = 0,  v_j >= 0 where only forward is open,  v_j <= 0 where only reverse is
+can be scaled down into the actual bounds. The analysis therefore runs on
+the open directions, which also makes them the cache key.
+
+Two passes:
+    1. Dead ends (matrix/graph): a metabolite that the reactions able to
+       run can only produce, or only consume, is a dead end, and every
+       reaction touching it is blocked. Dropping those reactions can strand
+       more metabolites, so this repeats (vectorized with bincount) until
+       nothing changes.
+    2. Blocked reactions (LP): for each direction d, one LP finds as many
+       candidate reactions as possible that can carry flux at once:
+           maximize Σ z_j  s.t.  S v = 0 (on the cone, |v_j| <= FLUX_BOUND),
+                                 z_j <= EPSILON,  z_j <= d·v_j
+       Reactions reaching FLUX_TOLERANCE leave the candidate set and the
+       LP is solved again from the previous basis (see _direction_pass for
+       when an optimum of 0 is a proof). A reaction that only reached a
+       small flux is then confirmed by an LP of its own, solved in exact
+       arithmetic when its optimum is too small to trust.
+       Forward and reverse passes are independent and run in parallel.
+A reaction is blocked when it can run in neither direction.
+
+Directions come from the current bounds of boundary reactions (the medium)
+and from the original bounds of internal reactions, plus any direction a
+constraint opens. Tighter internal constraints, such as knockouts, only
+block more, so the mask stays valid under them. Forced fluxes (a positive
+lower bound such as maintenance ATP) count as an open direction only.
+Results are written to data/network/<model hash>-<medium hash>.npz and
+reused from there.
+
+Usage:
+    from services import network
+    
+    analysis = network.get_analysis(model)
+    live = network.live_mask(model)  # bool per reaction, False = blocked
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+import metrics
+from data_access import cobra_model
+from . import parallel
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../data/network')
+
+EPSILON = 1.0  # Flux each candidate is asked to reach in the LP passes
+FLUX_BOUND = 1e3 * EPSILON  # |v_j| cap in the LP passes, so round-off in S v = 0 stays small
+VERIFY_FLUX = 1e-3 * EPSILON  # Reactions reached with no more flux than this are confirmed by their own LP
+NOISE_FLUX = 1e-7 * FLUX_BOUND  # Own-LP optima up to this are within round-off; settled in exact arithmetic
+FLUX_TOLERANCE = 1e-6  # |flux| above this counts as carrying flux
+MIN_PASS_GAIN = 0.01  # Penalized passes stop once they find fewer than this share of the candidates
+BOUND_TOLERANCE = 1e-9  # Bound magnitude below this counts as closed
+
+_stoichiometry = {'key': None}
+_analysis = {'key': None}
+
+
+def _model_hash(model):
+    if model is cobra_model.get_model() and cobra_model.get_model_hash():
+        return cobra_model.get_model_hash()
+    return hashlib.sha1('\n'.join(r.id for r in model.reactions).encode()).hexdigest()
+
+
+def stoichiometry(model):
+    """
+    Stoichiometric matrix of a model as nonzeros sorted by reaction.
+    
+    Returns:
+        dict with reaction_ids, met_ids, rows (metabolite position per
+        nonzero), coefs, indptr (reaction j owns indptr[j]:indptr[j + 1]),
+        columns (reaction position per nonzero) and internal (bool per
+        reaction: consumes and produces something, unlike exchanges, sinks
+        and demands)
+    """
+    global _stoichiometry
+    key = (id(model), _model_hash(model))
+    if _stoichiometry['key'] == key:
+        return _stoichiometry
+    
+    met_ids = [m.id for m in model.metabolites]
+    met_index = {m: i for i, m in enumerate(met_ids)}
+    rows, coefs, counts = [], [], []
+    for rxn in model.reactions:
+        counts.append(len(rxn.metabolites))
+        for met, coef in rxn.metabolites.items():
+            rows.append(met_index[met.id])
+            coefs.append(coef)
+    
+    n = len(model.reactions)
+    coefs = np.array(coefs, dtype=float)
+    columns = np.repeat(np.arange(n), counts)
+    internal = ((np.bincount(columns, coefs < 0, minlength=n) > 0)
+                & (np.bincount(columns, coefs > 0, minlength=n) > 0))
+    _stoichiometry = {
+        'key': key,
+        'reaction_ids': [rxn.id for rxn in model.reactions],
+        'met_ids': met_ids,
+        'rows': np.array(rows, dtype=np.intp),
+        'coefs': coefs,
+        'indptr': np.concatenate([[0], np.cumsum(counts)]).astype(np.intp),
+        'columns': columns,
+        'internal': internal
+    }
+    return _stoichiometry
+
+
+def open_directions(model):
+    """
+    Directions each reaction may run in for the analysis, and their key.
+    
+    Returns:
+        (forward, reverse, key): bool arrays over the reactions and
+        '<model hash>-<medium hash>'
+    """
+    s = stoichiometry(model)
+    lower, upper = cobra_model.get_bounds(model)
+    forward, reverse = upper > BOUND_TOLERANCE, lower < -BOUND_TOLERANCE
+    if model is cobra_model.get_model() and cobra_model.get_original_bounds()[0] is not None:
+        original_lower, original_upper = cobra_model.get_original_bounds()
+        forward |= s['internal'] & (original_upper > BOUND_TOLERANCE)
+        reverse |= s['internal'] & (original_lower < -BOUND_TOLERANCE)
+    
+    medium = hashlib.sha1(np.packbits(np.concatenate([forward, reverse])).tobytes()).hexdigest()
+    return forward, reverse, f'{_model_hash(model)[:16]}-{medium[:16]}'
+
+
+def dead_ends(s, forward, reverse):
+    """
+    Dead-end metabolites and the reactions they block.
+    
+    Returns:
+        (dead_end: bool per metabolite, root: dead ends before any
+        propagation, blocked: bool per reaction)
+    """
+    rows, coefs, columns = s['rows'], s['coefs'], s['columns']
+    n_mets = len(s['met_ids'])
+    produces = np.where(coefs > 0, forward[columns], reverse[columns])
+    consumes = np.where(coefs > 0, reverse[columns], forward[columns])
+    
+    alive = forward | reverse
+    dead = np.zeros(n_mets, dtype=bool)
+    root = None
+    while True:
+        live = alive[columns]
+        touched = np.bincount(rows, live, minlength=n_mets) > 0
+        producible = np.bincount(rows, live & produces, minlength=n_mets) > 0
+        consumable = np.bincount(rows, live & consumes, minlength=n_mets) > 0
+        stranded = touched & ~(producible & consumable)
+        if root is None:
+            root = stranded.copy()
+        if not stranded.any():
+            break
+        dead |= stranded
+        alive &= ~(np.bincount(columns, stranded[rows], minlength=len(alive)) > 0)
+    return dead, root, ~alive
+
+
+def _direction_pass(task):
+    """
+    Which reactions can carry flux in one direction (LP passes, see module doc).
+    
+    The link rows z_j <= d·v_j must not force a direction on reactions that
+    may run both ways, so their z_j has no lower bound: running the other
+    way costs objective instead of feasibility. Passes repeat while they
+    find enough new reactions. An optimum of 0 is only a proof for
+    reactions that cannot run the other way, so those are solved next on
+    their own, and the two-way reactions left get one LP each. Reactions
+    whose largest flux stayed within VERIFY_FLUX are kept only if their
+    own LP has a positive optimum; one within NOISE_FLUX is recomputed
+    with glp_exact, since round-off in S v = 0 reaches that far.
+    
+    Returns:
+        bool array over all reactions: can carry flux in this direction
+    """
+    import swiglpk as glpk
+    
+    rows, columns, coefs = task['rows'], task['columns'], task['coefs']
+    forward, reverse, sign = task['forward'], task['reverse'], task['sign']
+    candidates = task['candidates'].copy()
+    n, n_mets = len(forward), task['n_mets']
+    one_way = ~(reverse if sign > 0 else forward)
+    reached = np.zeros(n, dtype=bool)
+    peak = np.zeros(n)  # Largest flux each reaction showed in this direction
+    
+    problem = glpk.glp_create_prob()
+    try:
+        glpk.glp_set_obj_dir(problem, glpk.GLP_MAX)
+        glpk.glp_add_rows(problem, n_mets + n)
+        glpk.glp_add_cols(problem, 2 * n)
+        for i in range(n_mets):
+            glpk.glp_set_row_bnds(problem, i + 1, glpk.GLP_FX, 0.0, 0.0)
+        # The cone scaled into a box: the same reactions can carry flux, and
+        # no pass reaches fluxes whose round-off in S v = 0 looks like flux
+        col_bounds = {
+            (True, True): (-FLUX_BOUND, FLUX_BOUND), (True, False): (0.0, FLUX_BOUND),
+            (False, True): (-FLUX_BOUND, 0.0), (False, False): (0.0, 0.0)
+        }
+        for j, key in enumerate(zip(forward.tolist(), reverse.tolist())):
+            lb, ub = col_bounds[key]
+            glpk.glp_set_col_bnds(problem, j + 1, glpk.GLP_FX if lb == ub else glpk.GLP_DB, lb, ub)
+            glpk.glp_set_obj_coef(problem, n + j + 1, 1.0)
+        
+        # Metabolite rows (S v = 0) and link rows (d·v_j - z_j >= 0)
+        ia = np.concatenate([[0], rows + 1, n_mets + np.arange(1, n + 1), n_mets + np.arange(1, n + 1)])
+        ja = np.concatenate([[0], columns + 1, np.arange(1, n + 1), n + np.arange(1, n + 1)])
+        ar = np.concatenate([[0.0], coefs, np.full(n, float(sign)), np.full(n, -1.0)])
+        _load_matrix(glpk, problem, ia, ja, ar)
+        
+        glpk.glp_scale_prob(problem, glpk.GLP_SF_AUTO)
+        glpk.glp_adv_basis(problem, 0)
+        parm = glpk.glp_smcp()
+        glpk.glp_init_smcp(parm)
+        parm.msg_lev = glpk.GLP_MSG_OFF
+        
+        def solve():
+            # Warm start: GLPK keeps the previous basis
+            glpk.glp_simplex(problem, parm)
+            if glpk.glp_get_status(problem) != glpk.GLP_OPT:
+                return None
+            pending = np.flatnonzero(candidates & ~reached).tolist()
+            flux = sign * np.array([glpk.glp_get_col_prim(problem, j + 1) for j in pending])
+            pending = np.array(pending, dtype=np.intp)
+            reached[pending[flux > FLUX_TOLERANCE]] = True
+            peak[pending] = np.maximum(peak[pending], flux)
+            return glpk.glp_get_obj_val(problem)
+        
+        # Penalized passes over every candidate, then exact ones over one-way reactions
+        _set_candidates(glpk, problem, n_mets, n, candidates, one_way)
+        for phase in ('all', 'one_way'):
+            active = candidates.copy()
+            if phase == 'one_way':
+                _set_candidates(glpk, problem, n_mets, n, candidates & ~one_way, None)
+                active &= one_way
+            objective = None
+            while active.any():
+                objective = solve()
+                found = active & reached
+                if objective is None or not found.any():
+                    break
+                candidates &= ~found
+                active &= ~found
+                _set_candidates(glpk, problem, n_mets, n, found, None)
+                if phase == 'all' and found.sum() < MIN_PASS_GAIN * active.sum():
+                    break
+            if phase == 'one_way' and objective is not None and objective <= FLUX_TOLERANCE:
+                candidates &= ~active  # Proven: none of them can run this way
+        
+        # Whatever is left gets its own LP: maximize z_j alone
+        _set_candidates(glpk, problem, n_mets, n, candidates, None)
+        for j in range(n, 2 * n):
+            glpk.glp_set_obj_coef(problem, j + 1, 0.0)
+        for j in np.flatnonzero(candidates).tolist():
+            if reached[j]:
+                continue
+            single = np.zeros(n, dtype=bool)
+            single[j] = True
+            _set_candidates(glpk, problem, n_mets, n, single, one_way)
+            glpk.glp_set_obj_coef(problem, n + j + 1, 1.0)
+            solve()
+            glpk.glp_set_obj_coef(problem, n + j + 1, 0.0)
+            _set_candidates(glpk, problem, n_mets, n, single, None)
+        
+        # A small flux may be round-off in S v = 0: the reaction's own LP
+        # decides, in exact arithmetic when its optimum is that small too.
+        # Cofactor pathways feeding biomass do run at ~1e-7 of the box.
+        weak = np.flatnonzero(reached & (peak <= VERIFY_FLUX))
+        reached[weak] = False
+        for j in weak.tolist():
+            if reached[j]:
+                continue
+            single = np.zeros(n, dtype=bool)
+            single[j] = True
+            _set_candidates(glpk, problem, n_mets, n, single, one_way)
+            glpk.glp_set_obj_coef(problem, n + j + 1, 1.0)
+            glpk.glp_simplex(problem, parm)
+            if glpk.glp_get_status(problem) == glpk.GLP_OPT:
+                if glpk.glp_get_obj_val(problem) > NOISE_FLUX:
+                    reached[j] = True
+                else:
+                    glpk.glp_exact(problem, parm)
+                    if glpk.glp_get_status(problem) == glpk.GLP_OPT:
+                        # Exact fluxes prove every weak reaction they run
+                        flux = sign * np.array([glpk.glp_get_col_prim(problem, k + 1) for k in weak.tolist()])
+                        reached[weak[flux > 0]] = True
+            glpk.glp_set_obj_coef(problem, n + j + 1, 0.0)
+            _set_candidates(glpk, problem, n_mets, n, single, None)
+    finally:
+        glpk.glp_delete_prob(problem)
+    return reached
+
+
+def _set_candidates(glpk, problem, n_mets, n, mask, one_way):
+    """
+    Switch the z column and link row of each masked reaction on or off.
+    
+    On: z_j <= EPSILON, and z_j >= 0 for one-way reactions. Off (one_way
+    None): z_j fixed at 0 and the link row free.
+    """
+    for j in np.flatnonzero(mask).tolist():
+        if one_way is None:
+            glpk.glp_set_col_bnds(problem, n + j + 1, glpk.GLP_FX, 0.0, 0.0)
+            glpk.glp_set_row_bnds(problem, n_mets + j + 1, glpk.GLP_FR, 0.0, 0.0)
+        else:
+            if one_way[j]:
+                glpk.glp_set_col_bnds(problem, n + j + 1, glpk.GLP_DB, 0.0, EPSILON)
+            else:
+                glpk.glp_set_col_bnds(problem, n + j + 1, glpk.GLP_UP, 0.0, EPSILON)
+            glpk.glp_set_row_bnds(problem, n_mets + j + 1, glpk.GLP_LO, 0.0, 0.0)
+
+
+def _load_matrix(glpk, problem, ia, ja, ar):
+    """glp_load_matrix from 1-based numpy triplets (element 0 unused)."""
+    ia_arr, ja_arr, ar_arr = glpk.intArray(len(ia)), glpk.intArray(len(ia)), glpk.doubleArray(len(ia))
+    for k, (i, j, a) in enumerate(zip(ia.tolist(), ja.tolist(), ar.tolist())):
+        ia_arr[k], ja_arr[k], ar_arr[k] = i, j, a
+    glpk.glp_load_matrix(problem, len(ia) - 1, ia_arr, ja_arr, ar_arr)
+
+
+@metrics.timed('network.analyze')
+def analyze(model, processes=None):
+    """
+    Compute blocked reactions and dead-end metabolites for the current medium.
+    
+    Args:
+        model: COBRA model (its current bounds give the medium)
+        processes: Workers for the two direction passes (default: cobra's
+                   configuration)
+    
+    Returns:
+        dict with key, reaction_ids, met_ids, can_forward, can_reverse,
+        blocked, structurally_blocked (by dead ends), dead_end, dead_end_root,
+        and seconds
+    """
+    start = time.perf_counter()
+    s = stoichiometry(model)
+    forward, reverse, key = open_directions(model)
+    dead, root, structural = dead_ends(s, forward, reverse)
+    
+    # Reactions touching a dead end are already known to be blocked
+    tasks = [
+        {
+            'sign': sign,
+            'candidates': ~structural & (forward if sign > 0 else reverse),
+            'rows': s['rows'], 'columns': s['columns'], 'coefs': s['coefs'],
+            'forward': forward, 'reverse': reverse, 'n_mets': len(s['met_ids'])
+        }
+        for sign in (1, -1)
+    ]
+    can_forward, can_reverse = parallel.map_tasks(_direction_pass, tasks, processes)
+    
+    return {
+        'key': key,
+        'reaction_ids': s['reaction_ids'],
+        'met_ids': s['met_ids'],
+        'can_forward': can_forward,
+        'can_reverse': can_reverse,
+        'blocked': ~(can_forward | can_reverse),
+        'structurally_blocked': structural,
+        'dead_end': dead,
+        'dead_end_root': root,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir or CACHE_DIR, f'{key}.npz')
+
+
+def _save(analysis, cache_dir=None):
+    os.makedirs(cache_dir or CACHE_DIR, exist_ok=True)
+    arrays = {k: v for k, v in analysis.items() if isinstance(v, np.ndarray)}
+    meta = {'key': analysis['key'], 'seconds': analysis['seconds'], 'tolerances': _tolerances()}
+    np.savez_compressed(_cache_path(analysis['key'], cache_dir), reaction_ids=np.array(analysis['reaction_ids']),
+                        met_ids=np.array(analysis['met_ids']), meta=np.array(json.dumps(meta)), **arrays)
+
+
+def _tolerances():
+    """Settings that decide which reactions the LP passes count as reached."""
+    return [FLUX_TOLERANCE, FLUX_BOUND, VERIFY_FLUX, NOISE_FLUX]
+
+
+def _load(key, reaction_ids, cache_dir=None):
+    """Cached analysis from disk, or None if absent, for another reaction set or other tolerances."""
+    path = _cache_path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta']))
+        if data['reaction_ids'].tolist() != list(reaction_ids) or meta.pop('tolerances', None) != _tolerances():
+            return None
+        analysis = {k: data[k] for k in data.files if k not in ('reaction_ids', 'met_ids', 'meta')}
+        analysis.update(meta)
+        analysis['reaction_ids'] = data['reaction_ids'].tolist()
+        analysis['met_ids'] = data['met_ids'].tolist()
+    return analysis
+
+
+def get_analysis(model=None, compute=True, refresh=False, processes=None, cache_dir=None):
+    """
+    Analysis for a model at its current medium: memory, then disk, then computed.
+    
+    Args:
+        model: COBRA model (default: the loaded one)
+        compute: Compute and store when not cached; otherwise return None
+        refresh: Recompute even if cached
+        processes: Workers when computing
+        cache_dir: Directory of the .npz cache (default data/network)
+    
+    Returns:
+        Result of analyze plus 'cached' ('memory', 'disk' or False), or None
+    """
+    global _analysis
+    model = model or cobra_model.get_model()
+    if model is None:
+        return None
+    _, _, key = open_directions(model)
+    if not refresh and _analysis['key'] == key:
+        return {**_analysis['result'], 'cached': 'memory'}
+    
+    result = None if refresh else _load(key, stoichiometry(model)['reaction_ids'], cache_dir)
+    cached = 'disk'
+    if result is None:
+        if not (compute or refresh):
+            return None
+        result = analyze(model, processes)
+        _save(result, cache_dir)
+        cached = False
+    _analysis = {'key': key, 'result': result}
+    return {**result, 'cached': cached}
+
+
+def live_mask(model=None, compute=True):
+    """Bool per reaction, False for blocked ones (None if not cached and compute is off)."""
+    analysis = get_analysis(model, compute=compute)
+    return None if analysis is None else ~analysis['blocked']
+
+
+def pin_blocked(model, analysis=None):
+    """
+    Fix every blocked reaction of the model at (0, 0).
+    
+    For samplers and other per-reaction loops, which then skip them. Run
+    inside `with model:` or follow with constraints.apply_to_model to get
+    the bounds back.
+    
+    Returns:
+        Number of reactions changed
+    """
+    analysis = analysis or get_analysis(model)
+    lower, upper = cobra_model.get_bounds(model)
+    blocked = analysis['blocked']
+    return cobra_model.write_bounds(np.where(blocked, 0.0, lower), np.where(blocked, 0.0, upper), model)
+
+
+def summary(analysis, with_ids=True):
+    """JSON-friendly counts (and IDs) of an analysis."""
+    result = {
+        'key': analysis['key'],
+        'cached': analysis.get('cached', False),
+        'seconds': analysis['seconds'],
+        'reactions': len(analysis['reaction_ids']),
+        'blocked': int(analysis['blocked'].sum()),
+        'structurally_blocked': int(analysis['structurally_blocked'].sum()),
+        'forward_only': int((analysis['can_forward'] & ~analysis['can_reverse']).sum()),
+        'reverse_only': int((analysis['can_reverse'] & ~analysis['can_forward']).sum()),
+        'dead_end_metabolites': int(analysis['dead_end'].sum()),
+        'dead_end_roots': int(analysis['dead_end_root'].sum())
+    }
+    if with_ids:
+        rxn_ids, met_ids = analysis['reaction_ids'], analysis['met_ids']
+        result['blocked_reactions'] = [rxn_ids[j] for j in np.flatnonzero(analysis['blocked'])]
+        result['dead_end_ids'] = [met_ids[i] for i in np.flatnonzero(analysis['dead_end'])]
+    return result
@@ -0,0 +1,87 @@
+"""
+Worker pool helpers for running many LPs against one model.
+
+Each worker process receives one copy of the model when the pool starts and
+keeps it (and its solver state) for every task it runs, the same pattern
+cobra uses for flux variability analysis.
+
+Usage:
+    from services import parallel
+    
+    def _solve_point(model, bounds):
+        ...
+    
+    results = parallel.map_model(model, _solve_point, tasks, processes=4)
+"""
+
+_worker_model = None
+_worker_func = None
+
+
+def _init_worker(model, func):
+    global _worker_model, _worker_func
+    _worker_model = model
+    _worker_func = func
+
+
+def _run_task(task):
+    return _worker_func(_worker_model, task)
+
+
+def default_processes():
+    """Worker count from cobra's configuration."""
+    from cobra import Configuration
+    return Configuration().processes
+
+
+def map_model(model, func, tasks, processes=None):
+    """
+    Apply func(model, task) to every task, in order.
+    
+    Args:
+        model: COBRA model, copied once into each worker
+        func: Module-level function (must be picklable)
+        tasks: List of picklable task descriptions
+        processes: Worker processes (default: cobra's configuration);
+                   1 runs everything in this process on the given model
+    
+    Returns:
+        List of results in task order
+    """
+    if processes is None:
+        processes = default_processes()
+    processes = min(processes, len(tasks))
+    
+    if processes <= 1:
+        return [func(model, task) for task in tasks]
+    
+    from cobra.util import ProcessPool
+    with ProcessPool(processes, initializer=_init_worker, initargs=(model, func)) as pool:
+        return pool.map(_run_task, tasks, chunksize=1)
+
+
+def map_tasks(func, tasks, processes=None):
+    """
+    Apply func(task) to every task, in order, without shipping a model.
+    
+    For tasks that carry their own arrays (e.g. a stoichiometric matrix
+    and bounds) and build their own solver problem.
+    
+    Args:
+        func: Module-level function (must be picklable)
+        tasks: List of picklable task descriptions
+        processes: Worker processes (default: cobra's configuration)
+    
+    Returns:
+        List of results in task order
+    """
+    if processes is None:
+        processes = default_processes()
+    processes = min(processes, len(tasks))
+    
+    if processes <= 1:
+        return [func(task) for task in tasks]
+    
+    from cobra.util import ProcessPool
+    with ProcessPool(processes) as pool:
+        return pool.map(func, tasks, chunksize=1)
@@ -1,16 +1,18 @@
 """Pathway tracing service."""
 
+import metrics
 from data_access import cobra_model, thermo
 
 
-def get_metabolite_context(met_id):
+@metrics.timed('pathway.metabolite_context')
+def get_metabolite_context(met_id, compartment_names=None):
     """Get full context for a metabolite: info, reactions, thermo."""
     met = cobra_model.get_metabolite(met_id)
     if met is None:
         return None
     
-    model = cobra_model.get_model()
-    compartment_names = model.compartments if model else {}
+    if compartment_names is None:
+        compartment_names = cobra_model.get_compartment_names()
     
     producing = []
     consuming = []
@@ -36,32 +38,71 @@ def get_metabolite_context(met_id):
     }
 
 
+@metrics.timed('pathway.subsystem')
 def get_subsystem_reactions(subsystem_name):
     """Get all reactions in a subsystem with full context."""
-    model = cobra_model.get_model()
-    if model is None:
+    reactions = iter_subsystem_reactions(subsystem_name)
+    if reactions is None:
         return None
     
-    compartment_names = model.compartments
-    reactions = []
-    for rxn in model.reactions:
-        if rxn.subsystem == subsystem_name:
-            reactions.append(_build_reaction_info(rxn, compartment_names))
-    
     return {
         'subsystem': subsystem_name,
-        'reactions': reactions
+        'reactions': list(reactions)
     }
 
 
-def get_reaction_context(rxn_id):
+def iter_subsystem_reactions(subsystem_name):
+    """
+    Stream the reactions of a subsystem with full context, one dict at a time.
+    
+    Returns None when no model is loaded or no reaction belongs to the
+    subsystem, so callers can report it before streaming starts.
+    """
+    model = cobra_model.get_model()
+    if model is None:
+        return None
+    
+    if not any(rxn.subsystem == subsystem_name for rxn in model.reactions):
+        return None
+    
+    compartment_names = cobra_model.get_compartment_names()
+    return (
+        _build_reaction_info(rxn, compartment_names)
+        for rxn in model.reactions if rxn.subsystem == subsystem_name
+    )
+
+
+def subsystem_reaction_ids(subsystem_names=None):
+    """
+    Reaction IDs per subsystem, for whole-pathway analyses.
+    
+    Args:
+        subsystem_names: Subsystems to include (default: all)
+    
+    Returns:
+        dict subsystem name -> reaction IDs; None if no model is loaded
+    """
+    if cobra_model.get_model() is None:
+        return None
+    
+    subsystems = {s['name']: s['reactions'] for s in cobra_model.list_subsystems()}
+    if subsystem_names is None:
+        return subsystems
+    missing = [name for name in subsystem_names if name not in subsystems]
+    if missing:
+        raise ValueError(f"Subsystem(s) not found: {', '.join(missing)}")
+    return {name: subsystems[name] for name in subsystem_names}
+
+
+@metrics.timed('pathway.reaction_context')
+def get_reaction_context(rxn_id, compartment_names=None):
     """Get full context for a reaction."""
     rxn = cobra_model.get_reaction(rxn_id)
     if rxn is None:
         return None
     
-    model = cobra_model.get_model()
-    compartment_names = model.compartments if model else {}
+    if compartment_names is None:
+        compartment_names = cobra_model.get_compartment_names()
     
     # Get human-readable equation info
     eq_info = cobra_model.build_reaction_info(rxn, compartment_names)
@@ -69,7 +110,7 @@ def get_reaction_context(rxn_id):
     result = {
         'id': rxn.id,
         'name': rxn.name,
-        'equation_raw': rxn.reaction,
+        'equation_raw': eq_info['equation_raw'],
         'equation': eq_info['equation'],
         'location_type': eq_info['location_type'],
         'location': eq_info['location'],
@@ -118,6 +159,81 @@ def get_reaction_context(rxn_id):
     return result
 
 
+@metrics.timed('pathway.batch')
+def get_batch(reaction_ids=(), metabolite_ids=(), thermo_ids=(), fields=None):
+    """
+    Resolve many reactions, metabolites and thermo entries in one pass.
+    
+    Args:
+        reaction_ids: Reaction IDs (full reaction context each)
+        metabolite_ids: Metabolite IDs (full metabolite context each)
+        thermo_ids: Reaction IDs to fetch thermo data for
+        fields: Optional projection, either one list of keys applied to
+                every entity or a dict {'reactions': [...], 'metabolites':
+                [...], 'thermo': [...]}
+    
+    Returns:
+        dict with 'reactions', 'metabolites' and 'thermo' (each id -> entry)
+        and 'missing' (the ids that could not be resolved, per kind)
+    """
+    compartment_names = cobra_model.get_compartment_names()
+    result = {'reactions': {}, 'metabolites': {}, 'thermo': {}}
+    missing = {'reactions': [], 'metabolites': [], 'thermo': []}
+    
+    # Metabolite contexts are the expensive part; skip the reaction lists
+    # when the projection leaves them out
+    met_fields = _fields_for(fields, 'metabolites')
+    with_reactions = met_fields is None or 'producing' in met_fields or 'consuming' in met_fields
+    
+    lookups = (
+        ('reactions', reaction_ids, lambda i: get_reaction_context(i, compartment_names)),
+        ('metabolites', metabolite_ids,
+         lambda i: get_metabolite_context(i, compartment_names) if with_reactions
+         else _metabolite_summary(i, compartment_names)),
+        ('thermo', thermo_ids, thermo.get_reaction)
+    )
+    for kind, ids, resolve in lookups:
+        keys = _fields_for(fields, kind)
+        for entity_id in dict.fromkeys(ids):
+            entry = resolve(entity_id)
+            if entry is None:
+                missing[kind].append(entity_id)
+            else:
+                result[kind][entity_id] = _project(entry, keys)
+    
+    result['missing'] = missing
+    return result
+
+
+def _fields_for(fields, kind):
+    if fields is None:
+        return None
+    if isinstance(fields, dict):
+        return fields.get(kind)
+    return fields
+
+
+def _project(entry, keys):
+    if keys is None:
+        return entry
+    return {k: entry[k] for k in keys if k in entry}
+
+
+def _metabolite_summary(met_id, compartment_names):
+    """Metabolite context without its producing/consuming reactions."""
+    met = cobra_model.get_metabolite(met_id)
+    if met is None:
+        return None
+    return {
+        'id': met.id,
+        'name': met.name,
+        'compartment': met.compartment,
+        'compartment_name': compartment_names.get(met.compartment, met.compartment),
+        'formula': met.formula or '',
+        'thermo': thermo.get_compound_by_met_id(met.id)
+    }
+
+
 def _build_reaction_info(rxn, compartment_names=None):
     """Build reaction info dict with thermo and flux."""
     # Use shared equation builder
@@ -126,7 +242,7 @@ def _build_reaction_info(rxn, compartment_names=None):
     info = {
         'id': rxn.id,
         'name': rxn.name,
-        'equation_raw': rxn.reaction,
+        'equation_raw': eq_info['equation_raw'],
         'equation': eq_info['equation'],
         'location_type': eq_info['location_type'],
         'location': eq_info['location'],
@@ -0,0 +1,294 @@
+"""
+Flux sampling service.
+
+Samples the flux space of the model under its current bounds with cobra's
+hit-and-run samplers (OptGP across worker processes, or single-process ACHR).
+Samples are generated in chunks, appended to a memory-mapped .npy file on
+disk, and folded into online statistics, so memory stays bounded by the
+chunk size rather than the number of samples. Each chain picks up where it
+stopped in the previous chunk, so chunking doesn't change the chains.
+
+Usage:
+    from services import sampling
+    
+    result = sampling.sample(model, 100000, chunk_size=2000, processes=4)
+    # result['path'] -> data/samples/<id>.npy, shape (n, n_reactions)
+    # result['mean'], result['quantiles']['0.5'] -> aligned to result['reaction_ids']
+"""
+
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+
+from . import compression, parallel
+
+SAMPLES_DIR = os.path.join(os.path.dirname(__file__), '../../data/samples')
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class OnlineStats:
+    """
+    Streaming per-reaction mean, standard deviation and quantiles.
+    
+    Mean and variance use Welford's update on whole chunks. Quantiles come
+    from a fixed-range histogram per reaction; the range is the flux span
+    of the sampler's warmup points, which are the extreme points of every
+    reaction, so samples only fall outside it by solver tolerance.
+    """
+    
+    def __init__(self, lower, upper, bins=256):
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.bins = bins
+        self.width = (self.upper - self.lower) / bins
+        self.n = 0
+        self.mean = np.zeros(len(self.lower))
+        self.m2 = np.zeros(len(self.lower))
+        self.counts = np.zeros((len(self.lower), bins), dtype=np.int64)
+    
+    def update(self, chunk):
+        """Fold a (samples x reactions) chunk into the statistics."""
+        m = chunk.shape[0]
+        if m == 0:
+            return
+        
+        # Chan et al. parallel variance update
+        chunk_mean = chunk.mean(axis=0)
+        chunk_m2 = ((chunk - chunk_mean) ** 2).sum(axis=0)
+        delta = chunk_mean - self.mean
+        total = self.n + m
+        self.mean += delta * m / total
+        self.m2 += chunk_m2 + delta ** 2 * self.n * m / total
+        self.n = total
+        
+        # Histogram counts, one bincount over (reaction, bin) pairs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            position = np.where(self.width > 0, (chunk - self.lower) / self.width, 0.0)
+        bin_idx = np.clip(position.astype(np.int64), 0, self.bins - 1)
+        flat = (np.arange(chunk.shape[1]) * self.bins + bin_idx).ravel()
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+    
+    def std(self):
+        if self.n < 2:
+            return np.zeros_like(self.mean)
+        return np.sqrt(self.m2 / (self.n - 1))
+    
+    def quantile(self, q):
+        """Estimate quantile q per reaction by interpolating within histogram bins."""
+        if self.n == 0:
+            return np.full(len(self.mean), np.nan)
+        
+        cdf = np.cumsum(self.counts, axis=1)
+        target = q * self.n
+        j = np.argmax(cdf >= target, axis=1)
+        rows = np.arange(len(j))
+        before = np.where(j > 0, cdf[rows, np.maximum(j - 1, 0)], 0)
+        in_bin = self.counts[rows, j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frac = np.where(in_bin > 0, (target - before) / in_bin, 0.0)
+        return self.lower + (j + np.clip(frac, 0.0, 1.0)) * self.width
+
+
+def create_sampler(model, method='optgp', processes=None, thinning=100, seed=None):
+    """Create a hit-and-run sampler for the model's current bounds."""
+    from cobra.sampling import ACHRSampler, OptGPSampler
+    
+    if method == 'optgp':
+        return OptGPSampler(model, thinning=thinning, processes=processes, seed=seed)
+    if method == 'achr':
+        return ACHRSampler(model, thinning=thinning, seed=seed)
+    raise ValueError(f"Unknown sampling method: {method}")
+
+
+def warmup_flux_range(sampler):
+    """Per-reaction flux span of the warmup points."""
+    warmup = sampler.warmup[:, sampler.fwd_idx] - sampler.warmup[:, sampler.rev_idx]
+    return warmup.min(axis=0), warmup.max(axis=0)
+
+
+def _reproject(sampler, point):
+    """Replace a point that drifted off the equality constraints, as cobra's samplers do."""
+    problem = sampler.problem
+    if np.allclose(problem.equalities.dot(point), problem.b, rtol=0, atol=sampler.feasibility_tol):
+        return point
+    idx = np.random.randint(sampler.n_warmup, size=min(2, int(np.ceil(np.sqrt(sampler.n_warmup)))))
+    return sampler.warmup[idx].mean(axis=0)
+
+
+def _optgp_chain(sampler, task):
+    """
+    Continue one OptGP chain for n stored samples.
+    
+    Takes cobra's OptGP steps, but from the chain's state at the end of its
+    previous chunk (point, running center, step count and random state)
+    instead of restarting at a warmup point.
+    
+    Returns:
+        (samples, chain state to continue from)
+    """
+    from cobra.sampling import step
+    
+    n, chain = task
+    outer = np.random.get_state()
+    np.random.set_state(chain['random_state'])
+    try:
+        point, center, n_samples = chain['point'], chain['center'], chain['n_samples']
+        if point is None:
+            start = sampler.warmup[np.random.randint(sampler.n_warmup)]
+            point = step(sampler, center, start - center, 0.95)
+        samples = np.zeros((n, len(center)))
+        for i in range(1, sampler.thinning * n + 1):
+            delta = sampler.warmup[np.random.randint(sampler.n_warmup)] - center
+            point = step(sampler, point, delta)
+            if sampler.problem.homogeneous and n_samples * sampler.thinning % sampler.nproj == 0:
+                point = _reproject(sampler, point)
+                center = _reproject(sampler, center)
+            if i % sampler.thinning == 0:
+                samples[i // sampler.thinning - 1] = point
+            center = (n_samples * center + point) / (n_samples + 1)
+            n_samples += 1
+        chain = {'point': point, 'center': center, 'n_samples': n_samples,
+                 'random_state': np.random.get_state()}
+    finally:
+        np.random.set_state(outer)
+    return samples, chain
+
+
+def _sample_chunk(sampler, m, chains):
+    """
+    Draw m samples (as fluxes); OptGP chains continue from and update chains.
+    
+    ACHR keeps its single chain on the sampler between calls already.
+    """
+    from cobra.sampling import OptGPSampler
+    
+    if not isinstance(sampler, OptGPSampler):
+        return sampler.sample(m, fluxes=True).to_numpy()
+    
+    per_chain = -(-m // len(chains))
+    results = parallel.map_model(sampler, _optgp_chain, [(per_chain, chain) for chain in chains],
+                                 processes=sampler.processes)
+    chains[:] = [chain for _, chain in results]
+    # OptGP rounds up to a multiple of the chain count
+    samples = np.vstack([r for r, _ in results])[:m]
+    # Global center, which step() falls back to after bound violations
+    sampler.center = (sampler.n_samples * sampler.center + samples.sum(axis=0)) / (sampler.n_samples + m)
+    sampler.n_samples += m
+    return samples[:, sampler.fwd_idx] - samples[:, sampler.rev_idx]
+
+
+def _start_chains(sampler, seed):
+    """Initial state of each OptGP chain, all seeded from one seed sequence."""
+    from cobra.sampling import OptGPSampler
+    
+    if not isinstance(sampler, OptGPSampler):
+        return None
+    return [
+        {
+            'point': None,
+            'center': sampler.center,
+            'n_samples': max(sampler.n_samples, 1),
+            'random_state': np.random.RandomState(child.generate_state(4)).get_state()
+        }
+        for child in np.random.SeedSequence(seed).spawn(sampler.processes)
+    ]
+
+
+def sample(model, n, chunk_size=1000, method='optgp', processes=None, thinning=100,
+           seed=None, quantiles=DEFAULT_QUANTILES, bins=256, output_dir=None,
+           dtype='float32', reduced=None):
+    """
+    Draw n flux samples and summarize them online.
+    
+    Args:
+        model: COBRA model with the desired bounds already applied
+        n: Number of samples
+        chunk_size: Samples generated (and held in memory) per step
+        method: 'optgp' (multi-process) or 'achr' (single process)
+        processes: OptGP worker processes (default: cobra's configuration)
+        thinning: Steps between stored samples
+        seed: Random seed for reproducible chains
+        quantiles: Quantiles to estimate per reaction
+        bins: Histogram resolution used for quantile estimation
+        output_dir: Where the .npy sample file is written (default data/samples)
+        dtype: dtype of the stored samples
+        reduced: compression.prepare(model) result; chains run on its
+                 reduced model and samples are expanded to model's reactions
+    
+    Returns:
+        dict with the sample file path and per-reaction summary statistics,
+        as lists aligned to 'reaction_ids'
+    """
+    if n <= 0:
+        raise ValueError("Number of samples must be positive")
+    
+    output_dir = output_dir or SAMPLES_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    sample_id = uuid.uuid4().hex[:12]
+    path = os.path.join(output_dir, f'{sample_id}.npy')
+    
+    start = time.perf_counter()
+    if reduced is None:
+        sampler = create_sampler(model, method, processes, thinning, seed)
+        stats = OnlineStats(*warmup_flux_range(sampler), bins=bins)
+    else:
+        sampler = create_sampler(reduced['model'], method, processes, thinning, seed)
+        stats = OnlineStats(*compression.expand_range(reduced, *warmup_flux_range(sampler)), bins=bins)
+    reaction_ids = [r.id for r in model.reactions]
+    
+    out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n, len(reaction_ids)))
+    chains = _start_chains(sampler, seed)
+    written = 0
+    while written < n:
+        m = min(chunk_size, n - written)
+        chunk = _sample_chunk(sampler, m, chains)
+        if reduced is not None:
+            chunk = compression.expand(reduced, chunk)
+        out[written:written + m] = chunk
+        stats.update(chunk)
+        written += m
+    out.flush()
+    del out
+    
+    result = {
+        'id': sample_id,
+        'path': path,
+        'method': method,
+        'n_samples': written,
+        'chunk_size': chunk_size,
+        'thinning': thinning,
+        'seed': seed,
+        'reduced': reduced is not None,
+        'seconds': round(time.perf_counter() - start, 3),
+        'reaction_ids': reaction_ids,
+        'mean': stats.mean.tolist(),
+        'std': stats.std().tolist(),
+        'quantiles': {str(q): stats.quantile(q).tolist() for q in quantiles}
+    }
+    
+    with open(os.path.join(output_dir, f'{sample_id}.json'), 'w') as f:
+        json.dump({k: v for k, v in result.items() if k != 'path'}, f)
+    
+    return result
+
+
+def load_summary(sample_id, output_dir=None):
+    """Load the stored summary of a previous sampling run."""
+    output_dir = output_dir or SAMPLES_DIR
+    path = os.path.join(output_dir, f'{os.path.basename(sample_id)}.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        summary = json.load(f)
+    summary['path'] = os.path.join(output_dir, f"{summary['id']}.npy")
+    return summary
+
+
+def open_samples(sample_id, output_dir=None):
+    """Memory-map the samples of a previous run (read-only)."""
+    output_dir = output_dir or SAMPLES_DIR
+    return np.load(os.path.join(output_dir, f'{os.path.basename(sample_id)}.npy'), mmap_mode='r')
@@ -0,0 +1,600 @@
+"""
+Strain design: reaction knockout sets that couple product secretion to growth.
+
+Designs are searched on the compressed model (services.compression) for
+the current conditions. Reactions that are fully coupled or merged into
+one chain are one reduced reaction, so knocking out any of them has the
+same effect; each reduced reaction is one knockout candidate and the
+design lists all its members. Candidates are reduced reactions with at
+least one gene-associated member, no boundary member, and flux in either
+reference solution (max growth, or max product at the minimum growth).
+
+Every design is scored the same way: maximum growth with the knockouts,
+then the product flux range at that growth. product_min > 0 means
+production is growth-coupled: any flux distribution at maximal growth
+secretes the product.
+
+Methods:
+    heuristic - beam search over knockout sets of growing size. All single
+                knockouts are scored first (essential candidates drop out),
+                then the best `beam` sets of each size are extended by one
+                more candidate. A set is only kept when it beats all its
+                evaluated subsets. Sets are scored across a worker pool
+                (services.parallel); each worker keeps one LP template and
+                each set is warm-started from the previous one. The search
+                stops at time_budget, keeping what was scored.
+    optknock  - bilevel MILP (Burgard et al. 2003): maximize product flux
+                over knockouts y, subject to the fluxes being optimal for
+                growth. The inner LP is replaced by its dual with strong
+                duality; products of binaries and dual variables are
+                linearized with DUAL_BOUND as big-M. Solved within
+                time_budget; the design found is scored like the heuristic
+                ones, and a design whose rescored product_max misses the
+                MILP objective is reported with status 'inconsistent'.
+
+Finished searches are cached by model, bounds, product, method and
+parameters, in memory and in data/strain_design/<key>.json; a search
+stopped by time_budget (or an unproven OptKnock incumbent) is not.
+
+Usage:
+    from services import strain_design
+    
+    product = strain_design.resolve_product(model, 'ethanol')
+    result = strain_design.run(model, product, method='heuristic', max_knockouts=3)
+    # result['designs'][0] -> {'knockouts': [...], 'growth': ..., 'product_min': ...}
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+import metrics
+from data_access import annotations, solver
+from . import compression, network, parallel
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '../../data/strain_design')
+
+METHODS = ('heuristic', 'optknock')
+FLUX_TOLERANCE = 1e-6  # Product flux above this counts as coupled
+GROWTH_TOLERANCE = 1e-6  # Relative slack when holding growth at its maximum
+DUAL_BOUND = 1000.0  # OptKnock: big-M for the duals of knockable reactions' bounds
+INTEGRALITY_TOLERANCE = 1e-9  # OptKnock (GLPK): y within this of 0 or 1; with big-M rows
+                              # the default 1e-5 lets knocked-out reactions carry flux
+OBJECTIVE_TOLERANCE = 1e-4  # OptKnock: relative gap allowed between the MILP and the rescored design
+TASKS_PER_PROCESS = 4  # Heuristic: chunks per worker per search level
+
+DEFAULTS = {
+    'max_knockouts': 3,
+    'min_growth': 0.1,  # share of the wild-type growth every design must keep
+    'beam': 10,  # heuristic: sets of each size extended to the next
+    'time_budget': 60.0,  # seconds
+    'designs': 10  # designs returned
+}
+
+_template = None  # Per process: the scoring LP of the last search
+_results = {}  # Cache key -> result
+
+
+def resolve_product(model, query):
+    """
+    Resolve a product query to an exchange reaction that can secrete it.
+    
+    Args:
+        query: Exchange reaction ID, or a metabolite query (KEGG ID,
+               name, ...) resolved with annotations.find_exchange_by_query
+    
+    Returns:
+        Exchange reaction ID
+    """
+    if query in model.reactions:
+        return query
+    result = annotations.find_exchange_by_query(model, query)
+    if not result['exchanges']:
+        raise ValueError(f"No exchange reaction found for '{query}'")
+    for exchange in result['exchanges']:
+        if exchange['bounds'][1] > 0:
+            return exchange['id']
+    raise ValueError(f"No exchange reaction for '{query}' allows secretion")
+
+
+def _setup(model, product_id, candidates=None, exclude=()):
+    """Reduced model at the current bounds, the product's reduced reaction and the knockout candidates."""
+    reduced = compression.get_reduced(model, compute=True)
+    if not compression.sync_bounds(reduced, model):
+        raise ValueError("The current bounds force flux through blocked reactions")
+    
+    located = compression.locate(reduced, reduced['reaction_ids'].index(product_id))
+    if located is None:
+        raise ValueError(f"Product exchange {product_id} cannot carry flux under the current conditions")
+    product_group, product_factor = located
+    
+    reduced_model = reduced['model']
+    objective_groups = {reduced_model.reactions.index(rxn)
+                        for rxn, coef in _objective_coefficients(reduced_model).items() if coef}
+    wanted = set(candidates) if candidates is not None else None
+    excluded = set(exclude)
+    
+    members = {}
+    for j, g in zip(reduced['member_index'].tolist(), reduced['member_group'].tolist()):
+        members.setdefault(g, []).append(model.reactions[j])
+    
+    groups, labels = [], {}
+    for g, rxns in sorted(members.items()):
+        if g == product_group or g in objective_groups:
+            continue
+        if any(rxn.boundary or rxn.id in excluded for rxn in rxns):
+            continue
+        genes = [rxn for rxn in rxns if rxn.gene_reaction_rule]
+        if not genes:
+            continue
+        if wanted is not None and not wanted & {rxn.id for rxn in rxns}:
+            continue
+        groups.append(g)
+        labels[g] = {'reaction': genes[0].id, 'members': [rxn.id for rxn in rxns]}
+    
+    return {
+        'reduced': reduced,
+        'product': product_id,
+        'product_group': product_group,
+        'product_factor': product_factor,
+        'candidates': groups,
+        'labels': labels
+    }
+
+
+def _objective_coefficients(model):
+    from cobra.util.solver import linear_reaction_coefficients
+    return linear_reaction_coefficients(model)
+
+
+def _template_matches(model, task):
+    if _template is None or _template['source'] is not model:
+        return False
+    if _template['product'] != (task['product_group'], task['product_factor']):
+        return False
+    lower = np.array([rxn.lower_bound for rxn in model.reactions])
+    upper = np.array([rxn.upper_bound for rxn in model.reactions])
+    return np.array_equal(lower, _template['lower']) and np.array_equal(upper, _template['upper'])
+
+
+def _build_template(model, task):
+    """Copy the reduced model with a growth floor row and the product flux expression."""
+    tmodel = model.copy()
+    prob = tmodel.problem
+    growth = tmodel.solver.objective.expression
+    floor = prob.Constraint(growth, name='strain_design_growth_floor')
+    tmodel.add_cons_vars([floor], sloppy=True)
+    rxn = tmodel.reactions[task['product_group']]
+    factor = task['product_factor']
+    return {
+        'source': model,
+        'model': tmodel,
+        'product': (task['product_group'], factor),
+        'lower': np.array([r.lower_bound for r in model.reactions]),
+        'upper': np.array([r.upper_bound for r in model.reactions]),
+        'growth': growth,
+        'direction': tmodel.solver.objective.direction,
+        'floor': floor,
+        'flux': factor * rxn.forward_variable - factor * rxn.reverse_variable
+    }
+
+
+def get_template(model, task):
+    """This process's scoring template, rebuilt when the model, bounds or product changed."""
+    global _template
+    if not _template_matches(model, task):
+        _template = _build_template(model, task)
+    return _template
+
+
+def _set_objective(template, expression, direction):
+    tmodel = template['model']
+    tmodel.solver.objective = tmodel.problem.Objective(expression, direction=direction, sloppy=True)
+
+
+def _score(template, knockouts, min_growth):
+    """
+    Growth and product range of one knockout set (reduced reaction indices).
+    
+    Returns:
+        dict with growth, product_min, product_max and viable (growth at
+        least min_growth)
+    """
+    tmodel = template['model']
+    reactions = [tmodel.reactions[g] for g in knockouts]
+    saved = [rxn.bounds for rxn in reactions]
+    for rxn in reactions:
+        rxn.bounds = (0.0, 0.0)
+    try:
+        growth = tmodel.slim_optimize(error_value=float('nan'))
+        if np.isnan(growth) or growth < min_growth:
+            return {'growth': 0.0 if np.isnan(growth) else float(growth), 'viable': False}
+        template['floor'].lb = growth - GROWTH_TOLERANCE * max(abs(growth), 1.0)
+        _set_objective(template, template['flux'], 'min')
+        product_min = tmodel.slim_optimize(error_value=float('nan'))
+        _set_objective(template, template['flux'], 'max')
+        product_max = tmodel.slim_optimize(error_value=float('nan'))
+    finally:
+        template['floor'].lb = None
+        _set_objective(template, template['growth'], template['direction'])
+        for rxn, bounds in zip(reactions, saved):
+            rxn.bounds = bounds
+    return {
+        'growth': float(growth),
+        'product_min': float(product_min),
+        'product_max': float(product_max),
+        'viable': not (np.isnan(product_min) or np.isnan(product_max))
+    }
+
+
+def _score_designs(model, task):
+    """Score a chunk of knockout sets on this process's template, until the deadline."""
+    template = get_template(model, task)
+    scores = []
+    for design in task['designs']:
+        if time.time() > task['deadline']:
+            scores.append(None)
+            continue
+        scores.append(_score(template, design, task['min_growth']))
+    return scores
+
+
+def _reference_fluxes(template, min_growth):
+    """Reduced fluxes at maximum growth, and at maximum product with growth at least min_growth."""
+    tmodel = template['model']
+    fluxes = []
+    try:
+        tmodel.slim_optimize()
+        fluxes.append(tmodel.solver.primal_values)
+        template['floor'].lb = min_growth
+        _set_objective(template, template['flux'], 'max')
+        tmodel.slim_optimize()
+        fluxes.append(tmodel.solver.primal_values)
+    finally:
+        template['floor'].lb = None
+        _set_objective(template, template['growth'], template['direction'])
+    return [
+        np.array([primal[rxn.forward_variable.name] - primal[rxn.reverse_variable.name]
+                  for rxn in tmodel.reactions])
+        for primal in fluxes
+    ]
+
+
+def _rank(score):
+    return (round(score['product_min'], 6), round(score['product_max'], 6), score['growth'])
+
+
+def _chunks(designs, processes):
+    size = max(1, -(-len(designs) // (processes * TASKS_PER_PROCESS)))
+    return [designs[i:i + size] for i in range(0, len(designs), size)]
+
+
+def _search(setup, params, wild_type, min_growth, candidates, deadline, processes):
+    """
+    Beam search over knockout sets; returns {design tuple: score} and whether it finished.
+    """
+    model = setup['reduced']['model']
+    base = {'product_group': setup['product_group'], 'product_factor': setup['product_factor'],
+            'min_growth': min_growth, 'deadline': deadline}
+    scores = {(): wild_type}
+    frontier = [()]
+    finished = True
+    
+    for size in range(1, params['max_knockouts'] + 1):
+        children, seen = [], set()
+        for parent in frontier:
+            for g in candidates:
+                if g in parent:
+                    continue
+                child = tuple(sorted(parent + (g,)))
+                if child not in seen and child not in scores:
+                    seen.add(child)
+                    children.append(child)
+        if not children:
+            break
+        
+        chunks = _chunks(children, processes)
+        results = parallel.map_model(model, _score_designs, [{**base, 'designs': c} for c in chunks],
+                                     processes=processes)
+        for chunk, chunk_scores in zip(chunks, results):
+            for child, score in zip(chunk, chunk_scores):
+                if score is None:
+                    finished = False
+                else:
+                    scores[child] = score
+        if not finished:
+            break
+        
+        if size == 1:
+            # Knockouts that stop growth on their own never take part in a design
+            candidates = [g for g in candidates if scores[(g,)]['viable']]
+        improving = [
+            child for child in children
+            if scores[child]['viable'] and all(
+                _rank(scores[child]) > _rank(scores[subset])
+                for subset in _subsets(child) if subset in scores and scores[subset]['viable']
+            )
+        ]
+        improving.sort(key=lambda child: _rank(scores[child]), reverse=True)
+        frontier = improving[:params['beam']]
+        if not frontier:
+            break
+    return scores, finished
+
+
+def _subsets(design):
+    return [design[:i] + design[i + 1:] for i in range(len(design))]
+
+
+def _optknock(setup, params, min_growth, candidates, time_budget):
+    """
+    Solve the OptKnock MILP on a copy of the reduced model.
+    
+    Returns:
+        (knockouts as reduced reaction indices or None, solver status,
+        MILP objective or None)
+    """
+    from optlang.symbolics import Zero
+    
+    tmodel = setup['reduced']['model'].copy()
+    prob = tmodel.problem
+    reactions = list(tmodel.reactions)
+    objective = {tmodel.reactions.index(rxn): coef for rxn, coef in _objective_coefficients(tmodel).items()}
+    knockable = set(candidates)
+    
+    def flux(rxn):
+        return {rxn.forward_variable: 1, rxn.reverse_variable: -1}
+    
+    duals = {met.id: prob.Variable(f'ok_dual_{met.id}') for met in tmodel.metabolites}
+    new = list(duals.values())
+    rows = []  # (constraint, coefficients) filled once the rows are in the solver
+    growth = {}  # variable -> coefficient in c·v
+    for j, coef in objective.items():
+        for var, sign in flux(reactions[j]).items():
+            growth[var] = growth.get(var, 0) + sign * coef
+    strong_duality = dict(growth)  # c·v - dual objective
+    
+    indicators = []
+    for j, rxn in enumerate(reactions):
+        lb, ub = rxn.bounds
+        # Only the duals of knockable bounds need the big-M cap
+        cap = DUAL_BOUND if j in knockable else None
+        alpha = prob.Variable(f'ok_alpha_{j}', lb=0, ub=cap)
+        beta = prob.Variable(f'ok_beta_{j}', lb=0, ub=cap)
+        new += [alpha, beta]
+        # Dual row: S_j^T λ + α_j - β_j = c_j
+        row = prob.Constraint(Zero, name=f'ok_dual_row_{j}', lb=objective.get(j, 0.0), ub=objective.get(j, 0.0))
+        coefficients = {duals[met.id]: c for met, c in rxn.metabolites.items()}
+        coefficients.update({alpha: 1, beta: -1})
+        rows.append((row, coefficients))
+        if j not in knockable:
+            strong_duality[alpha] = -ub
+            strong_duality[beta] = lb
+            continue
+        
+        # Bounds become l·y <= v <= u·y; a = y·α and b = y·β are linearized
+        y = prob.Variable(f'ok_y_{j}', type='binary', lb=0, ub=1)
+        a = prob.Variable(f'ok_a_{j}', lb=0, ub=DUAL_BOUND)
+        b = prob.Variable(f'ok_b_{j}', lb=0, ub=DUAL_BOUND)
+        new += [y, a, b]
+        indicators.append((j, y))
+        strong_duality[a] = -ub
+        strong_duality[b] = lb
+        specs = [
+            ('upper', {**flux(rxn), y: -ub}, None, 0),
+            ('lower', {**flux(rxn), y: -lb}, 0, None),
+        ]
+        for name, product, dual in (('a', a, alpha), ('b', b, beta)):
+            specs += [
+                (f'{name}_on', {product: 1, y: -DUAL_BOUND}, None, 0),
+                (f'{name}_dual', {product: 1, dual: -1}, None, 0),
+                (f'{name}_off', {product: 1, dual: -1, y: -DUAL_BOUND}, -DUAL_BOUND, None),
+            ]
+        for name, coefficients, row_lb, row_ub in specs:
+            row = prob.Constraint(Zero, name=f'ok_{name}_{j}', lb=row_lb, ub=row_ub)
+            rows.append((row, coefficients))
+    
+    # Strong duality (weak duality gives the other side)
+    rows.append((prob.Constraint(Zero, name='ok_strong_duality', lb=0),
+                 strong_duality))
+    rows.append((prob.Constraint(Zero, name='ok_min_growth', lb=min_growth), growth))
+    rows.append((prob.Constraint(Zero, name='ok_max_knockouts', lb=len(indicators) - params['max_knockouts']),
+                 {y: 1 for _, y in indicators}))
+    
+    tmodel.add_cons_vars(new + [row for row, _ in rows], sloppy=True)
+    tmodel.solver.update()
+    for row, coefficients in rows:
+        row.set_linear_coefficients(coefficients)
+    product = reactions[setup['product_group']]
+    factor = setup['product_factor']
+    tmodel.objective = prob.Objective(Zero, direction='max', sloppy=True)
+    tmodel.solver.objective.set_linear_coefficients(
+        {var: sign * factor for var, sign in flux(product).items()})
+    tmodel.solver.configuration.timeout = max(1, int(time_budget))
+    
+    if solver.solver_name(tmodel) == 'glpk':
+        import swiglpk as glpk
+        # Feasibility pump and proximity search find incumbents GLPK's
+        # branch and bound alone rarely reaches on a genome-scale bilevel MILP
+        iocp = tmodel.solver.configuration._iocp
+        iocp.fp_heur = glpk.GLP_ON
+        iocp.ps_heur = glpk.GLP_ON
+        # The limit applies to the LP relaxation and to branch and bound
+        # separately, and proximity search has its own
+        tmodel.solver.configuration.timeout = max(1, int(time_budget / 2))
+        iocp.ps_tm_lim = max(1000, int(time_budget * 1000 / 4))
+        iocp.tol_int = INTEGRALITY_TOLERANCE
+    
+    status = tmodel.solver.optimize()
+    values, objective = _mip_values(tmodel, [y for _, y in indicators], status)
+    if values is None:
+        return None, status, None
+    knockouts = tuple(sorted(j for (j, _), value in zip(indicators, values) if value < 0.5))
+    return knockouts, status, objective
+
+
+def _mip_values(tmodel, variables, status):
+    """
+    Indicator values and objective of the solution, or of GLPK's incumbent
+    when it stopped at the time limit; (None, None) without either.
+    """
+    if status == 'optimal':
+        return [var.primal for var in variables], tmodel.solver.objective.value
+    if solver.solver_name(tmodel) != 'glpk':
+        return None, None
+    import swiglpk as glpk
+    problem = tmodel.solver.problem
+    if glpk.glp_mip_status(problem) != glpk.GLP_FEAS:
+        return None, None
+    return [glpk.glp_mip_col_val(problem, var._index) for var in variables], glpk.glp_mip_obj_val(problem)
+
+
+def _agrees(score, objective):
+    """Whether the rescored design reaches the product flux the MILP claims for it."""
+    if not score['viable']:
+        return False
+    return abs(score['product_max'] - objective) <= OBJECTIVE_TOLERANCE * max(1.0, abs(objective))
+
+
+def _cache_key(model, product_id, method, params):
+    spec = {
+        'model': network._model_hash(model),
+        'bounds': solver.bounds_fingerprint(model),
+        'solver': solver.solver_name(model),
+        'product': product_id,
+        'method': method,
+        'params': params
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+
+
+def _cache_path(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f'{key}.json')
+
+
+def _design(setup, knockouts, score):
+    labels = setup['labels']
+    return {
+        'knockouts': [labels[g]['reaction'] for g in knockouts],
+        'equivalent': {labels[g]['reaction']: labels[g]['members'] for g in knockouts},
+        'growth': score['growth'],
+        'product_min': score['product_min'],
+        'product_max': score['product_max'],
+        'coupled': score['product_min'] > FLUX_TOLERANCE
+    }
+
+
+def _minimal(scores):
+    """Viable knockout sets that beat the wild type and that no evaluated subset matches, best first."""
+    designs = []
+    for design, score in scores.items():
+        if not design or not score['viable'] or _rank(score) <= _rank(scores[()]):
+            continue
+        if any(subset in scores and scores[subset]['viable'] and _rank(scores[subset]) >= _rank(score)
+               for subset in _subsets(design)):
+            continue
+        designs.append(design)
+    designs.sort(key=lambda design: _rank(scores[design]), reverse=True)
+    return designs
+
+
+@metrics.timed('strain_design.run')
+def run(model, product, method='heuristic', processes=None, candidates=None, exclude=(),
+        refresh=False, cache_dir=None, **options):
+    """
+    Search knockout sets that couple product secretion to growth.
+    
+    Args:
+        model: COBRA model with the desired bounds already applied
+        product: Exchange reaction ID of the product (see resolve_product)
+        method: 'heuristic' or 'optknock'
+        processes: Heuristic worker processes (default: cobra's configuration)
+        candidates: Reaction IDs to restrict knockouts to (default: all
+                    gene-associated reactions carrying flux)
+        exclude: Reaction IDs never knocked out
+        refresh: Recompute even if cached
+        cache_dir: Directory of the result cache (default data/strain_design)
+        **options: max_knockouts, min_growth, beam, time_budget, designs
+                   (see DEFAULTS)
+    
+    Returns:
+        dict with product, method, wild_type, designs (best first), the
+        number of candidates and evaluated sets, whether the search
+        finished within the budget, seconds and 'cached'
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method: {method}")
+    unknown = set(options) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown option(s): {', '.join(sorted(unknown))}")
+    params = {**DEFAULTS, **{k: v for k, v in options.items() if v is not None}}
+    params['candidates'] = sorted(candidates) if candidates is not None else None
+    params['exclude'] = sorted(exclude)
+    
+    key = _cache_key(model, product, method, params)
+    if not refresh:
+        if key in _results:
+            return {**_results[key], 'cached': 'memory'}
+        path = _cache_path(key, cache_dir)
+        if os.path.exists(path):
+            with open(path) as f:
+                _results[key] = json.load(f)
+            return {**_results[key], 'cached': 'disk'}
+    
+    start = time.perf_counter()
+    deadline = time.time() + params['time_budget']
+    if processes is None:
+        processes = parallel.default_processes()
+    setup = _setup(model, product, candidates, exclude)
+    task = {'product_group': setup['product_group'], 'product_factor': setup['product_factor']}
+    template = get_template(setup['reduced']['model'], task)
+    wild_type = _score(template, (), 0.0)
+    if not wild_type['viable'] or wild_type['growth'] <= 0:
+        raise ValueError("The model does not grow under the current conditions")
+    min_growth = params['min_growth'] * wild_type['growth']
+    
+    active = np.zeros(len(setup['reduced']['model'].reactions), dtype=bool)
+    for fluxes in _reference_fluxes(template, min_growth):
+        active |= np.abs(fluxes) > FLUX_TOLERANCE
+    candidates = [g for g in setup['candidates'] if active[g]]
+    
+    if method == 'heuristic':
+        scores, finished = _search(setup, params, wild_type, min_growth, candidates, deadline, processes)
+        status = 'finished' if finished else 'time_budget'
+    else:
+        knockouts, status, objective = _optknock(setup, params, min_growth, candidates, deadline - time.time())
+        scores = {(): wild_type}
+        if knockouts is not None:
+            for design in [knockouts] + _subsets(knockouts):
+                if design not in scores:
+                    scores[design] = _score(template, design, min_growth)
+            if not _agrees(scores[knockouts], objective):
+                # Numerical trouble in the big-M rows: the MILP's optimum is not trusted
+                status = 'inconsistent'
+        finished = status == 'optimal'
+    
+    result = {
+        'product': product,
+        'method': method,
+        'params': params,
+        'wild_type': {k: wild_type[k] for k in ('growth', 'product_min', 'product_max')},
+        'min_growth': min_growth,
+        'designs': [_design(setup, design, scores[design]) for design in _minimal(scores)[:params['designs']]],
+        'candidates': len(candidates),
+        'evaluated': len(scores),
+        'status': status,
+        'finished': finished,
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+    if method == 'optknock':
+        result['milp_objective'] = objective
+    if finished:
+        # A search cut short by the budget is recomputed next time, not replayed
+        _results[key] = result
+        os.makedirs(cache_dir or CACHE_DIR, exist_ok=True)
+        with open(_cache_path(key, cache_dir), 'w') as f:
+            json.dump(result, f)
+    return {**result, 'cached': False}
@@ -0,0 +1,168 @@
+"""
+Condition sweep / phenotype phase plane service.
+
+Sweeps the bounds of one or two exchange reactions over a grid and returns
+the objective surface with the shadow prices of the swept metabolites.
+Grid rows are solved in parallel worker processes; within a row each LP is
+warm-started from the basis of its neighbor (no basis reset between points),
+and rows alternate direction so a worker's next row starts next to where
+its previous row ended.
+
+Usage:
+    from services import sweep
+    
+    glucose = sweep.build_axis(model, 'r_1714', -10, 0, 21)
+    oxygen = sweep.build_axis(model, 'r_1992', -20, 0, 21)
+    result = sweep.run(model, [glucose, oxygen], processes=4)
+    # result['objective'][i][j] -> objective at glucose[i], oxygen[j]
+"""
+
+import time
+
+import numpy as np
+
+from data_access import annotations
+from . import parallel
+
+
+def resolve_exchange(model, query):
+    """Resolve a metabolite query (KEGG ID, name, ...) to an exchange reaction ID."""
+    result = annotations.find_exchange_by_query(model, query)
+    if not result['exchanges']:
+        raise ValueError(f"No exchange reaction found for '{query}'")
+    return result['exchanges'][0]['id']
+
+
+def build_axis(model, reaction_id, start, stop, steps, bound='lower'):
+    """
+    Build a sweep axis over one reaction bound.
+    
+    Args:
+        model: COBRA model
+        reaction_id: Reaction whose bound is swept
+        start, stop, steps: Grid values (inclusive, evenly spaced)
+        bound: 'lower', 'upper' or 'fixed' (both bounds set to the value)
+    
+    Returns:
+        Axis dict with reaction, bound, values and the metabolites whose
+        shadow prices are reported
+    """
+    if bound not in ('lower', 'upper', 'fixed'):
+        raise ValueError(f"Unknown bound type: {bound}")
+    if steps < 1:
+        raise ValueError("Axis needs at least one step")
+    
+    rxn = model.reactions.get_by_id(reaction_id)
+    return {
+        'reaction': rxn.id,
+        'name': rxn.name,
+        'bound': bound,
+        'values': np.linspace(start, stop, int(steps)).tolist(),
+        'metabolites': [m.id for m in rxn.metabolites]
+    }
+
+
+def _set_bound(model, reaction_id, bound, value):
+    rxn = model.reactions.get_by_id(reaction_id)
+    if bound == 'fixed':
+        rxn.bounds = (value, value)
+    elif bound == 'lower':
+        rxn.bounds = (value, max(value, rxn.upper_bound))
+    else:
+        rxn.bounds = (min(value, rxn.lower_bound), value)
+
+
+def _solve_row(model, task):
+    """Solve one grid row, each point warm-started from the previous one."""
+    column = task['column']
+    points = []
+    with model:
+        if task['row'] is not None:
+            _set_bound(model, *task['row'])
+        
+        for j in task['columns']:
+            _set_bound(model, column['reaction'], column['bound'], column['values'][j])
+            value = model.slim_optimize(error_value=float('nan'))
+            if np.isnan(value):
+                value = None
+                prices = [None] * len(task['metabolites'])
+            else:
+                prices = [model.constraints[m].dual for m in task['metabolites']]
+            points.append((j, value, model.solver.status, prices))
+    
+    return task['row_index'], points
+
+
+def run(model, axes, processes=None):
+    """
+    Solve the objective over the grid spanned by one or two axes.
+    
+    Args:
+        model: COBRA model with the base conditions applied
+        axes: List of one or two axes from build_axis (rows, then columns)
+        processes: Worker processes (default: cobra's configuration)
+    
+    Returns:
+        dict with the axes, objective surface, solver status and shadow
+        prices per swept metabolite (nested [row][column] lists for two
+        axes, flat lists for one)
+    """
+    if len(axes) not in (1, 2):
+        raise ValueError("Sweep needs one or two axes")
+    
+    start = time.perf_counter()
+    column = axes[-1]
+    n_cols = len(column['values'])
+    metabolites = list(dict.fromkeys(m for axis in axes for m in axis['metabolites']))
+    
+    tasks = []
+    if len(axes) == 2:
+        row_axis = axes[0]
+        for i, value in enumerate(row_axis['values']):
+            columns = list(range(n_cols))
+            if i % 2:
+                columns.reverse()
+            tasks.append({
+                'row_index': i,
+                'row': (row_axis['reaction'], row_axis['bound'], value),
+                'column': column,
+                'columns': columns,
+                'metabolites': metabolites
+            })
+        n_rows = len(row_axis['values'])
+    else:
+        # One axis: split it into contiguous segments, one per worker
+        n_segments = processes or parallel.default_processes()
+        for segment in np.array_split(np.arange(n_cols), max(1, min(n_segments, n_cols))):
+            tasks.append({
+                'row_index': 0,
+                'row': None,
+                'column': column,
+                'columns': segment.tolist(),
+                'metabolites': metabolites
+            })
+        n_rows = 1
+    
+    objective = [[None] * n_cols for _ in range(n_rows)]
+    status = [[None] * n_cols for _ in range(n_rows)]
+    shadow_prices = {m: [[None] * n_cols for _ in range(n_rows)] for m in metabolites}
+    
+    for i, points in parallel.map_model(model, _solve_row, tasks, processes):
+        for j, value, point_status, prices in points:
+            objective[i][j] = value
+            status[i][j] = point_status
+            for m, price in zip(metabolites, prices):
+                shadow_prices[m][i][j] = price
+    
+    if len(axes) == 1:
+        objective = objective[0]
+        status = status[0]
+        shadow_prices = {m: grid[0] for m, grid in shadow_prices.items()}
+    
+    return {
+        'axes': axes,
+        'objective': objective,
+        'status': status,
+        'shadow_prices': shadow_prices,
+        'seconds': round(time.perf_counter() - start, 3)
+    }
@@ -0,0 +1,672 @@
+"""
+Concentration-aware reaction energies and Max-min Driving Force (MDF).
+
+    ΔG' = ΔG'° + RT · Sᵀ · ln(c)
+
+ΔG'° (kJ/mol) comes from the thermo cache; c are per-metabolite
+concentrations (M), bounded by data/concentrations.json (a default range
+plus fixed cofactors), optionally layered with a user file and per-request
+values. A metabolite's bounds apply in its own compartment, so transport
+reactions see their concentration gradient.
+
+MDF (Noor et al. 2014) is the largest B such that every reaction of a
+pathway, run in its flux direction d, has -ΔG' >= B at some concentrations
+within the bounds:
+    maximize B
+    s.t. d_j (ΔG'°_j + RT Σ_i S_ij x_i) + B <= 0    for every reaction j
+         ln(lower_i) <= x_i <= ln(upper_i)
+MDF > 0 means the pathway can run forward at physiological levels; the
+reactions with a nonzero shadow price are its bottlenecks.
+
+The consistency scan checks a whole flux solution at once: flux directions
+against ΔG'° ± k·uncertainty (vectorized over the active reactions) and
+loops among active internal reactions (one LP), cheap enough to run after
+every optimize.
+
+The model's stoichiometric matrix is stored once per model and thermo
+version, sorted by reaction, so each LP is a numpy slice of it loaded into
+GLPK with a single glp_load_matrix call.
+
+Usage:
+    from services import thermodynamics
+    
+    bounds = thermodynamics.concentration_bounds(overrides={'s_0434': 3e-3})
+    energies = thermodynamics.reaction_dg(['r_0534', 'r_0886'], bounds)
+    results = thermodynamics.scan({'glycolysis': [...], 'TCA': [...]}, bounds)
+    check = thermodynamics.consistency_scan(cobra_model.get_flux_vector())
+"""
+
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+import metrics
+from data_access import cobra_model, thermo
+
+CONCENTRATIONS_PATH = os.path.join(os.path.dirname(__file__), '../../data/concentrations.json')
+
+GAS_CONSTANT = 8.31446261815324e-3  # kJ/(mol K)
+TEMPERATURE = 298.15  # K, as the ΔG'° in the thermo cache
+RT = GAS_CONSTANT * TEMPERATURE
+
+MAX_UNCERTAINTY = 1000.0  # kJ/mol; above this ΔG'° counts as not estimated
+FLUX_TOLERANCE = 1e-6  # |flux| below this is inactive when directions follow the flux
+BOTTLENECK_TOLERANCE = 1e-9  # Shadow price above this marks a bottleneck
+DEFAULT_K = 2.0  # Consistency scan: uncertainties allowed in favor of the flux direction
+
+_bounds_files = {}  # path -> (mtime, parsed file)
+_system = {'key': None}
+_default_bounds = {'key': None}  # Bounds from data/concentrations.json alone
+
+
+def read_bounds_file(path):
+    """
+    Parse a concentration bounds file (re-read when the file changes).
+    
+    JSON files follow data/concentrations.json ({"default": {"lower",
+    "upper"}, "compounds": {id: {"lower", "upper"}}}); CSV/TSV files need
+    id, lower and upper columns. IDs are compound cache IDs (kegg:C00002)
+    or model metabolite IDs (s_0434).
+    
+    Returns:
+        dict with default ((lower, upper) or None) and entries (id -> (lower, upper))
+    """
+    mtime = os.path.getmtime(path)
+    cached = _bounds_files.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    if path.endswith('.json'):
+        with open(path) as f:
+            data = json.load(f)
+        default = data.get('default')
+        parsed = {
+            'default': _check_range(path, 'default', default['lower'], default['upper']) if default else None,
+            'entries': {
+                key: _check_range(path, key, entry['lower'], entry['upper'])
+                for key, entry in data.get('compounds', {}).items()
+            }
+        }
+    else:
+        with open(path, newline='') as f:
+            delimiter = '\t' if path.endswith(('.tsv', '.txt')) else ','
+            rows = list(csv.DictReader(f, delimiter=delimiter))
+        if rows and not {'id', 'lower', 'upper'} <= set(rows[0]):
+            raise ValueError(f'{path}: expected id, lower and upper columns')
+        parsed = {
+            'default': None,
+            'entries': {row['id']: _check_range(path, row['id'], row['lower'], row['upper']) for row in rows}
+        }
+    _bounds_files[path] = (mtime, parsed)
+    return parsed
+
+
+def _check_range(source, key, lower, upper):
+    lower, upper = float(lower), float(upper)
+    if not 0 < lower <= upper:
+        raise ValueError(f'{source}: bounds for {key} must satisfy 0 < lower <= upper, got [{lower}, {upper}]')
+    return lower, upper
+
+
+@metrics.timed('thermodynamics.system')
+def build_system(model):
+    """
+    Stoichiometry and ΔG'° arrays for a model.
+    
+    Returns:
+        dict with reaction_ids, reaction_index, met_ids, met_index,
+        compound_keys (compound cache ID per metabolite, None if unmapped),
+        the stoichiometric matrix as nonzeros sorted by reaction (rows =
+        metabolite positions, coefs, indptr: reaction j owns
+        indptr[j]:indptr[j + 1]), internal (bool per reaction) and dg0 /
+        uncertainty per reaction (NaN without an estimate)
+    """
+    met_ids = [m.id for m in model.metabolites]
+    met_index = {m: i for i, m in enumerate(met_ids)}
+    reaction_ids = [rxn.id for rxn in model.reactions]
+    
+    rows, coefs, counts = [], [], []
+    for rxn in model.reactions:
+        counts.append(len(rxn.metabolites))
+        for met, coef in rxn.metabolites.items():
+            rows.append(met_index[met.id])
+            coefs.append(coef)
+    
+    dg0 = np.full(len(reaction_ids), np.nan)
+    uncertainty = np.full(len(reaction_ids), np.nan)
+    for j, rxn_id in enumerate(reaction_ids):
+        t = (thermo.get_reaction(rxn_id) or {}).get('thermodynamics') or {}
+        if t.get('dG_prime') is not None:
+            dg0[j] = t['dG_prime']
+            uncertainty[j] = t['uncertainty'] if t.get('uncertainty') is not None else np.nan
+    
+    coefs = np.array(coefs, dtype=float)
+    columns = np.repeat(np.arange(len(reaction_ids)), counts)
+    # Internal: consumes and produces something (not an exchange, sink or demand)
+    internal = ((np.bincount(columns, coefs < 0, minlength=len(reaction_ids)) > 0)
+                & (np.bincount(columns, coefs > 0, minlength=len(reaction_ids)) > 0))
+    
+    compound_keys = []
+    for met_id in met_ids:
+        compound = thermo.get_compound_by_met_id(met_id)
+        compound_keys.append(compound.get('queried_as') if compound else None)
+    
+    return {
+        'reaction_ids': reaction_ids,
+        'reaction_index': {r: j for j, r in enumerate(reaction_ids)},
+        'met_ids': met_ids,
+        'met_index': met_index,
+        'compound_keys': compound_keys,
+        'rows': np.array(rows, dtype=np.intp),
+        'coefs': coefs,
+        'indptr': np.concatenate([[0], np.cumsum(counts)]).astype(np.intp),
+        'internal': internal,
+        'dg0': dg0,
+        'uncertainty': uncertainty
+    }
+
+
+def get_system(model=None):
+    """System arrays for a model (default: the loaded one), rebuilt when it or the thermo cache changes."""
+    global _system
+    model = model or cobra_model.get_model()
+    if model is None:
+        raise ValueError('No model loaded')
+    key = (id(model), cobra_model.get_model_hash() if model is cobra_model.get_model() else None, thermo.version())
+    if _system['key'] != key:
+        _system = {'key': key, **build_system(model)}
+    return _system
+
+
+def concentration_bounds(files=(), overrides=None, model=None):
+    """
+    Per-metabolite log-concentration bounds.
+    
+    Layers, later ones winning: data/concentrations.json, each file in
+    files, then overrides. Within a layer, compound IDs apply to the
+    compound in every compartment and metabolite IDs to that metabolite.
+    
+    Args:
+        files: Paths of user bounds files (see read_bounds_file)
+        overrides: {id: concentration (fixed) or [lower, upper]} in M
+        model: COBRA model (default: the loaded one)
+    
+    Returns:
+        dict with ln_lower and ln_upper (arrays over the system's
+        metabolites) and unmatched (IDs that matched no metabolite)
+    """
+    system = get_system(model)
+    default_key = (system['key'], os.path.getmtime(CONCENTRATIONS_PATH))
+    if not files and not overrides and _default_bounds['key'] == default_key:
+        return _default_bounds['bounds']
+    layers = [read_bounds_file(CONCENTRATIONS_PATH)] + [read_bounds_file(path) for path in files]
+    if overrides:
+        layers.append({'default': None, 'entries': {
+            key: _check_range('concentrations', key, *(value if isinstance(value, (list, tuple)) else (value, value)))
+            for key, value in overrides.items()
+        }})
+    
+    by_compound = {}
+    for i, key in enumerate(system['compound_keys']):
+        if key is not None:
+            by_compound.setdefault(key, []).append(i)
+    
+    lower = np.empty(len(system['met_ids']))
+    upper = np.empty(len(system['met_ids']))
+    unmatched = []
+    for layer in layers:
+        if layer['default'] is not None:
+            lower[:], upper[:] = layer['default']
+        # Compound-wide entries first, so a metabolite entry in the same layer wins
+        entries = sorted(layer['entries'].items(), key=lambda item: item[0] in system['met_index'])
+        for key, (lb, ub) in entries:
+            if key in system['met_index']:
+                positions = [system['met_index'][key]]
+            else:
+                positions = by_compound.get(key) or by_compound.get(f'kegg:{key}')
+            if not positions:
+                unmatched.append(key)
+                continue
+            lower[positions], upper[positions] = lb, ub
+    
+    bounds = {'ln_lower': np.log(lower), 'ln_upper': np.log(upper), 'unmatched': sorted(set(unmatched))}
+    if not files and not overrides:
+        _default_bounds.update(key=default_key, bounds=bounds)
+    return bounds
+
+
+def _positions(system, reaction_ids):
+    """Reaction positions; raises ValueError for unknown IDs."""
+    index = system['reaction_index']
+    missing = [r for r in reaction_ids if r not in index]
+    if missing:
+        raise ValueError(f"Reaction(s) not in model: {', '.join(missing)}")
+    return np.array([index[r] for r in reaction_ids], dtype=np.intp)
+
+
+def _gather(system, positions):
+    """Nonzeros of the given reactions: (nonzero positions, local reaction index of each)."""
+    indptr = system['indptr']
+    starts = indptr[positions]
+    counts = indptr[positions + 1] - starts
+    local = np.repeat(np.arange(len(positions)), counts)
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+    return offsets + np.arange(counts.sum()), local
+
+
+def _term_range(system, positions, ln_lower, ln_upper):
+    """Lowest and highest Sᵀ ln(c) of reactions over the concentration bounds."""
+    nz, local = _gather(system, positions)
+    rows, coefs = system['rows'][nz], system['coefs'][nz]
+    n = len(positions)
+    # Lowest ΔG': products at their lower bound, substrates at their upper
+    term_min = np.bincount(local, coefs * np.where(coefs > 0, ln_lower[rows], ln_upper[rows]), minlength=n)
+    term_max = np.bincount(local, coefs * np.where(coefs > 0, ln_upper[rows], ln_lower[rows]), minlength=n)
+    return term_min, term_max
+
+
+def reaction_dg(reaction_ids, bounds, concentrations=None, model=None):
+    """
+    ΔG' of reactions at given concentrations and over the concentration bounds.
+    
+    Args:
+        reaction_ids: Reaction IDs
+        bounds: Result of concentration_bounds
+        concentrations: {metabolite ID: M}; other metabolites sit at the
+                        geometric mean of their bounds
+        model: COBRA model (default: the loaded one)
+    
+    Returns:
+        List of dicts (id, dG0, uncertainty, dG_prime, dG_prime_min,
+        dG_prime_max), None where the reaction has no ΔG'° estimate
+    """
+    system = get_system(model)
+    positions = _positions(system, reaction_ids)
+    ln_lower, ln_upper = bounds['ln_lower'], bounds['ln_upper']
+    
+    x = (ln_lower + ln_upper) / 2
+    for met_id, value in (concentrations or {}).items():
+        if met_id not in system['met_index']:
+            raise ValueError(f'Metabolite {met_id} not in model')
+        if not value > 0:
+            raise ValueError(f'Concentration of {met_id} must be positive')
+        x[system['met_index'][met_id]] = np.log(value)
+    
+    nz, local = _gather(system, positions)
+    term = np.bincount(local, system['coefs'][nz] * x[system['rows'][nz]], minlength=len(positions))
+    term_min, term_max = _term_range(system, positions, ln_lower, ln_upper)
+    
+    dg0 = system['dg0'][positions]
+    uncertainty = system['uncertainty'][positions]
+    return [
+        {
+            'id': rxn_id,
+            'dG0': _value(dg0[k]),
+            'uncertainty': _value(uncertainty[k]),
+            'dG_prime': _value(dg0[k] + RT * term[k]),
+            'dG_prime_min': _value(dg0[k] + RT * term_min[k]),
+            'dG_prime_max': _value(dg0[k] + RT * term_max[k])
+        }
+        for k, rxn_id in enumerate(reaction_ids)
+    ]
+
+
+def _value(v):
+    return None if np.isnan(v) else float(v)
+
+
+def directions_for(mode, model=None):
+    """
+    Direction (+1, -1, 0 = not running) of every reaction.
+    
+    Args:
+        mode: 'flux' (sign of the current solution) or 'forward'
+    """
+    system = get_system(model)
+    if mode == 'forward':
+        return np.ones(len(system['reaction_ids']))
+    if mode == 'flux':
+        fluxes = cobra_model.get_flux_vector()
+        if fluxes is None or (model is not None and model is not cobra_model.get_model()):
+            raise ValueError('No current solution; run FBA first or use forward directions')
+        return np.where(np.abs(fluxes) > FLUX_TOLERANCE, np.sign(fluxes), 0.0)
+    raise ValueError(f"Unknown directions {mode!r}, expected 'flux' or 'forward'")
+
+
+def _load_matrix(glpk, problem, ia, ja, ar):
+    """glp_load_matrix from 1-based numpy triplets (element 0 unused)."""
+    ia_arr, ja_arr, ar_arr = glpk.intArray(len(ia)), glpk.intArray(len(ia)), glpk.doubleArray(len(ia))
+    for k, (i, j, a) in enumerate(zip(ia.tolist(), ja.tolist(), ar.tolist())):
+        ia_arr[k], ja_arr[k], ar_arr[k] = i, j, a
+    glpk.glp_load_matrix(problem, len(ia) - 1, ia_arr, ja_arr, ar_arr)
+
+
+def _simplex(glpk, problem):
+    parm = glpk.glp_smcp()
+    glpk.glp_init_smcp(parm)
+    parm.msg_lev = glpk.GLP_MSG_OFF
+    glpk.glp_simplex(problem, parm)
+
+
+def _solve_mdf(system, positions, directions, ln_lower, ln_upper):
+    """
+    MDF LP over the given reactions, all with an estimate and a direction.
+    
+    Returns:
+        (status, B, metabolite positions, their ln concentrations, row duals)
+    """
+    import swiglpk as glpk
+    
+    nz, local = _gather(system, positions)
+    mets, met_local = np.unique(system['rows'][nz], return_inverse=True)
+    n, m = len(positions), len(mets)
+    
+    problem = glpk.glp_create_prob()
+    try:
+        glpk.glp_set_obj_dir(problem, glpk.GLP_MAX)
+        glpk.glp_add_rows(problem, n)
+        glpk.glp_add_cols(problem, m + 1)
+        rhs = -directions * system['dg0'][positions]
+        for i in range(n):
+            glpk.glp_set_row_bnds(problem, i + 1, glpk.GLP_UP, 0.0, float(rhs[i]))
+        for k in range(m):
+            lb, ub = float(ln_lower[mets[k]]), float(ln_upper[mets[k]])
+            glpk.glp_set_col_bnds(problem, k + 1, glpk.GLP_FX if lb == ub else glpk.GLP_DB, lb, ub)
+        glpk.glp_set_col_bnds(problem, m + 1, glpk.GLP_FR, 0.0, 0.0)
+        glpk.glp_set_obj_coef(problem, m + 1, 1.0)
+        
+        # Row j: d_j RT S_ij x_i over its metabolites, plus B
+        ia = np.concatenate([[0], local + 1, np.arange(1, n + 1)])
+        ja = np.concatenate([[0], met_local + 1, np.full(n, m + 1)])
+        ar = np.concatenate([[0.0], RT * directions[local] * system['coefs'][nz], np.ones(n)])
+        _load_matrix(glpk, problem, ia, ja, ar)
+        _simplex(glpk, problem)
+        if glpk.glp_get_status(problem) != glpk.GLP_OPT:
+            return 'infeasible', None, mets, None, None
+        x = np.array([glpk.glp_get_col_prim(problem, k + 1) for k in range(m)])
+        duals = np.array([glpk.glp_get_row_dual(problem, i + 1) for i in range(n)])
+        return 'optimal', glpk.glp_get_obj_val(problem), mets, x, duals
+    finally:
+        glpk.glp_delete_prob(problem)
+
+
+def mdf(reaction_ids, bounds, directions, model=None, detail=True, name=None):
+    """
+    Max-min Driving Force of one reaction set.
+    
+    Reactions without a ΔG'° estimate (or with uncertainty above
+    MAX_UNCERTAINTY) and reactions with direction 0 are left out and listed.
+    
+    Args:
+        reaction_ids: Reaction IDs of the pathway
+        bounds: Result of concentration_bounds
+        directions: Array from directions_for (aligned to the model's reactions)
+        model: COBRA model (default: the loaded one)
+        detail: Include driving forces and optimal concentrations
+        name: Label echoed in the result
+    
+    Returns:
+        dict with name, status ('optimal', 'infeasible' or 'empty'), mdf
+        (kJ/mol, None unless optimal), feasible (mdf > 0), reactions (count
+        used), skipped ({'no_estimate': [...], 'inactive': [...]}),
+        bottlenecks (id, shadow_price, driving_force; largest price first)
+        and, with detail, driving_forces and concentrations (M)
+    """
+    system = get_system(model)
+    positions = _positions(system, list(dict.fromkeys(reaction_ids)))
+    dg0, uncertainty = system['dg0'][positions], system['uncertainty'][positions]
+    d = directions[positions]
+    no_estimate = np.isnan(dg0) | (uncertainty > MAX_UNCERTAINTY)
+    inactive = ~no_estimate & (d == 0)
+    used = positions[~no_estimate & ~inactive]
+    
+    ids = system['reaction_ids']
+    result = {
+        'name': name,
+        'status': 'empty',
+        'mdf': None,
+        'feasible': False,
+        'reactions': len(used),
+        'skipped': {
+            'no_estimate': [ids[j] for j in positions[no_estimate]],
+            'inactive': [ids[j] for j in positions[inactive]]
+        },
+        'bottlenecks': []
+    }
+    if len(used) == 0:
+        return result
+    
+    d = directions[used]
+    status, value, mets, x, duals = _solve_mdf(system, used, d, bounds['ln_lower'], bounds['ln_upper'])
+    result['status'] = status
+    if status != 'optimal':
+        return result
+    
+    # Driving force -d ΔG' per reaction at the optimal concentrations
+    ln_c = np.zeros(len(system['met_ids']))
+    ln_c[mets] = x
+    nz, local = _gather(system, used)
+    dg = system['dg0'][used] + RT * np.bincount(local, system['coefs'][nz] * ln_c[system['rows'][nz]],
+                                                minlength=len(used))
+    force = -d * dg
+    
+    order = np.argsort(-np.abs(duals))
+    result.update({
+        'mdf': float(value),
+        'feasible': bool(value > 0),
+        'bottlenecks': [
+            {'id': ids[used[k]], 'shadow_price': float(abs(duals[k])), 'driving_force': float(force[k])}
+            for k in order if abs(duals[k]) > BOTTLENECK_TOLERANCE
+        ]
+    })
+    if detail:
+        result['driving_forces'] = {ids[j]: float(f) for j, f in zip(used, force)}
+        result['concentrations'] = {system['met_ids'][i]: float(np.exp(v)) for i, v in zip(mets, x)}
+    return result
+
+
+@metrics.timed('thermodynamics.scan')
+def scan(pathways, bounds, directions='flux', model=None, detail=False):
+    """
+    MDF of many reaction sets, ranked.
+    
+    Args:
+        pathways: {name: reaction IDs}, e.g. pathway.subsystem_reaction_ids()
+        bounds: Result of concentration_bounds
+        directions: 'flux' or 'forward' (see directions_for)
+        model: COBRA model (default: the loaded one)
+        detail: Include driving forces and concentrations per pathway
+    
+    Returns:
+        List of mdf results, highest MDF first (pathways that could not be
+        solved last)
+    """
+    d = directions_for(directions, model)
+    results = [
+        mdf(reaction_ids, bounds, d, model=model, detail=detail, name=name)
+        for name, reaction_ids in pathways.items()
+    ]
+    results.sort(key=lambda r: (r['mdf'] is None, -(r['mdf'] or 0.0)))
+    return results
+
+
+@metrics.timed('thermodynamics.consistency')
+def consistency_scan(fluxes, k=DEFAULT_K, bounds=None, model=None, limit=None):
+    """
+    Check a flux solution against reaction thermodynamics.
+    
+    Every active reaction with an estimate is compared in its flux
+    direction d against ΔG'° ± k·uncertainty:
+        margin   = d·ΔG'° - k·σ                 > 0: runs against ΔG'°
+        residual = margin + most favorable RT·d·Sᵀ ln(c) within the bounds
+    Flagged reactions are 'infeasible' when residual > 0 (no concentrations
+    within the bounds make the direction downhill) and 'unfavorable'
+    otherwise. Separately, flux around internal loops (a subset of active
+    internal reactions with zero net stoichiometry, which no set of
+    chemical potentials can drive) is found with one LP.
+    
+    Args:
+        fluxes: Flux array aligned to the model's reactions
+        k: Uncertainty multiplier
+        bounds: Result of concentration_bounds (default: data/concentrations.json)
+        model: COBRA model (default: the loaded one)
+        limit: Longest reaction list to return (default: all)
+    
+    Returns:
+        dict with k, active, checked (active with an estimate), flagged and
+        infeasible counts, reactions (ranked by residual, then margin: id,
+        flux, dG0, uncertainty, margin, residual, severity), cycles (see
+        find_cycles) and seconds
+    """
+    start = time.perf_counter()
+    system = get_system(model)
+    bounds = bounds or concentration_bounds(model=model)
+    fluxes = np.asarray(fluxes, dtype=float)
+    d = np.where(np.abs(fluxes) > FLUX_TOLERANCE, np.sign(fluxes), 0.0)
+    
+    active = np.flatnonzero(d)
+    dg0, uncertainty = system['dg0'][active], np.nan_to_num(system['uncertainty'][active])
+    checked = active[~np.isnan(dg0) & (uncertainty <= MAX_UNCERTAINTY)]
+    dg0, uncertainty = system['dg0'][checked], np.nan_to_num(system['uncertainty'][checked])
+    direction = d[checked]
+    
+    margin = direction * dg0 - k * uncertainty
+    term_min, term_max = _term_range(system, checked, bounds['ln_lower'], bounds['ln_upper'])
+    residual = margin + RT * np.where(direction > 0, term_min, -term_max)
+    
+    flagged = np.flatnonzero(margin > 0)
+    flagged = flagged[np.lexsort((-margin[flagged], -residual[flagged]))]
+    ids = system['reaction_ids']
+    reactions = [
+        {
+            'id': ids[checked[i]],
+            'flux': float(fluxes[checked[i]]),
+            'dG0': float(dg0[i]),
+            'uncertainty': float(uncertainty[i]),
+            'margin': float(margin[i]),
+            'residual': float(residual[i]),
+            'severity': 'infeasible' if residual[i] > 0 else 'unfavorable'
+        }
+        for i in flagged[:limit]
+    ]
+    return {
+        'k': k,
+        'active': len(active),
+        'checked': len(checked),
+        'flagged': len(flagged),
+        'infeasible': int((residual[flagged] > 0).sum()),
+        'reactions': reactions,
+        'cycles': find_cycles(system, fluxes, d, bounds),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def _loop_candidates(system, positions, directions):
+    """
+    Drop reactions that cannot carry loop flux.
+    
+    A loop balances every metabolite, so a reaction touching a metabolite
+    that the remaining reactions (in their flux directions) only produce
+    or only consume is not part of one; removing it can strand others, so
+    this repeats until nothing changes. A loopless solution usually ends
+    empty, without an LP.
+    """
+    nz, local = _gather(system, positions)
+    mets = system['rows'][nz]
+    oriented = directions[positions][local] * system['coefs'][nz]
+    n_mets = len(system['met_ids'])
+    alive = np.ones(len(positions), dtype=bool)
+    while alive.any():
+        live = alive[local]
+        produced = np.bincount(mets, live & (oriented > 0), minlength=n_mets) > 0
+        consumed = np.bincount(mets, live & (oriented < 0), minlength=n_mets) > 0
+        stranded = np.bincount(local, live & ~(produced & consumed)[mets], minlength=len(positions)) > 0
+        if not stranded.any():
+            break
+        alive &= ~stranded
+    return positions[alive]
+
+
+def find_cycles(system, fluxes, directions, bounds):
+    """
+    Flux carried around internal loops of a solution.
+    
+    Solves max Σ u_j s.t. Σ_j S_ij d_j u_j = 0 for every metabolite,
+    0 <= u_j <= |v_j|, over the active internal reactions that can be in a
+    loop at all: u is the largest loop flux contained in the solution
+    (zero when it is loopless).
+    Its support is split into cycles that share metabolites, not counting
+    metabolites with fixed concentrations (water, H+, cofactors), which
+    would join unrelated loops.
+    
+    Returns:
+        List of cycles, largest loop flux first: dicts with loop_flux and
+        reactions (id, flux, loop_flux)
+    """
+    import swiglpk as glpk
+    
+    positions = _loop_candidates(system, np.flatnonzero((directions != 0) & system['internal']), directions)
+    if len(positions) == 0:
+        return []
+    nz, local = _gather(system, positions)
+    mets, met_local = np.unique(system['rows'][nz], return_inverse=True)
+    n = len(positions)
+    
+    problem = glpk.glp_create_prob()
+    try:
+        glpk.glp_set_obj_dir(problem, glpk.GLP_MAX)
+        glpk.glp_add_rows(problem, len(mets))
+        glpk.glp_add_cols(problem, n)
+        for i in range(len(mets)):
+            glpk.glp_set_row_bnds(problem, i + 1, glpk.GLP_FX, 0.0, 0.0)
+        capacity = np.abs(fluxes[positions])
+        for j in range(n):
+            glpk.glp_set_col_bnds(problem, j + 1, glpk.GLP_DB, 0.0, float(capacity[j]))
+            glpk.glp_set_obj_coef(problem, j + 1, 1.0)
+        _load_matrix(glpk, problem, np.concatenate([[0], met_local + 1]), np.concatenate([[0], local + 1]),
+                     np.concatenate([[0.0], directions[positions][local] * system['coefs'][nz]]))
+        _simplex(glpk, problem)
+        if glpk.glp_get_status(problem) != glpk.GLP_OPT or glpk.glp_get_obj_val(problem) <= FLUX_TOLERANCE:
+            return []
+        loop = np.array([glpk.glp_get_col_prim(problem, j + 1) for j in range(n)])
+    finally:
+        glpk.glp_delete_prob(problem)
+    
+    # Group the loop's reactions through shared, non-fixed metabolites
+    in_loop = loop > FLUX_TOLERANCE
+    fixed = bounds['ln_lower'] == bounds['ln_upper']
+    parent = list(range(n))
+    
+    def root(j):
+        while parent[j] != j:
+            parent[j] = parent[parent[j]]
+            j = parent[j]
+        return j
+    
+    first = {}
+    for j, i in zip(local.tolist(), system['rows'][nz].tolist()):
+        if in_loop[j] and not fixed[i]:
+            if i in first:
+                parent[root(j)] = root(first[i])
+            else:
+                first[i] = j
+    
+    groups = {}
+    for j in np.flatnonzero(in_loop):
+        groups.setdefault(root(j), []).append(j)
+    ids = system['reaction_ids']
+    cycles = [
+        {
+            'loop_flux': float(loop[members].max()),
+            'reactions': [
+                {'id': ids[positions[j]], 'flux': float(fluxes[positions[j]]), 'loop_flux': float(loop[j])}
+                for j in sorted(members, key=lambda j: -loop[j])
+            ]
+        }
+        for members in groups.values()
+    ]
+    cycles.sort(key=lambda c: -c['loop_flux'])
+    return cycles
@@ -0,0 +1,103 @@
+"""
+Background warm-up of the heavy dependencies after the server starts.
+
+The app imports without cobra, optlang or the thermo caches so it binds and
+answers quickly; this thread then pays those costs while the server is
+idle, before the first request that needs them. Every step is idempotent:
+a request that arrives first simply triggers the same import or load itself.
+
+Disable with ATACFLUX_WARMUP=0.
+"""
+
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Imported in order; cobra alone pulls pandas, sympy, optlang and libsbml
+MODULES = (
+    'cobra',
+    'cobra.io',
+    'cobra.sampling',
+    'optlang.glpk_interface',
+)
+
+BIND_TIMEOUT = 30.0
+
+_thread = None
+_status = {'state': 'idle', 'steps': {}}
+
+
+def is_enabled():
+    """Whether warm-up runs on server start."""
+    return os.environ.get('ATACFLUX_WARMUP', '1').lower() not in ('0', 'false', 'no')
+
+
+def _wait_for_bind(host, port, timeout):
+    """Poll until something accepts connections on host:port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def _step(name, func):
+    start = time.perf_counter()
+    try:
+        func()
+        _status['steps'][name] = time.perf_counter() - start
+    except Exception as e:
+        _status['steps'][name] = f'failed: {e}'
+        logger.warning("Warm-up step %s failed: %s", name, e)
+
+
+def run():
+    """Import the heavy modules and load the thermo caches."""
+    from data_access import thermo
+    
+    _status['state'] = 'running'
+    for module in MODULES:
+        _step(module, lambda module=module: importlib.import_module(module))
+    _step('thermo.load', thermo.ensure_loaded)
+    _status['state'] = 'done'
+
+
+def start(host='127.0.0.1', port=None):
+    """
+    Start the warm-up thread.
+    
+    Args:
+        host, port: Address the server binds; when port is given the thread
+                    waits until it accepts connections so warm-up never
+                    delays the bind
+    
+    Returns:
+        The thread, or None if warm-up is disabled or already started
+    """
+    global _thread
+    if _thread is not None or not is_enabled():
+        return None
+    
+    def target():
+        if port is not None:
+            _status['state'] = 'waiting'
+            connect_host = '127.0.0.1' if host in ('0.0.0.0', '', None) else host
+            _wait_for_bind(connect_host, port, BIND_TIMEOUT)
+        run()
+    
+    _thread = threading.Thread(target=target, name='warmup', daemon=True)
+    _thread.start()
+    return _thread
+
+
+def status():
+    """Warm-up state and the duration (seconds) of each finished step."""
+    return {'state': _status['state'], 'steps': dict(_status['steps'])}
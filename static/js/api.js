@@ -17,19 +17,49 @@ const API = {
         return response.json();
     },
     
-    async optimize() {
-        const response = await fetch('/api/optimize', { method: 'POST' });
+    async optimize(mode = 'fba') {
+        const response = await fetch('/api/optimize', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ mode })
+        });
+        return response.json();
+    },
+    
+    async setReference(source = 'current') {
+        const response = await fetch('/api/reference', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ source })
+        });
         return response.json();
     },
     
     // Reactions
-    async getReactions(query = '', limit = 50, offset = 0, nonzeroFlux = false) {
-        const response = await fetch(
-            `/api/reactions?q=${encodeURIComponent(query)}&limit=${limit}&offset=${offset}&nonzero_flux=${nonzeroFlux}`
-        );
+    async getReactions(query = '', limit = 50, offset = 0, nonzeroFlux = false, options = {}) {
+        // options: sort, min_flux, max_flux, compartment, subsystem, top
+        let url = `/api/reactions?q=${encodeURIComponent(query)}&limit=${limit}&offset=${offset}&nonzero_flux=${nonzeroFlux}`;
+        for (const [key, value] of Object.entries(options)) {
+            if (value !== null && value !== undefined && value !== '') {
+                url += `&${key}=${encodeURIComponent(value)}`;
+            }
+        }
+        const response = await fetch(url);
         return response.json();
     },
     
+    async streamReactions(query = '', options = {}, onReaction) {
+        // Streams every match (or options.limit rows); resolves to the match count
+        let url = `/api/reactions?format=ndjson&q=${encodeURIComponent(query)}`;
+        for (const [key, value] of Object.entries(options)) {
+            if (value !== null && value !== undefined && value !== '') {
+                url += `&${key}=${encodeURIComponent(value)}`;
+            }
+        }
+        const response = await this.streamNdjson(url, onReaction);
+        return parseInt(response.headers.get('X-Total-Count'), 10);
+    },
+    
     async getReaction(rxnId) {
         const response = await fetch(`/api/reaction/${rxnId}`);
         return response.json();
@@ -46,17 +76,117 @@ const API = {
         return response.json();
     },
     
+    async streamThermoCache(onEntry) {
+        await this.streamNdjson('/api/thermo_cache?format=ndjson', onEntry);
+    },
+    
     async getThermo(rxnId) {
         const response = await fetch(`/api/thermo/${rxnId}`);
         return response.json();
     },
     
+    async getDgPrime(reactions, { concentrations = null, at = null } = {}) {
+        const response = await fetch('/api/thermo/dg_prime', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ reactions, concentrations, at })
+        });
+        return response.json();
+    },
+    
+    async getThermoCheck(k = 2, limit = 50) {
+        const response = await fetch(`/api/thermo/check?k=${k}&limit=${limit}`);
+        return response.json();
+    },
+    
+    async getMdf(selection, { directions = 'flux', concentrations = null } = {}) {
+        // selection: { reactions }, { subsystem }, { pathways } or { subsystems }
+        const response = await fetch('/api/thermo/mdf', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ...selection, directions, concentrations })
+        });
+        return response.json();
+    },
+    
+    // Network
+    async getNetwork(ids = true, refresh = false) {
+        const response = await fetch(`/api/network?ids=${ids}&refresh=${refresh}`);
+        return response.json();
+    },
+    
+    async getCompression() {
+        const response = await fetch('/api/compression');
+        return response.json();
+    },
+    
+    async getFva(reactions = null, fractionOfOptimum = 1.0) {
+        const response = await fetch('/api/fva', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ reactions, fraction_of_optimum: fractionOfOptimum })
+        });
+        return response.json();
+    },
+    
+    // Strain design
+    async designStrain(product, options = {}) {
+        const response = await fetch('/api/strain_design', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ product, ...options })
+        });
+        return response.json();
+    },
+    
+    async getEnvelope(product, points = 20) {
+        const response = await fetch('/api/envelope', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ product, points })
+        });
+        return response.json();
+    },
+    
+    async runDfba(initial, options = {}) {
+        const response = await fetch('/api/dfba', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ initial, ...options })
+        });
+        return response.json();
+    },
+    
+    // Genes
+    async getGene(geneId) {
+        const response = await fetch(`/api/gene/${encodeURIComponent(geneId)}`);
+        return response.json();
+    },
+    
+    async knockoutGenes(geneSets) {
+        const response = await fetch('/api/genes/knockout', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ gene_sets: geneSets })
+        });
+        return response.json();
+    },
+    
     // Pathway
     async getMetabolite(metId) {
         const response = await fetch(`/api/metabolite/${metId}`);
         return response.json();
     },
     
+    async getBatch({ reactions = [], metabolites = [], thermo = [], fields = null } = {}) {
+        const response = await fetch('/api/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ reactions, metabolites, thermo, fields })
+        });
+        return response.json();
+    },
+    
     async getSubsystems() {
         const response = await fetch('/api/subsystems');
         return response.json();
@@ -112,6 +242,44 @@ const API = {
         return response.json();
     },
     
+    // Scenarios
+    async getScenarios() {
+        const response = await fetch('/api/scenarios');
+        return response.json();
+    },
+    
+    async saveScenario(name, note = null) {
+        const response = await fetch('/api/scenarios', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ name, note })
+        });
+        return response.json();
+    },
+    
+    async getScenario(name, version = null) {
+        let url = `/api/scenarios/${encodeURIComponent(name)}`;
+        if (version !== null) url += `?version=${version}`;
+        const response = await fetch(url);
+        return response.json();
+    },
+    
+    async activateScenario(name, { version = null, mode = 'fba', solve = false } = {}) {
+        const response = await fetch(`/api/scenarios/${encodeURIComponent(name)}/activate`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ version, mode, solve })
+        });
+        return response.json();
+    },
+    
+    async deleteScenario(name) {
+        const response = await fetch(`/api/scenarios/${encodeURIComponent(name)}`, {
+            method: 'DELETE'
+        });
+        return response.json();
+    },
+    
     async searchReactions(query, compartment = '') {
         let url = `/api/search/reactions?q=${encodeURIComponent(query)}`;
         if (compartment) {
@@ -133,5 +301,29 @@ const API = {
     async searchByAnnotation(query) {
         const response = await fetch(`/api/search/by_annotation?q=${encodeURIComponent(query)}`);
         return response.json();
+    },
+    
+    // Streaming: call onRecord for each line of an NDJSON response as it arrives
+    async streamNdjson(url, onRecord) {
+        const response = await fetch(url);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (line) onRecord(JSON.parse(line));
+            }
+        }
+        buffer += decoder.decode();
+        if (buffer) onRecord(JSON.parse(buffer));
+        
+        return response;
     }
 };
@@ -8,8 +8,10 @@ const App = {
         totalReactions: 0,
         selectedRxn: null,
         thermoCache: {},
+        reactionDetails: {},  // Prefetched /api/reaction results, cleared on FBA/load
         viewingMetabolite: false,
-        hideZeroFlux: false
+        hideZeroFlux: false,
+        sortByFlux: false
     },
     
     // Initialize
@@ -37,6 +39,7 @@ const App = {
             const data = await API.loadModel();
             if (data.success) {
                 Utils.setStatus('load-status', 'success', `Loaded ${data.path}`);
+                this.state.reactionDetails = {};
                 document.getElementById('model-stats').classList.remove('hidden');
                 document.getElementById('stat-reactions').textContent = data.reactions.toLocaleString();
                 document.getElementById('stat-metabolites').textContent = data.metabolites.toLocaleString();
@@ -69,9 +72,11 @@ const App = {
     async runFBA() {
         Utils.setStatus('fba-status', 'info', 'Optimizing...');
         try {
-            const data = await API.optimize();
+            const mode = document.getElementById('fba-mode').value;
+            const data = await API.optimize(mode);
             if (data.success) {
                 Utils.setStatus('fba-status', 'success', `Growth: ${data.objective_value.toFixed(4)} h⁻¹`);
+                this.state.reactionDetails = {};
                 this.loadReactions();
             } else {
                 Utils.setStatus('fba-status', 'error', data.error);
@@ -81,6 +86,19 @@ const App = {
         }
     },
     
+    async useAsReference() {
+        try {
+            const data = await API.setReference('current');
+            if (data.success) {
+                Utils.setStatus('fba-status', 'success', 'Current fluxes set as MOMA/ROOM reference');
+            } else {
+                Utils.setStatus('fba-status', 'error', data.error);
+            }
+        } catch (e) {
+            Utils.setStatus('fba-status', 'error', e.message);
+        }
+    },
+    
     // Thermodynamics
     async checkThermoStatus() {
         try {
@@ -97,13 +115,17 @@ const App = {
     },
     
     async loadThermoCache() {
+        // Streamed: components share the cache object, which fills in as lines arrive
+        const cache = {};
+        this.state.thermoCache = cache;
+        ReactionDetail.setThermoCache(cache);
+        PathwayTracer.setThermoCache(cache);
+        
         try {
-            const data = await API.getThermoCache();
-            if (data.success) {
-                this.state.thermoCache = data.reactions;
-                ReactionDetail.setThermoCache(data.reactions);
-                PathwayTracer.setThermoCache(data.reactions);
-            }
+            await API.streamThermoCache(entry => {
+                const { id, ...data } = entry;
+                cache[id] = data;
+            });
         } catch (e) {
             console.error('Failed to load thermo cache:', e);
         }
@@ -119,7 +141,8 @@ const App = {
                 query, 
                 this.state.pageSize, 
                 this.state.currentOffset,
-                this.state.hideZeroFlux
+                this.state.hideZeroFlux,
+                { sort: this.state.sortByFlux ? 'abs_flux' : null }
             );
             this.state.totalReactions = data.total;
             this.updatePagination();
@@ -166,7 +189,7 @@ const App = {
         ReactionDetail.showLoading();
         
         try {
-            const rxn = await API.getReaction(rxnId);
+            const rxn = this.state.reactionDetails[rxnId] || await API.getReaction(rxnId);
             if (rxn.error) {
                 ReactionDetail.showError(rxn.error);
                 return;
@@ -198,6 +221,12 @@ const App = {
         this.loadReactions();
     },
     
+    toggleSortByFlux() {
+        this.state.sortByFlux = document.getElementById('sort-by-flux').checked;
+        this.state.currentOffset = 0;
+        this.loadReactions();
+    },
+    
     applyFluxFilter() {
         // No longer needed - filtering is done server-side
     }
@@ -206,9 +235,11 @@ const App = {
 // Global functions for onclick handlers
 function loadModel() { App.loadModel(); }
 function runFBA() { App.runFBA(); }
+function useAsReference() { App.useAsReference(); }
 function prevPage() { App.prevPage(); }
 function nextPage() { App.nextPage(); }
 function toggleZeroFlux() { App.toggleZeroFlux(); }
+function toggleSortByFlux() { App.toggleSortByFlux(); }
 function searchReactions() { App.searchReactions(); }
 
 // Expose App globally for component callbacks
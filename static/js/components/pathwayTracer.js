@@ -24,11 +24,30 @@ const PathwayTracer = {
                 return;
             }
             this.render(data);
+            this.prefetchReactions([...data.producing, ...data.consuming]);
         } catch (e) {
             this.container.innerHTML = `<p class="status error">${e.message}</p>`;
         }
     },
     
+    // Fetch the details of the listed reactions in one batch request,
+    // so clicking through the pathway doesn't wait on a round trip each
+    async prefetchReactions(reactions) {
+        if (!window.App) return;
+        const cache = App.state.reactionDetails;
+        const ids = reactions.map(rxn => rxn.id).filter(id => !cache[id]).slice(0, 100);
+        if (ids.length === 0) return;
+        
+        try {
+            const data = await API.getBatch({ reactions: ids });
+            if (data.reactions) {
+                Object.assign(App.state.reactionDetails, data.reactions);
+            }
+        } catch (e) {
+            // Prefetching is best effort; selectReaction falls back to /api/reaction
+        }
+    },
+    
     render(met) {
         const compartmentDisplay = met.compartment_name 
             ? `${met.compartment_name} [${met.compartment}]`
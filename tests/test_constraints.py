@@ -0,0 +1,44 @@
+"""Bound scaling sources (data_access.constraints)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model, constraints
+
+
+@pytest.fixture
+def reaction_ids(monkeypatch):
+    ids = ['A', 'B', 'C', 'D']
+    monkeypatch.setattr(cobra_model, '_reaction_ids', ids)
+    monkeypatch.setattr(constraints, '_bound_scales', {})
+    return ids
+
+
+def _scaled_upper():
+    return constraints._scaled(np.full(4, -10.0), np.full(4, 10.0))[1].tolist()
+
+
+def test_context_and_accessibility_scales_compose_and_clear_separately(reaction_ids):
+    nan = np.nan
+    constraints.set_bound_scale('accessibility', [0.5, 0.5, nan, nan], 'atac', reaction_ids)
+    constraints.set_bound_scale('context', [nan, 0.0, 0.0, nan], 'ctx', reaction_ids)
+    assert _scaled_upper() == [5.0, 0.0, 0.0, 10.0]
+    assert constraints.get_bound_scale()['scaled_reactions'] == 3
+    
+    constraints.set_bound_scale('context', None)
+    assert _scaled_upper() == [5.0, 5.0, 10.0, 10.0]
+    assert list(constraints.get_bound_scale()['sources']) == ['accessibility']
+    
+    constraints.set_bound_scale('accessibility', None)
+    assert constraints.get_bound_scale() is None
+    assert _scaled_upper() == [10.0] * 4
+
+
+def test_unknown_source(reaction_ids):
+    with pytest.raises(ValueError):
+        constraints.set_bound_scale('atac', [1.0] * 4)
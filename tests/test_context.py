@@ -0,0 +1,24 @@
+"""Context-specific models (services.context)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+cobra = pytest.importorskip('cobra')
+
+from services import context
+
+
+def test_imat_objective_within_high_and_low(tmp_path):
+    model = cobra.io.load_model('textbook')
+    genes = [g.id for g in model.genes]
+    matrix = np.random.default_rng(0).lognormal(size=(3, len(genes)))
+    summary = context.run(model, ['a', 'b', 'c'], genes, matrix, method='imat', processes=1,
+                          output_dir=str(tmp_path))
+    for stats in summary['stats'].values():
+        assert stats['status'] == 'optimal'
+        assert stats['objective'] <= stats['high'] + stats['low']
@@ -0,0 +1,34 @@
+"""Compiled GPR evaluation (data_access.gpr)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import gpr
+
+cobra = pytest.importorskip('cobra')
+
+
+def _compiled(rules):
+    model = cobra.Model('gpr')
+    reactions = [cobra.Reaction(f'R{i}') for i in range(len(rules))]
+    model.add_reactions(reactions)
+    for rxn, rule in zip(reactions, rules):
+        rxn.gene_reaction_rule = rule
+    return gpr.compile_model(model)
+
+
+def test_repeated_children_count_once():
+    compiled = _compiled(['a or a or b', '(a and c) or (c and a)', 'a and a', 'a or b'])
+    values = dict(a=2.0, b=3.0, c=5.0)
+    matrix = np.array([[values[g] for g in compiled['genes']]])
+    assert gpr.reaction_scores(compiled, matrix).tolist() == [[5.0, 2.0, 2.0, 5.0]]
+
+
+def test_knockout_of_repeated_gene():
+    compiled = _compiled(['a or a', 'a or a or b'])
+    assert [off.tolist() for off in gpr.knocked_out(compiled, [['a'], ['b']])] == [[0], []]
@@ -0,0 +1,27 @@
+"""Import time of app.py (benchmarks/import_budget.py as a test)."""
+
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../benchmarks'))
+
+import import_budget
+
+
+def test_app_imports_within_budget_without_heavy_modules():
+    prefix = tempfile.mkdtemp(prefix='test-pycache-')
+    try:
+        import_budget.measure(prefix)  # Populate the bytecode cache
+        entries = min(
+            (import_budget.measure(prefix) for _ in range(3)),
+            key=lambda e: next(cum for mod, _, cum, _ in e if mod == 'app')
+        )
+    finally:
+        shutil.rmtree(prefix, ignore_errors=True)
+    
+    imported = {mod for mod, _, _, _ in entries}
+    assert not [mod for mod in import_budget.DEFERRED if mod in imported]
+    total_ms = next(cum for mod, _, cum, _ in entries if mod == 'app') / 1000
+    assert total_ms <= import_budget.BUDGET_MS
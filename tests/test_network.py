@@ -0,0 +1,48 @@
+"""Blocked reactions from the cone LP passes (services.network)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+cobra = pytest.importorskip('cobra')
+pytest.importorskip('swiglpk')
+
+from cobra.flux_analysis import find_blocked_reactions
+from services import network
+
+
+def _trap(model):
+    """
+    Reactions no dead end explains: A -> 2 B and B -> A balance only at zero
+    flux. TINY can carry flux, but only 1e-8 of what feeds it.
+    """
+    a, b, c, d, e = (cobra.Metabolite(f'trap_{x}_c', compartment='c') for x in 'abcde')
+    reactions = []
+    for rxn_id, stoichiometry, bounds in (
+        ('TRAP1', {a: -1, b: 2}, (0, 1000)),
+        ('TRAP2', {b: -1, a: 1}, (0, 1000)),
+        ('TRAP3', {b: -1, c: 1}, (-1000, 1000)),
+        ('TRAP4', {c: -1, a: 1}, (0, 1000)),
+        ('TINY_IN', {d: 1}, (0, 1000)),
+        ('TINY_SCALE', {d: -1, e: 1e-8}, (0, 1000)),
+        ('TINY', {e: -1}, (0, 1000))
+    ):
+        rxn = cobra.Reaction(rxn_id, lower_bound=bounds[0], upper_bound=bounds[1])
+        rxn.add_metabolites(stoichiometry)
+        reactions.append(rxn)
+    model.add_reactions(reactions)
+    return model
+
+
+def test_blocked_matches_find_blocked_reactions():
+    model = _trap(cobra.io.load_model('textbook'))
+    analysis = network.analyze(model, processes=1)
+    blocked = {rxn_id for rxn_id, b in zip(analysis['reaction_ids'], analysis['blocked']) if b}
+    assert blocked == set(find_blocked_reactions(model, open_exchanges=False))
+    assert {'TRAP1', 'TRAP2'} <= blocked
+    assert 'TINY' not in blocked
+    assert not np.all(analysis['structurally_blocked'][analysis['blocked']])
@@ -0,0 +1,22 @@
+"""Sampling profiler (profiler)."""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+import profiler
+
+
+def test_native_call_holding_the_gil_is_counted_in_full():
+    sampler = profiler.Sampler(thread_ids=[threading.get_ident()], interval=0.005)
+    sampler.start()
+    start = time.perf_counter()
+    sum(range(30_000_000))  # One C call that keeps the GIL, like a GLPK solve
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+    assert sampler.snapshots < sampler.samples
+    assert sampler.samples >= 0.5 * elapsed / sampler.interval
+    assert sum(sampler.counts.values()) == sampler.samples
@@ -0,0 +1,52 @@
+"""Paging of flux-sorted reaction listings (data_access.cobra_model)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from data_access import cobra_model
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    """4000 reactions, 300 with nonzero flux drawn from a few values, so keys tie."""
+    rng = np.random.default_rng(0)
+    n = 4000
+    flux = np.zeros(n)
+    nonzero = rng.choice(n, 300, replace=False)
+    flux[nonzero] = rng.choice([-2.0, -1.0, 1.0, 2.0, 5.0], 300)
+    monkeypatch.setattr(cobra_model, '_model', object())
+    monkeypatch.setattr(cobra_model, '_reaction_ids', [f'R{i}' for i in range(n)])
+    monkeypatch.setattr(cobra_model, '_flux_vector', flux)
+    return flux
+
+
+def _pages(size, **filters):
+    rows, offset = [], 0
+    while True:
+        page, total, _ = cobra_model._select_reactions(
+            None, size, offset, False, filters.get('sort'), None, None, None, None, filters.get('top_n')
+        )
+        rows.extend(page.tolist())
+        offset += size
+        if offset >= total:
+            return rows
+
+
+@pytest.mark.parametrize('sort,key', [
+    ('abs_flux', lambda flux: -np.abs(flux)),
+    ('flux', lambda flux: flux),
+    ('-flux', lambda flux: -flux)
+])
+def test_pages_concatenate_to_full_stable_sort(listing, sort, key):
+    expected = np.argsort(key(listing), kind='stable').tolist()
+    assert _pages(50, sort=sort) == expected
+
+
+def test_top_n_keeps_earliest_of_tied_reactions(listing):
+    expected = np.argsort(-np.abs(listing), kind='stable')[:500].tolist()
+    assert _pages(50, top_n=500) == expected
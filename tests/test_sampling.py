@@ -0,0 +1,26 @@
+"""Chunked flux sampling (services.sampling)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+cobra = pytest.importorskip('cobra')
+
+from services import sampling
+
+
+@pytest.mark.parametrize('method', ['optgp', 'achr'])
+def test_chunks_continue_the_chains(tmp_path, method):
+    model = cobra.io.load_model('textbook')
+    runs = [
+        sampling.sample(model, 12, chunk_size=chunk_size, method=method, processes=1,
+                        thinning=10, seed=0, output_dir=str(tmp_path))
+        for chunk_size in (12, 5)
+    ]
+    whole, chunked = (sampling.open_samples(run['id'], str(tmp_path)) for run in runs)
+    assert np.allclose(whole, chunked)
+    assert len(np.unique(np.round(chunked, 4), axis=0)) == len(chunked)
@@ -0,0 +1,48 @@
+"""Canonical fluxes under each basis policy (data_access.solver)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+cobra = pytest.importorskip('cobra')
+pytest.importorskip('swiglpk')
+
+from data_access import flux_modes, solver
+
+
+@pytest.fixture
+def model():
+    """Textbook model with a second, equally cheap copy of PGI."""
+    model = cobra.io.load_model('textbook')
+    pgi = model.reactions.PGI
+    twin = cobra.Reaction('PGI_twin', lower_bound=pgi.lower_bound, upper_bound=pgi.upper_bound)
+    twin.add_metabolites(pgi.metabolites)
+    model.add_reactions([twin])
+    yield model
+    flux_modes._templates.pop(id(model), None)
+    solver.configure(basis='warm', canonical=True)
+
+
+def _history_then_solve(model, knockout):
+    """Solve once with one copy knocked out, then with both open."""
+    with model:
+        model.reactions.get_by_id(knockout).knock_out()
+        solver.solve(model)
+    return solver.solve(model)
+
+
+def test_policies_agree_on_tied_reactions(model):
+    solver.configure(canonical=True)
+    results = []
+    for basis in solver.BASIS_POLICIES:
+        solver.configure(basis=basis)
+        for knockout in ('PGI', 'PGI_twin'):
+            solution = _history_then_solve(model, knockout)
+            assert solution.status == 'optimal'
+            results.append(solution.fluxes.values)
+    for fluxes in results[1:]:
+        assert np.allclose(fluxes, results[0], rtol=0, atol=1e-9)